@@ -3,9 +3,15 @@ BI Forecasting Dashboard - Main Application
 A simple Flask app with Bokeh integration
 """
 import os
+import sys
 from flask import Flask
 from flask_login import LoginManager
 
+# Shared forecasting core lives at the repo root
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
 # Initialize login manager
 login_manager = LoginManager()
 
@@ -36,6 +42,10 @@ def create_app():
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(auth_bp)
     
+    # Server-Timing header per request, latency histograms at /metrics
+    from forecasting.timing import init_app as init_timing
+    init_timing(app)
+    
     # Create tables and default user
     with app.app_context():
         db.create_all()
@@ -50,6 +60,31 @@ def create_app():
         except Exception as e:
             print(f"⚠️  Could not create admin user: {e}")
     
+    # Warm caches in the background; /ready answers 503 until done
+    from forecasting.warmup import init_app as init_warmup
+    from routes import DASHBOARD_CHARTS, datasets, render_chart_item
+    
+    def warm_imports():
+        import pandas  # noqa: F401
+        import bokeh.embed  # noqa: F401
+        import bokeh.plotting  # noqa: F401
+    
+    def warm_datasets():
+        for name in ('daily_features', 'forecast_results'):
+            datasets.get(name)
+    
+    def warm_charts():
+        # Zoom callbacks build their URLs with url_for
+        with app.test_request_context():
+            for name in DASHBOARD_CHARTS:
+                render_chart_item(name)
+    
+    init_warmup(app, [
+        ('imports', warm_imports),
+        ('datasets', warm_datasets),
+        ('charts', warm_charts),
+    ])
+    
     return app
 
 # Create the app
@@ -1,15 +1,17 @@
 """
 Routes for dashboard and authentication
 """
+import json
 import os
-import pandas as pd
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash
 from flask_login import login_required, login_user, logout_user, current_user
-from bokeh.plotting import figure
-from bokeh.embed import components
-from bokeh.models import HoverTool
 
 from models import db
+from forecasting.datasets import get_dataset_cache
+from forecasting.chart_cache import ChartCache
+from forecasting.downsample import series_window, to_epoch_ms, zoom_callback
+from forecasting.series import make_etag
+from forecasting.timing import stage
 
 # Create blueprints
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -18,290 +20,400 @@ auth_bp = Blueprint('auth', __name__)
 # Get base path
 BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Processed CSVs are parsed once per process and revalidated by mtime/size
+DATA_DIR = os.environ.get('BI_DATA_DIR', os.path.join(BASE_PATH, 'data', 'processed'))
+datasets = get_dataset_cache(DATA_DIR)
+
+# Rendered charts are reused for every user until the CSVs change
+chart_cache = ChartCache(
+    max_entries=int(os.environ.get('CHART_CACHE_ENTRIES', '64')),
+    max_bytes=int(os.environ.get('CHART_CACHE_BYTES', str(64 * 1024 * 1024))),
+)
+
 # ============================================================================
 # BOKEH CHART GENERATION
 # ============================================================================
 
-def generate_bokeh_charts():
-    """Generate all Bokeh charts from CSV data"""
+# Columns of daily_features referenced by the dashboard glyphs
+CHART_COLUMNS = [
+    'Date', 'Units Sold', 'Price', 'Inventory Level', 'Demand',
+    'Units Ordered', 'Discount', 'Promotion',
+]
+
+
+def timeseries_source(df, shared, column, plot):
+    """Source for a time-series plot.
+
+    Series that fit in the plot width use the chart's source. Longer ones get
+    their own LTTB-downsampled source (about one point per pixel) plus a zoom
+    callback that refetches the visible range from /dashboard/series.
+    """
+    if len(df) <= plot.width:
+        return shared
+    from bokeh.models import ColumnDataSource
+    x, y = series_window(df, column, n_out=plot.width)
+    source = ColumnDataSource({'Date': x, column: y})
+    plot.js_on_event('rangesupdate', zoom_callback(
+        source, url_for('dashboard.series_data'), column, plot.width))
+    return source
+
+
+def chart_source(df, columns):
+    """Source holding only the columns a chart's glyphs reference by name"""
+    from bokeh.models import ColumnDataSource
+    return ColumnDataSource({col: df[col].to_numpy() for col in columns})
+
+
+def build_units_sold(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p1 = figure(
+        x_axis_type="datetime",
+        title="📈 Units Sold Over Time",
+        width=1000,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    s1 = timeseries_source(df, source, 'Units Sold', p1)
+    p1.line('Date', 'Units Sold', source=s1, line_width=3, color='#00d9ff', alpha=0.9)
+    p1.scatter('Date', 'Units Sold', source=s1, size=5, color='#00d9ff', alpha=0.6)
     
-    try:
-        # Load data
-        csv_path = os.path.join(BASE_PATH, 'data', 'processed', 'daily_features.csv')
-        forecast_path = os.path.join(BASE_PATH, 'data', 'processed', 'lstm_forecast_results.csv')
-        
-        if not os.path.exists(csv_path):
-            return {}, "", "CSV file not found"
-        
-        df = pd.read_csv(csv_path)
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        plots = {}
-        
-        # ===== PLOT 1: Units Sold Over Time =====
-        p1 = figure(
-            x_axis_type="datetime",
-            title="📈 Units Sold Over Time",
-            width=1000,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p1.line(df['Date'], df['Units Sold'], line_width=3, color='#00d9ff', alpha=0.9)
-        p1.scatter(df['Date'], df['Units Sold'], size=5, color='#00d9ff', alpha=0.6)
-        
-        hover1 = HoverTool(tooltips=[
-            ("Date", "@x{%F}"),
-            ("Units", "@y{0,0.00}")
-        ], formatters={"@x": "datetime"})
-        p1.add_tools(hover1)
-        p1.xaxis.axis_label = "Date"
-        p1.yaxis.axis_label = "Units Sold"
-        p1.title.text_font_size = "14pt"
-        p1.title.text_color = "#00d9ff"
-        p1.xaxis.axis_label_text_color = "#9ca3af"
-        p1.yaxis.axis_label_text_color = "#9ca3af"
-        
-        plots['plot1'] = p1
-        
-        # ===== PLOT 2: Price Trend =====
-        p2 = figure(
-            x_axis_type="datetime",
-            title="💰 Price Trend",
-            width=1000,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p2.line(df['Date'], df['Price'], line_width=2, color='#ff6b9d', alpha=0.9)
-        p2.scatter(df['Date'], df['Price'], size=4, color='#ff6b9d', alpha=0.6)
-        
-        hover2 = HoverTool(tooltips=[
-            ("Date", "@x{%F}"),
-            ("Price", "@y{$0,0.00}")
-        ], formatters={"@x": "datetime"})
-        p2.add_tools(hover2)
-        p2.xaxis.axis_label = "Date"
-        p2.yaxis.axis_label = "Price ($)"
-        p2.title.text_font_size = "14pt"
-        p2.title.text_color = "#ff6b9d"
-        p2.xaxis.axis_label_text_color = "#9ca3af"
-        p2.yaxis.axis_label_text_color = "#9ca3af"
-        
-        plots['plot2'] = p2
-        
-        # ===== PLOT 3: Inventory Level =====
-        p3 = figure(
-            x_axis_type="datetime",
-            title="📦 Inventory Level",
-            width=1000,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p3.line(df['Date'], df['Inventory Level'], line_width=2, color='#2ecc71', alpha=0.9)
-        p3.scatter(df['Date'], df['Inventory Level'], size=4, color='#2ecc71', alpha=0.6)
-        
-        hover3 = HoverTool(tooltips=[
-            ("Date", "@x{%F}"),
-            ("Inventory", "@y{0,0.00}")
-        ], formatters={"@x": "datetime"})
-        p3.add_tools(hover3)
-        p3.xaxis.axis_label = "Date"
-        p3.yaxis.axis_label = "Inventory"
-        p3.title.text_font_size = "13pt"
-        
-        plots['plot3'] = p3
-        
-        # ===== PLOT 4: Demand =====
-        p4 = figure(
-            x_axis_type="datetime",
-            title="📊 Demand",
-            width=1000,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p4.line(df['Date'], df['Demand'], line_width=2, color='#f39c12', alpha=0.9)
-        p4.scatter(df['Date'], df['Demand'], size=4, color='#f39c12', alpha=0.6)
-        
-        hover4 = HoverTool(tooltips=[
-            ("Date", "@x{%F}"),
-            ("Demand", "@y{0,0.00}")
-        ], formatters={"@x": "datetime"})
-        p4.add_tools(hover4)
-        p4.xaxis.axis_label = "Date"
-        p4.yaxis.axis_label = "Demand"
-        p4.title.text_font_size = "14pt"
-        p4.title.text_color = "#f39c12"
-        p4.xaxis.axis_label_text_color = "#9ca3af"
-        p4.yaxis.axis_label_text_color = "#9ca3af"
-        
-        plots['plot4'] = p4
-        
-        # ===== PLOT 5: Price vs Units (Scatter) =====
-        p5 = figure(
-            title="💹 Price vs Units Sold",
-            width=900,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p5.scatter('Price', 'Units Sold', source=df, size=6, color='#9b59b6', alpha=0.7)
-        
-        hover5 = HoverTool(tooltips=[
-            ("Price", "@Price{$0,0.00}"),
-            ("Units", "@{Units Sold}{0,0.00}")
-        ])
-        p5.add_tools(hover5)
-        p5.xaxis.axis_label = "Price ($)"
-        p5.yaxis.axis_label = "Units Sold"
-        p5.title.text_font_size = "14pt"
-        p5.title.text_color = "#9b59b6"
-        p5.xaxis.axis_label_text_color = "#9ca3af"
-        p5.yaxis.axis_label_text_color = "#9ca3af"
-        
-        plots['plot5'] = p5
-        
-        # ===== PLOT 6: Inventory vs Orders (Scatter) =====
-        p6 = figure(
-            title="📦 Inventory vs Orders",
-            width=900,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p6.scatter('Inventory Level', 'Units Ordered', source=df, size=6, color='#1abc9c', alpha=0.7)
-        
-        hover6 = HoverTool(tooltips=[
-            ("Inventory", "@{Inventory Level}{0,0.00}"),
-            ("Ordered", "@{Units Ordered}{0,0.00}")
-        ])
-        p6.add_tools(hover6)
-        p6.xaxis.axis_label = "Inventory Level"
-        p6.yaxis.axis_label = "Units Ordered"
-        p6.title.text_font_size = "14pt"
-        p6.title.text_color = "#1abc9c"
-        p6.xaxis.axis_label_text_color = "#9ca3af"
-        p6.yaxis.axis_label_text_color = "#9ca3af"
-        
-        plots['plot6'] = p6
-        
-        # ===== PLOT 7: Discount vs Units (Scatter) =====
-        p7 = figure(
-            title="🏷️  Discount Impact",
-            width=900,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p7.scatter('Discount', 'Units Sold', source=df, size=6, color='#e67e22', alpha=0.7)
-        
-        hover7 = HoverTool(tooltips=[
-            ("Discount", "@Discount{0.00}%"),
-            ("Units", "@{Units Sold}{0,0.00}")
-        ])
-        p7.add_tools(hover7)
-        p7.xaxis.axis_label = "Discount"
-        p7.yaxis.axis_label = "Units Sold"
-        p7.title.text_font_size = "14pt"
-        p7.title.text_color = "#e67e22"
-        p7.xaxis.axis_label_text_color = "#9ca3af"
-        p7.yaxis.axis_label_text_color = "#9ca3af"
-        
-        plots['plot7'] = p7
-        
-        # ===== PLOT 8: Promotion vs Units (Scatter) =====
-        p8 = figure(
-            title="🎯 Promotion Impact",
-            width=900,
-            height=380,
-            tools="pan,wheel_zoom,box_zoom,reset,save",
-            background_fill_color="#1a1f2e",
-            border_fill_color="#2a3142"
-        )
-        p8.scatter('Promotion', 'Units Sold', source=df, size=6, color='#c0392b', alpha=0.7)
-        
-        hover8 = HoverTool(tooltips=[
-            ("Promotion", "@Promotion{0.00}"),
-            ("Units", "@{Units Sold}{0,0.00}")
-        ])
-        p8.add_tools(hover8)
-        p8.xaxis.axis_label = "Promotion"
-        p8.yaxis.axis_label = "Units Sold"
-        p8.title.text_font_size = "14pt"
-        p8.title.text_color = "#c0392b"
-        p8.xaxis.axis_label_text_color = "#9ca3af"
-        p8.yaxis.axis_label_text_color = "#9ca3af"
-        
-        plots['plot8'] = p8
-        
-        # ===== PLOT 9: LSTM Forecast =====
-        if os.path.exists(forecast_path):
-            df_forecast = pd.read_csv(forecast_path)
-            df_forecast['Date'] = pd.to_datetime(df_forecast['Date'])
-            
-            p9 = figure(
-                x_axis_type="datetime",
-                title="🤖 LSTM Forecast: Actual vs Predicted",
-                width=1000,
-                height=380,
-                tools="pan,wheel_zoom,box_zoom,reset,save",
-                background_fill_color="#1a1f2e",
-                border_fill_color="#2a3142"
-            )
-            
-            # Actual
-            p9.line(df_forecast['Date'], df_forecast['Actual Units Sold'], 
-                   line_width=3, color='#00d9ff', legend_label='Actual', alpha=0.9)
-            p9.scatter(df_forecast['Date'], df_forecast['Actual Units Sold'], 
-                      size=5, color='#00d9ff', alpha=0.6)
-            
-            # Predicted
-            p9.line(df_forecast['Date'], df_forecast['Predicted Units Sold'], 
-                   line_width=3, color='#f39c12', line_dash='dashed', 
-                   legend_label='Predicted', alpha=0.9)
-            p9.scatter(df_forecast['Date'], df_forecast['Predicted Units Sold'], 
-                      size=5, color='#f39c12', alpha=0.6)
-            
-            hover9 = HoverTool(tooltips=[
-                ("Date", "@x{%F}"),
-                ("Value", "@y{0,0.00}")
-            ], formatters={"@x": "datetime"})
-            p9.add_tools(hover9)
-            p9.legend.location = "top_left"
-            p9.legend.click_policy = "hide"
-            p9.xaxis.axis_label = "Date"
-            p9.yaxis.axis_label = "Units Sold"
-            p9.title.text_font_size = "14pt"
-            p9.title.text_color = "#00d9ff"
-            p9.xaxis.axis_label_text_color = "#9ca3af"
-            p9.yaxis.axis_label_text_color = "#9ca3af"
-            
-            plots['plot9'] = p9
-        
-        # Embed all plots
-        plot_list = [plots[f'plot{i}'] for i in range(1, len(plots) + 1)]
-        script, divs = components(tuple(plot_list))
-        
-        # Map divs to plot names AND FIX display:contents
-        plot_divs = {}
-        for i, (plot_name) in enumerate([f'plot{j}' for j in range(1, len(plots) + 1)]):
-            # Remove "display: contents" from inline style to allow CSS to work
-            div_html = divs[i].replace('style="display: contents;"', 'style="display: block;"')
-            plot_divs[plot_name] = div_html
-        
-        return plot_divs, script, None
-        
-    except Exception as e:
-        return {}, "", str(e)
+    hover1 = HoverTool(tooltips=[
+        ("Date", "@Date{%F}"),
+        ("Units", "@{Units Sold}{0,0.00}")
+    ], formatters={"@Date": "datetime"})
+    p1.add_tools(hover1)
+    p1.xaxis.axis_label = "Date"
+    p1.yaxis.axis_label = "Units Sold"
+    p1.title.text_font_size = "14pt"
+    p1.title.text_color = "#00d9ff"
+    p1.xaxis.axis_label_text_color = "#9ca3af"
+    p1.yaxis.axis_label_text_color = "#9ca3af"
+    return p1
+
+
+def build_price(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p2 = figure(
+        x_axis_type="datetime",
+        title="💰 Price Trend",
+        width=1000,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    s2 = timeseries_source(df, source, 'Price', p2)
+    p2.line('Date', 'Price', source=s2, line_width=2, color='#ff6b9d', alpha=0.9)
+    p2.scatter('Date', 'Price', source=s2, size=4, color='#ff6b9d', alpha=0.6)
+    
+    hover2 = HoverTool(tooltips=[
+        ("Date", "@Date{%F}"),
+        ("Price", "@Price{$0,0.00}")
+    ], formatters={"@Date": "datetime"})
+    p2.add_tools(hover2)
+    p2.xaxis.axis_label = "Date"
+    p2.yaxis.axis_label = "Price ($)"
+    p2.title.text_font_size = "14pt"
+    p2.title.text_color = "#ff6b9d"
+    p2.xaxis.axis_label_text_color = "#9ca3af"
+    p2.yaxis.axis_label_text_color = "#9ca3af"
+    return p2
+
+
+def build_inventory(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p3 = figure(
+        x_axis_type="datetime",
+        title="📦 Inventory Level",
+        width=1000,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    s3 = timeseries_source(df, source, 'Inventory Level', p3)
+    p3.line('Date', 'Inventory Level', source=s3, line_width=2, color='#2ecc71', alpha=0.9)
+    p3.scatter('Date', 'Inventory Level', source=s3, size=4, color='#2ecc71', alpha=0.6)
+    
+    hover3 = HoverTool(tooltips=[
+        ("Date", "@Date{%F}"),
+        ("Inventory", "@{Inventory Level}{0,0.00}")
+    ], formatters={"@Date": "datetime"})
+    p3.add_tools(hover3)
+    p3.xaxis.axis_label = "Date"
+    p3.yaxis.axis_label = "Inventory"
+    p3.title.text_font_size = "13pt"
+    return p3
+
+
+def build_demand(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p4 = figure(
+        x_axis_type="datetime",
+        title="📊 Demand",
+        width=1000,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    s4 = timeseries_source(df, source, 'Demand', p4)
+    p4.line('Date', 'Demand', source=s4, line_width=2, color='#f39c12', alpha=0.9)
+    p4.scatter('Date', 'Demand', source=s4, size=4, color='#f39c12', alpha=0.6)
+    
+    hover4 = HoverTool(tooltips=[
+        ("Date", "@Date{%F}"),
+        ("Demand", "@Demand{0,0.00}")
+    ], formatters={"@Date": "datetime"})
+    p4.add_tools(hover4)
+    p4.xaxis.axis_label = "Date"
+    p4.yaxis.axis_label = "Demand"
+    p4.title.text_font_size = "14pt"
+    p4.title.text_color = "#f39c12"
+    p4.xaxis.axis_label_text_color = "#9ca3af"
+    p4.yaxis.axis_label_text_color = "#9ca3af"
+    return p4
+
+
+def build_price_vs_units(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p5 = figure(
+        title="💹 Price vs Units Sold",
+        width=900,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    p5.scatter('Price', 'Units Sold', source=source, size=6, color='#9b59b6', alpha=0.7)
+    
+    hover5 = HoverTool(tooltips=[
+        ("Price", "@Price{$0,0.00}"),
+        ("Units", "@{Units Sold}{0,0.00}")
+    ])
+    p5.add_tools(hover5)
+    p5.xaxis.axis_label = "Price ($)"
+    p5.yaxis.axis_label = "Units Sold"
+    p5.title.text_font_size = "14pt"
+    p5.title.text_color = "#9b59b6"
+    p5.xaxis.axis_label_text_color = "#9ca3af"
+    p5.yaxis.axis_label_text_color = "#9ca3af"
+    return p5
+
+
+def build_inventory_vs_orders(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p6 = figure(
+        title="📦 Inventory vs Orders",
+        width=900,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    p6.scatter('Inventory Level', 'Units Ordered', source=source, size=6, color='#1abc9c', alpha=0.7)
+    
+    hover6 = HoverTool(tooltips=[
+        ("Inventory", "@{Inventory Level}{0,0.00}"),
+        ("Ordered", "@{Units Ordered}{0,0.00}")
+    ])
+    p6.add_tools(hover6)
+    p6.xaxis.axis_label = "Inventory Level"
+    p6.yaxis.axis_label = "Units Ordered"
+    p6.title.text_font_size = "14pt"
+    p6.title.text_color = "#1abc9c"
+    p6.xaxis.axis_label_text_color = "#9ca3af"
+    p6.yaxis.axis_label_text_color = "#9ca3af"
+    return p6
+
+
+def build_discount(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p7 = figure(
+        title="🏷️  Discount Impact",
+        width=900,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    p7.scatter('Discount', 'Units Sold', source=source, size=6, color='#e67e22', alpha=0.7)
+    
+    hover7 = HoverTool(tooltips=[
+        ("Discount", "@Discount{0.00}%"),
+        ("Units", "@{Units Sold}{0,0.00}")
+    ])
+    p7.add_tools(hover7)
+    p7.xaxis.axis_label = "Discount"
+    p7.yaxis.axis_label = "Units Sold"
+    p7.title.text_font_size = "14pt"
+    p7.title.text_color = "#e67e22"
+    p7.xaxis.axis_label_text_color = "#9ca3af"
+    p7.yaxis.axis_label_text_color = "#9ca3af"
+    return p7
+
+
+def build_promotion(df, source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p8 = figure(
+        title="🎯 Promotion Impact",
+        width=900,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    p8.scatter('Promotion', 'Units Sold', source=source, size=6, color='#c0392b', alpha=0.7)
+    
+    hover8 = HoverTool(tooltips=[
+        ("Promotion", "@Promotion{0.00}"),
+        ("Units", "@{Units Sold}{0,0.00}")
+    ])
+    p8.add_tools(hover8)
+    p8.xaxis.axis_label = "Promotion"
+    p8.yaxis.axis_label = "Units Sold"
+    p8.title.text_font_size = "14pt"
+    p8.title.text_color = "#c0392b"
+    p8.xaxis.axis_label_text_color = "#9ca3af"
+    p8.yaxis.axis_label_text_color = "#9ca3af"
+    return p8
+
+
+def build_forecast(df, forecast_source):
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    p9 = figure(
+        x_axis_type="datetime",
+        title="🤖 LSTM Forecast: Actual vs Predicted",
+        width=1000,
+        height=380,
+        tools="pan,wheel_zoom,box_zoom,reset,save",
+        background_fill_color="#1a1f2e",
+        border_fill_color="#2a3142"
+    )
+    
+    # Actual
+    p9.line('Date', 'Actual Units Sold', source=forecast_source,
+           line_width=3, color='#00d9ff', legend_label='Actual', alpha=0.9)
+    p9.scatter('Date', 'Actual Units Sold', source=forecast_source,
+              size=5, color='#00d9ff', alpha=0.6)
+    
+    # Predicted
+    p9.line('Date', 'Predicted Units Sold', source=forecast_source,
+           line_width=3, color='#f39c12', line_dash='dashed', 
+           legend_label='Predicted', alpha=0.9)
+    p9.scatter('Date', 'Predicted Units Sold', source=forecast_source,
+              size=5, color='#f39c12', alpha=0.6)
+    
+    hover9 = HoverTool(tooltips=[
+        ("Date", "@Date{%F}"),
+        ("Actual", "@{Actual Units Sold}{0,0.00}"),
+        ("Predicted", "@{Predicted Units Sold}{0,0.00}")
+    ], formatters={"@Date": "datetime"})
+    p9.add_tools(hover9)
+    p9.legend.location = "top_left"
+    p9.legend.click_policy = "hide"
+    p9.xaxis.axis_label = "Date"
+    p9.yaxis.axis_label = "Units Sold"
+    p9.title.text_font_size = "14pt"
+    p9.title.text_color = "#00d9ff"
+    p9.xaxis.axis_label_text_color = "#9ca3af"
+    p9.yaxis.axis_label_text_color = "#9ca3af"
+    return p9
+
+
+def add_forecast_band(plot, df, source):
+    """Monte Carlo dropout interval (python -m forecasting.intervals) under the forecast lines"""
+    from forecasting.intervals import band_label
+
+    plot.varea(x='Date', y1='Lower Units Sold', y2='Upper Units Sold', source=source,
+               color='#f39c12', fill_alpha=0.18, level='underlay', legend_label=band_label(df))
+
+
+# name -> (dataset, columns its glyphs reference, builder), in page order
+DASHBOARD_CHARTS = {
+    'plot1': ('daily_features', ['Date', 'Units Sold'], build_units_sold),
+    'plot2': ('daily_features', ['Date', 'Price'], build_price),
+    'plot3': ('daily_features', ['Date', 'Inventory Level'], build_inventory),
+    'plot4': ('daily_features', ['Date', 'Demand'], build_demand),
+    'plot5': ('daily_features', ['Price', 'Units Sold'], build_price_vs_units),
+    'plot6': ('daily_features', ['Inventory Level', 'Units Ordered'], build_inventory_vs_orders),
+    'plot7': ('daily_features', ['Discount', 'Units Sold'], build_discount),
+    'plot8': ('daily_features', ['Promotion', 'Units Sold'], build_promotion),
+    'plot9': ('forecast_results', ['Date', 'Actual Units Sold', 'Predicted Units Sold'], build_forecast),
+}
+
+# Layers drawn over a chart when their dataset exists:
+# name -> (dataset, columns its glyphs reference, builder(plot, df, source))
+CHART_OVERLAYS = {
+    'plot9': ('forecast_intervals', ['Date', 'Lower Units Sold', 'Upper Units Sold'], add_forecast_band),
+}
+
+
+def chart_fingerprint(name):
+    """Fingerprint of a chart's dataset, extended with its overlay's; None without the dataset"""
+    fingerprint = datasets.fingerprint(DASHBOARD_CHARTS[name][0])
+    if fingerprint is None or name not in CHART_OVERLAYS:
+        return fingerprint
+    return fingerprint + (datasets.fingerprint(CHART_OVERLAYS[name][0]),)
+
+
+def render_chart_item(name):
+    """Serialized bokeh json_item for one dashboard chart, cached per data fingerprint.
+
+    Returns (fingerprint, json text, error); json text is None when the
+    chart's dataset is missing or rendering failed.
+    """
+    dataset, columns, build = DASHBOARD_CHARTS[name]
+    overlay = CHART_OVERLAYS.get(name)
+    overlay_df = None
+    # Key on the fingerprint the frame was read under (it lags the file's
+    # while a stale frame is served during a background reload)
+    with stage('data'):
+        fingerprint, df = datasets.get_entry(dataset)
+        if df is not None and overlay is not None:
+            overlay_fingerprint, overlay_df = datasets.get_entry(overlay[0])
+            fingerprint += (overlay_fingerprint,)
+    if df is None:
+        return None, None, f'{dataset} CSV file not found'
+
+    def render():
+        from bokeh.embed import json_item
+
+        try:
+            with stage('figures'):
+                plot = build(df, chart_source(df, columns))
+                if overlay_df is not None:
+                    overlay[2](plot, overlay_df, chart_source(overlay_df, overlay[1]))
+            with stage('embed'):
+                return json.dumps(json_item(plot)), None
+        except Exception as e:
+            return None, str(e)
+
+    item, error = chart_cache.get_or_render(
+        ('dashboard', name), fingerprint, render,
+        cacheable=lambda result: result[1] is None,
+    )
+    return fingerprint, item, error
 
 # ============================================================================
 # ROUTES
@@ -317,20 +429,77 @@ def home():
 @dashboard_bp.route('/dashboard')
 @login_required
 def dashboard():
-    """Dashboard with Bokeh charts"""
-    plot_divs, script, error = generate_bokeh_charts()
-    
-    if error:
+    """Dashboard shell; each chart is fetched from /dashboard/chart/<name> as it scrolls into view"""
+    error = None
+    if datasets.fingerprint('daily_features') is None:
+        error = 'CSV file not found'
         flash(f'Error loading charts: {error}', 'warning')
     
+    charts = [
+        name for name, (dataset, _, _) in DASHBOARD_CHARTS.items()
+        if datasets.fingerprint(dataset) is not None
+    ]
     return render_template(
         'dashboard.html',
-        script=script,
-        plot_divs=plot_divs,
+        charts=charts,
+        bokeh_resources=bokeh_resources(),
         error=error,
         username=current_user.username
     )
 
+
+def bokeh_resources():
+    """<script> tags loading BokehJS from the CDN at the installed bokeh version.
+
+    json_items are only guaranteed to load in the BokehJS release that
+    serialized them, so the version is never hard-coded in the template.
+    """
+    from bokeh.resources import CDN
+    return CDN.clone(components=['bokeh', 'bokeh-gl', 'bokeh-widgets', 'bokeh-tables']).render()
+
+@dashboard_bp.route('/dashboard/chart/<name>')
+@login_required
+def chart_item(name):
+    """One dashboard chart as a bokeh json_item document"""
+    if name not in DASHBOARD_CHARTS:
+        return {'error': 'Unknown chart'}, 404
+    
+    fingerprint = chart_fingerprint(name)
+    if fingerprint is not None:
+        etag = make_etag(fingerprint, 'dashboard', name)
+        if request.if_none_match.contains(etag):
+            return _revalidated(Response(status=304), etag)
+    
+    fingerprint, item, error = render_chart_item(name)
+    if item is None:
+        return {'error': error}, 404 if fingerprint is None else 500
+    # Tag with the fingerprint the item was rendered under
+    etag = make_etag(fingerprint, 'dashboard', name)
+    return _revalidated(Response(item, mimetype='application/json'), etag)
+
+
+def _revalidated(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@dashboard_bp.route('/dashboard/series')
+@login_required
+def series_data():
+    """Downsampled points of one daily_features column for a zoomed range"""
+    column = request.args.get('column')
+    if column not in CHART_COLUMNS or column == 'Date':
+        return {'error': 'Unknown column'}, 400
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    n_out = min(max(request.args.get('n', 1000, type=int), 3), 10000)
+    
+    df = datasets.get('daily_features', ['Date', column])
+    if df is None:
+        return {'error': 'CSV file not found'}, 404
+    x, y = series_window(df, column, start, end, n_out)
+    return {'x': to_epoch_ms(x).tolist(), 'y': y.tolist()}
+
 # ============================================================================
 # AUTHENTICATION ROUTES
 # ============================================================================
@@ -360,16 +529,18 @@ def login():
     return render_template('login.html')
 
 @dashboard_bp.route('/debug-bokeh')
+@login_required
 def debug_bokeh():
-    """Debug endpoint to check Bokeh generation"""
-    plot_divs, script, error = generate_bokeh_charts()
+    """Debug endpoint to check Bokeh generation (exposes file paths and cache state, so login only)"""
+    charts = {}
+    for name in DASHBOARD_CHARTS:
+        _, item, error = render_chart_item(name)
+        charts[name] = {'error': error, 'item_length': len(item) if item else 0}
     
     debug_info = {
-        'error': error,
-        'script_length': len(script),
-        'num_divs': len(plot_divs),
-        'div_names': list(plot_divs.keys()),
-        'divs': {k: v[:100] + '...' if len(v) > 100 else v for k, v in plot_divs.items()}
+        'charts': charts,
+        'datasets': datasets.stats(),
+        'chart_cache': chart_cache.stats(),
     }
     
     return debug_info
@@ -1,11 +1,9 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, render_template, request, redirect, url_for, jsonify, make_response
 from flask_login import LoginManager, login_required, current_user, login_user, logout_user, UserMixin
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
-import pandas as pd
-from bokeh.plotting import figure
-from bokeh.embed import components
+import sys
 
 # =====================
 # INIT APP & DB
@@ -14,11 +12,124 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(BASE_DIR, 'users.db')}"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+    "DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'users.db')}"
+)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db = SQLAlchemy(app)
 
+# Shared forecasting core lives at the repo root
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from forecasting.model_registry import ModelRegistry, ModelUnavailableError
+from forecasting.inference import check_windows, predict_batch
+from forecasting.batching import MicroBatcher
+from forecasting.datasets import get_dataset_cache
+from forecasting.chart_cache import ChartCache
+from forecasting.downsample import series_window, to_epoch_ms, zoom_callback
+from forecasting.aggregates import AggregateCache
+from forecasting.timing import add_collector, init_app as init_timing, stage
+from forecasting.warmup import init_app as init_warmup
+from forecasting.jobs import JobQueue, JobQueueFull, JobStore
+from forecasting.forecast_cache import ForecastCache
+from forecasting.segments import SegmentModels
+
+# Server-Timing header per request, latency histograms at /metrics
+init_timing(app)
+
+# Processed CSVs are parsed once per worker and revalidated by mtime/size
+DATA_DIR = os.environ.get("BI_DATA_DIR", os.path.join(BASE_DIR, "data", "processed"))
+datasets = get_dataset_cache(DATA_DIR)
+# Group means and the Units Sold histogram, materialized once per data version
+aggregates = AggregateCache(datasets, "daily_features")
+
+# Rendered Bokeh script/divs, reused until the underlying CSVs change
+chart_cache = ChartCache(
+    max_entries=int(os.environ.get("CHART_CACHE_ENTRIES", "64")),
+    max_bytes=int(os.environ.get("CHART_CACHE_BYTES", str(64 * 1024 * 1024))),
+)
+
+
+def cached_charts(spec, dataset_names, render):
+    """Rendered chart context for `spec`, re-rendered only when the data changes.
+
+    Keyed on the files' current fingerprints. While a background reload is
+    still serving the previous frame, the render is returned but not stored,
+    so charts of old data never end up under the new file's key.
+    """
+    fingerprint = tuple(datasets.fingerprint(name) for name in dataset_names)
+    with stage("charts"):
+        context = chart_cache.get(spec, fingerprint)
+        if context is not None:
+            return context
+        with datasets.track() as served:
+            context = render()
+        stale = any(served.get(name, set()) - {current} for name, current in zip(dataset_names, fingerprint))
+        if context.get("error") is None and not stale:
+            chart_cache.put(spec, fingerprint, context)
+        return context
+
+# One model/scaler per worker process, loaded on the first /predict.
+# New versions published to models/ are picked up by a background watcher.
+model_registry = ModelRegistry(
+    os.path.join(BASE_DIR, "models"),
+    backend=os.environ.get("MODEL_BACKEND", "auto"),
+)
+# Forecasts are remembered per model version and input; a swap drops the old ones
+forecast_cache = ForecastCache(
+    os.environ.get("FORECAST_CACHE_DB", os.path.join(BASE_DIR, "forecast_cache.db")) or None,
+    max_entries=int(os.environ.get("FORECAST_CACHE_ENTRIES", "4096")),
+    max_disk_entries=int(os.environ.get("FORECAST_CACHE_DISK_ENTRIES", "100000")),
+)
+model_registry.add_swap_listener(forecast_cache.on_model_swap)
+add_collector(forecast_cache.metrics)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "30"))
+if MODEL_WATCH_INTERVAL > 0:
+    model_registry.start_watcher(MODEL_WATCH_INTERVAL)
+
+
+def _segment_swapped(slug, old, new):
+    if old is not None:
+        forecast_cache.invalidate(f"{slug}@{old.version}")
+
+
+# One model per Category x Region segment (python -m forecasting.segments train),
+# each loaded the first time a /predict asks for its segment
+segment_models = SegmentModels(
+    os.environ.get("SEGMENT_MODELS_DIR", os.path.join(BASE_DIR, "models", "segments")),
+    backend=os.environ.get("MODEL_BACKEND", "auto"),
+    watch_interval=MODEL_WATCH_INTERVAL,
+    on_swap=_segment_swapped,
+)
+
+
+def _predict_windows(items):
+    import numpy as np
+    entry = items[0][0]
+    return predict_batch(entry, np.stack([sequence for _, sequence in items]))
+
+
+# Concurrent /predict calls arriving within the window share one forward pass;
+# items are (model entry, window) and only calls for the same model are batched
+predict_batcher = MicroBatcher(
+    _predict_windows,
+    max_batch=int(os.environ.get("PREDICT_MAX_BATCH", "64")),
+    window_ms=float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "2")),
+    key_fn=lambda item: (id(item[0]), item[1].shape),
+    name="predict-batcher",
+)
+
+# Long-running work (multi-horizon forecasts, large scoring runs) goes through
+# a bounded job pool; the job table lives next to users.db
+jobs = JobQueue(
+    JobStore(os.environ.get("JOBS_DB", os.path.join(BASE_DIR, "jobs.db"))),
+    max_workers=int(os.environ.get("JOB_WORKERS", "2")),
+    max_pending=int(os.environ.get("JOB_MAX_PENDING", "32")),
+    retention_seconds=float(os.environ.get("JOB_RETENTION_HOURS", "24")) * 3600,
+    max_finished=int(os.environ.get("JOB_MAX_FINISHED", "500")),
+)
+
 # =====================
 # USER MODEL
 # =====================
@@ -81,23 +192,54 @@ def logout():
 # =====================
 # DASHBOARD (Main Dashboard - Bokeh from CSV)
 # =====================
-@app.route("/dashboard")
-@login_required
-def dashboard():
-    """Main dashboard displaying interactive Bokeh plots from CSV"""
-    csv_path = os.path.join(BASE_DIR, "data", "processed", "daily_features.csv")
-    forecast_csv_path = os.path.join(BASE_DIR, "data", "processed", "lstm_forecast_results.csv")
-    
+def shared_source(df, columns):
+    """One ColumnDataSource per dataset, shared by every glyph that plots it.
+
+    Columns are numpy arrays, so Bokeh embeds them as binary (base64) buffers
+    and each series appears once in the page instead of once per glyph.
+    """
+    from bokeh.models import ColumnDataSource
+
+    return ColumnDataSource({col: df[col].to_numpy() for col in columns if col in df.columns})
+
+
+def timeseries_source(df, shared, column, plot):
+    """Shared source when the series fits the plot width; otherwise an
+    LTTB-downsampled source that refetches the zoomed range from /chart/series"""
+    from bokeh.models import ColumnDataSource
+
+    if len(df) <= plot.width:
+        return shared
+    x, y = series_window(df, column, n_out=plot.width)
+    source = ColumnDataSource({"Date": x, column: y})
+    plot.js_on_event("rangesupdate", zoom_callback(source, url_for("chart_series"), column, plot.width))
+    return source
+
+
+def group_means_desc(store, col):
+    """Mean Units Sold per key of `col` from the aggregate store, highest first"""
+    import pandas as pd
+
+    keys, means = store.group_means(col)
+    return pd.Series(means, index=keys).sort_values(ascending=False)
+
+
+def render_dashboard_charts():
+    """Build and embed the main dashboard figures"""
+    from bokeh.embed import components
+    from bokeh.plotting import figure
+
     script = ""
+    error = None
     div_forecast = None
     div1 = div2 = div3 = div4 = "<p>No data available</p>"
     plots_list = []
     
     # Try to load forecast data if available
-    if os.path.exists(forecast_csv_path):
-        try:
-            df_forecast = pd.read_csv(forecast_csv_path, parse_dates=["Date"])
-            
+    try:
+        with stage("data"):
+            df_forecast = datasets.get("forecast_results")
+        if df_forecast is not None:
             if "Date" in df_forecast.columns and "Actual Units Sold" in df_forecast.columns and "Predicted Units Sold" in df_forecast.columns:
                 p_forecast = figure(
                     title="📈 Sales Forecast (LSTM Model)",
@@ -107,18 +249,30 @@ def dashboard():
                     toolbar_location="right",
                     tools="pan,wheel_zoom,box_zoom,reset,save"
                 )
-                p_forecast.line(df_forecast["Date"], df_forecast["Actual Units Sold"], legend_label="Actual", line_width=2.5, color="steelblue")
-                p_forecast.line(df_forecast["Date"], df_forecast["Predicted Units Sold"], legend_label="Predicted", line_width=2.5, color="coral")
+                forecast_source = shared_source(df_forecast, ["Date", "Actual Units Sold", "Predicted Units Sold"])
+                p_forecast.line("Date", "Actual Units Sold", source=forecast_source, legend_label="Actual", line_width=2.5, color="steelblue")
+                p_forecast.line("Date", "Predicted Units Sold", source=forecast_source, legend_label="Predicted", line_width=2.5, color="coral")
+                # Monte Carlo dropout band from python -m forecasting.intervals, when present
+                df_intervals = datasets.get("forecast_intervals")
+                if df_intervals is not None:
+                    from forecasting.intervals import band_label
+                    band_source = shared_source(df_intervals, ["Date", "Lower Units Sold", "Upper Units Sold"])
+                    p_forecast.varea(x="Date", y1="Lower Units Sold", y2="Upper Units Sold", source=band_source,
+                                     color="coral", fill_alpha=0.2, level="underlay", legend_label=band_label(df_intervals))
                 p_forecast.legend.location = "top_left"
                 p_forecast.legend.click_policy = "hide"
                 plots_list.append(p_forecast)
-        except Exception as e:
-            div_forecast = f"<p style='color:red;'>Error loading forecast: {str(e)}</p>"
+    except Exception as e:
+        error = str(e)
+        div_forecast = f"<p style='color:red;'>Error loading forecast: {str(e)}</p>"
     
     # Load main data from daily_features
-    if os.path.exists(csv_path):
+    if os.path.exists(datasets.path("daily_features")):
         try:
-            df = pd.read_csv(csv_path, parse_dates=["Date"])
+            with stage("data"):
+                df = datasets.get("daily_features", ["Date", "Units Sold", "Price"])
+                store = aggregates.get()
+            source = shared_source(df, ["Date", "Units Sold", "Price"])
             
             # Plot 1: Time series of Units Sold
             if "Date" in df.columns and "Units Sold" in df.columns:
@@ -130,16 +284,17 @@ def dashboard():
                     toolbar_location="right",
                     tools="pan,wheel_zoom,box_zoom,reset,save"
                 )
-                p1.line(df["Date"], df["Units Sold"], line_width=2.5, color="navy")
-                p1.circle(df["Date"], df["Units Sold"], size=4, color="navy", alpha=0.5)
+                s1 = timeseries_source(df, source, "Units Sold", p1)
+                p1.line("Date", "Units Sold", source=s1, line_width=2.5, color="navy")
+                p1.circle("Date", "Units Sold", source=s1, size=4, color="navy", alpha=0.5)
                 plots_list.append(p1)
             
             # Plot 2: Category Performance
-            if "Category" in df.columns and "Units Sold" in df.columns:
-                category_stats = df.groupby("Category")["Units Sold"].mean().sort_values(ascending=False)
+            if "Category" in store.groups:
+                category_stats = group_means_desc(store, "Category")
                 
                 p2 = figure(
-                    x_range=list(category_stats.index),
+                    x_range=[str(c) for c in category_stats.index],
                     title="🏷️ Category Performance",
                     width=580,
                     height=400,
@@ -148,15 +303,15 @@ def dashboard():
                     toolbar_location="right",
                     tools="pan,wheel_zoom,reset,save"
                 )
-                p2.vbar(x=list(category_stats.index), top=category_stats.values, width=0.6, color="green", alpha=0.8)
+                p2.vbar(x=[str(c) for c in category_stats.index], top=category_stats.values, width=0.6, color="green", alpha=0.8)
                 plots_list.append(p2)
             
             # Plot 3: Region Performance
-            if "Region" in df.columns and "Units Sold" in df.columns:
-                region_stats = df.groupby("Region")["Units Sold"].mean().sort_values(ascending=False)
+            if "Region" in store.groups:
+                region_stats = group_means_desc(store, "Region")
                 
                 p3 = figure(
-                    x_range=list(region_stats.index),
+                    x_range=[str(r) for r in region_stats.index],
                     title="🗺️ Region Performance",
                     width=580,
                     height=400,
@@ -165,7 +320,7 @@ def dashboard():
                     toolbar_location="right",
                     tools="pan,wheel_zoom,reset,save"
                 )
-                p3.vbar(x=list(region_stats.index), top=region_stats.values, width=0.6, color="coral", alpha=0.8)
+                p3.vbar(x=[str(r) for r in region_stats.index], top=region_stats.values, width=0.6, color="coral", alpha=0.8)
                 plots_list.append(p3)
             
             # Plot 4: Price vs Units Sold scatter
@@ -179,11 +334,12 @@ def dashboard():
                     toolbar_location="right",
                     tools="pan,wheel_zoom,box_zoom,reset,save"
                 )
-                p4.circle(df["Price"], df["Units Sold"], size=6, color="purple", alpha=0.6)
+                p4.circle("Price", "Units Sold", source=source, size=6, color="purple", alpha=0.6)
                 plots_list.append(p4)
             
             if plots_list:
-                script, divs = components(tuple(plots_list))
+                with stage("embed"):
+                    script, divs = components(tuple(plots_list))
                 if len(divs) >= 1:
                     div1 = divs[0]  # Time series
                 if len(divs) >= 2:
@@ -193,26 +349,149 @@ def dashboard():
                 if len(divs) >= 4:
                     div4 = divs[3]  # Price scatter
         except Exception as e:
+            error = str(e)
             div1 = f"<p style='color:red;'>Error loading data: {str(e)}</p>"
     
-    return render_template("dashboard.html", script=script, div_forecast=div_forecast, div1=div1, div2=div2, div3=div3, div4=div4, username=current_user.username)
+    return dict(script=script, div_forecast=div_forecast, div1=div1, div2=div2, div3=div3, div4=div4, error=error)
+
+
+def dashboard_charts():
+    return cached_charts("dashboard", ("daily_features", "forecast_results", "forecast_intervals"),
+                         render_dashboard_charts)
+
+
+@app.route("/dashboard")
+@login_required
+def dashboard():
+    """Main dashboard displaying interactive Bokeh plots from CSV"""
+    charts = dashboard_charts()
+    return render_template("dashboard.html", username=current_user.username, **charts)
+
+
+@app.route("/chart/series")
+@login_required
+def chart_series():
+    """Downsampled points of one daily_features column for a zoomed range"""
+    column = request.args.get("column")
+    start = request.args.get("start", type=float)
+    end = request.args.get("end", type=float)
+    n_out = min(max(request.args.get("n", 1000, type=int), 3), 10000)
+    
+    df = datasets.get("daily_features")
+    if df is None:
+        return jsonify({"error": "daily_features.csv not found"}), 404
+    if column not in df.columns or column == "Date":
+        return jsonify({"error": "Unknown column"}), 400
+    x, y = series_window(df, column, start, end, n_out)
+    return jsonify({"x": to_epoch_ms(x).tolist(), "y": y.tolist()})
 
 
 # =====================
-# BI PAGE (Bokeh plots from daily_features)
+# SERIES DATA API (JSON / .npz with ETags)
 # =====================
-@app.route("/bi")
+SERIES_DATASETS = ("daily_features", "forecast_results")
+
+
+@app.route("/api/series")
 @login_required
-def bi():
-    csv_path = os.path.join(BASE_DIR, "data", "processed", "daily_features.csv")
+def api_series():
+    """Columns of a processed dataset over a date range.
+
+    /api/series?dataset=daily_features&cols=Units Sold,Price&start=2023-01-01&end=2023-03-31
+    Add format=npz (or Accept: application/x-npz) for a binary .npz body.
+    Responses carry a strong ETag; If-None-Match returns 304 when unchanged.
+    """
+    from forecasting.series import make_etag, slice_columns, to_json_payload, to_npz_bytes
+
+    name = request.args.get("dataset", "daily_features")
+    if name not in SERIES_DATASETS:
+        return jsonify({"error": f"dataset must be one of {', '.join(SERIES_DATASETS)}"}), 400
+    fingerprint, df = datasets.get_entry(name)
+    if df is None:
+        return jsonify({"error": f"{name} not found"}), 404
+
+    cols = [c.strip() for c in request.args.get("cols", "").split(",") if c.strip()]
+    cols = cols or [c for c in df.columns if c != "Date"]
+    unknown = [c for c in cols if c not in df.columns]
+    if unknown:
+        return jsonify({"error": f"Unknown columns: {', '.join(unknown)}"}), 400
+
+    start, end = request.args.get("start"), request.args.get("end")
+    binary = request.args.get("format") == "npz" or (
+        "format" not in request.args
+        and request.accept_mimetypes.best_match(["application/json", "application/x-npz"]) == "application/x-npz"
+    )
+
+    etag = make_etag(fingerprint, name, cols, start, end, binary)
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        try:
+            columns = slice_columns(df, cols, start, end)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid date: {e}"}), 400
+        if binary:
+            response = make_response(to_npz_bytes(columns))
+            response.mimetype = "application/x-npz"
+        else:
+            response = jsonify({
+                "dataset": name,
+                "columns": ["Date"] + [c for c in cols if c != "Date"],
+                "rows": int(len(columns["Date"])),
+                "data": to_json_payload(columns),
+            })
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Accept")
+    return response
+
+
+@app.route("/api/aggregates")
+@login_required
+def api_aggregates():
+    """Mean Units Sold per Category/Region/Promotion and the Units Sold
+    histogram over an optional date range, from the materialized store.
+
+    /api/aggregates?start=2023-01-01&end=2023-03-31
+    """
+    store = aggregates.get()
+    if store is None:
+        return jsonify({"error": "daily_features not found"}), 404
+    start, end = request.args.get("start") or None, request.args.get("end") or None
+    try:
+        groups = {}
+        for col in store.groups:
+            keys, means = store.group_means(col, start, end)
+            groups[col] = {"keys": keys.tolist(), "mean": means.tolist()}
+        counts, edges = store.histogram(start, end)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date: {e}"}), 400
+    return jsonify({
+        "value": store.value,
+        "groups": groups,
+        "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+    })
+
+
+# =====================
+# BI PAGE (Bokeh plots from daily_features)
+# =====================
+def render_bi_charts():
+    from bokeh.embed import components
+    from bokeh.plotting import figure
+
+    csv_path = datasets.path("daily_features")
     
     script = ""
+    error = None
     div1 = "<p>No data available</p>"
     div2 = "<p>No data available</p>"
     
     if os.path.exists(csv_path):
         try:
-            df = pd.read_csv(csv_path, parse_dates=["Date"])
+            with stage("data"):
+                df = datasets.get("daily_features", ["Date", "Units Sold", "Price"])
+            source = shared_source(df, ["Date", "Units Sold", "Price"])
             
             # Plot 1: Time series of Units Sold
             if "Date" in df.columns and "Units Sold" in df.columns:
@@ -222,8 +501,9 @@ def bi():
                     width=900,
                     height=400
                 )
-                p1.line(df["Date"], df["Units Sold"], line_width=2, color="navy")
-                p1.circle(df["Date"], df["Units Sold"], size=3, color="navy", alpha=0.6)
+                s1 = timeseries_source(df, source, "Units Sold", p1)
+                p1.line("Date", "Units Sold", source=s1, line_width=2, color="navy")
+                p1.circle("Date", "Units Sold", source=s1, size=3, color="navy", alpha=0.6)
             else:
                 p1 = figure(title="Units Sold Over Time", width=900, height=400)
                 p1.text([0], [0], text=["Missing Date or Units Sold columns"])
@@ -237,90 +517,107 @@ def bi():
                     x_axis_label="Price",
                     y_axis_label="Units Sold"
                 )
-                p2.circle(df["Price"], df["Units Sold"], size=6, color="orange", alpha=0.6)
+                p2.circle("Price", "Units Sold", source=source, size=6, color="orange", alpha=0.6)
             else:
                 p2 = figure(title="Price vs Units Sold", width=450, height=350)
                 p2.text([0], [0], text=["Missing Price or Units Sold columns"])
             
-            script, (div1, div2) = components((p1, p2))
+            with stage("embed"):
+                script, (div1, div2) = components((p1, p2))
         except Exception as e:
+            error = str(e)
             div1 = f"<p>Error: {str(e)}</p>"
     
-    return render_template("bi.html", script=script, div1=div1, div2=div2, username=current_user.username)
+    return dict(script=script, div1=div1, div2=div2, error=error)
+
+
+def bi_charts():
+    return cached_charts("bi", ("daily_features",), render_bi_charts)
+
+
+@app.route("/bi")
+@login_required
+def bi():
+    charts = bi_charts()
+    return render_template("bi.html", username=current_user.username, **charts)
 
 # =====================
 # INTERACTIVE ANALYTICS (from EDA notebook)
 # =====================
-@app.route("/analytics")
-@login_required
-def analytics():
+def render_analytics_charts():
     """Interactive Bokeh dashboard from business_problem_eda.ipynb analysis"""
-    csv_path = os.path.join(BASE_DIR, "data", "processed", "daily_features.csv")
+    import pandas as pd
+    from bokeh.embed import components
+    from bokeh.plotting import figure
+
+    csv_path = datasets.path("daily_features")
     
     script = ""
+    error = None
     div1 = div2 = div3 = div4 = "<p>No data available</p>"
     
     if os.path.exists(csv_path):
         try:
-            df = pd.read_csv(csv_path, parse_dates=["Date"])
+            with stage("data"):
+                store = aggregates.get()
+            # None only when the file disappeared after the check above
+            if store is None:
+                raise FileNotFoundError(f"{csv_path} not found")
             
             # Plot 1: Distribution of Units Sold (histogram)
-            if "Units Sold" in df.columns:
-                hist, edges = pd.cut(df["Units Sold"], bins=30, retbins=True)
-                hist_df = pd.DataFrame({"units": hist.value_counts().sort_index().values}, 
-                                       index=[f"{edges[i]:.1f}-{edges[i+1]:.1f}" for i in range(len(edges)-1)])
-                
-                p1 = figure(
-                    title="Distribution of Units Sold",
-                    width=450,
-                    height=350,
-                    x_axis_label="Units Sold Range",
-                    y_axis_label="Frequency"
-                )
-                p1.vbar(x=list(range(len(hist_df))), top=hist_df.values.flatten(), width=0.8, color="steelblue")
-                p1.xaxis.major_label_overrides = {i: hist_df.index[i] for i in range(min(5, len(hist_df)))}
-            else:
-                p1 = figure(title="Distribution of Units Sold", width=450, height=350)
-                p1.text([0], [0], text=["Missing Units Sold column"])
+            counts, edges = store.histogram()
+            hist_df = pd.DataFrame({"units": counts}, 
+                                   index=[f"{edges[i]:.1f}-{edges[i+1]:.1f}" for i in range(len(edges)-1)])
+            
+            p1 = figure(
+                title="Distribution of Units Sold",
+                width=450,
+                height=350,
+                x_axis_label="Units Sold Range",
+                y_axis_label="Frequency"
+            )
+            p1.vbar(x=list(range(len(hist_df))), top=hist_df.values.flatten(), width=0.8, color="steelblue")
+            p1.xaxis.major_label_overrides = {i: hist_df.index[i] for i in range(min(5, len(hist_df)))}
             
             # Plot 2: Category Performance (Bar chart)
-            if "Category" in df.columns and "Units Sold" in df.columns:
-                category_stats = df.groupby("Category")["Units Sold"].mean().sort_values(ascending=False)
+            if "Category" in store.groups:
+                category_stats = group_means_desc(store, "Category")
                 
                 p2 = figure(
-                    x_range=list(category_stats.index),
+                    x_range=[str(c) for c in category_stats.index],
                     title="Average Units Sold by Category",
                     width=450,
                     height=350,
                     x_axis_label="Category",
                     y_axis_label="Avg Units Sold"
                 )
-                p2.vbar(x=list(category_stats.index), top=category_stats.values, width=0.6, color="green")
+                p2.vbar(x=[str(c) for c in category_stats.index], top=category_stats.values, width=0.6, color="green")
                 p2.xaxis.major_label_orientation = 0.785  # 45 degrees
             else:
                 p2 = figure(title="Category Performance", width=450, height=350)
                 p2.text([0], [0], text=["Missing Category or Units Sold column"])
             
             # Plot 3: Region Performance (Bar chart)
-            if "Region" in df.columns and "Units Sold" in df.columns:
-                region_stats = df.groupby("Region")["Units Sold"].mean().sort_values(ascending=False)
+            if "Region" in store.groups:
+                region_stats = group_means_desc(store, "Region")
                 
                 p3 = figure(
-                    x_range=list(region_stats.index),
+                    x_range=[str(r) for r in region_stats.index],
                     title="Average Units Sold by Region",
                     width=450,
                     height=350,
                     x_axis_label="Region",
                     y_axis_label="Avg Units Sold"
                 )
-                p3.vbar(x=list(region_stats.index), top=region_stats.values, width=0.6, color="coral")
+                p3.vbar(x=[str(r) for r in region_stats.index], top=region_stats.values, width=0.6, color="coral")
             else:
                 p3 = figure(title="Region Performance", width=450, height=350)
                 p3.text([0], [0], text=["Missing Region or Units Sold column"])
             
             # Plot 4: Promotion Impact (Line chart)
-            if "Promotion" in df.columns and "Units Sold" in df.columns:
-                promo_stats = df.groupby("Promotion")["Units Sold"].mean().sort_index()
+            if "Promotion" in store.groups:
+                _, promo_means = store.group_means("Promotion")
+                promo_stats = pd.Series(promo_means)
                 
                 p4 = figure(
                     title="Promotion Level Impact on Sales",
@@ -335,55 +632,488 @@ def analytics():
                 p4 = figure(title="Promotion Impact", width=450, height=350)
                 p4.text([0], [0], text=["Missing Promotion or Units Sold column"])
             
-            script, (div1, div2, div3, div4) = components((p1, p2, p3, p4))
+            with stage("embed"):
+                script, (div1, div2, div3, div4) = components((p1, p2, p3, p4))
         except Exception as e:
+            error = str(e)
             div1 = f"<p>Error loading analytics: {str(e)}</p>"
     
-    return render_template("analytics.html", script=script, div1=div1, div2=div2, div3=div3, div4=div4, username=current_user.username)
+    return dict(script=script, div1=div1, div2=div2, div3=div3, div4=div4, error=error)
+
+
+def analytics_charts():
+    return cached_charts("analytics", ("daily_features",), render_analytics_charts)
+
+
+def render_backtest_charts():
+    """Error by horizon step and by origin, from python -m forecasting.backtest output"""
+    import json
+    from bokeh.embed import components
+    from bokeh.models import HoverTool
+    from bokeh.plotting import figure
+
+    with stage("data"):
+        by_horizon = datasets.get("backtest_horizons")
+        by_origin = datasets.get("backtest_origins")
+    if by_horizon is None or by_origin is None:
+        hint = "<p>No backtest yet. Run <code>python -m forecasting.backtest</code> or submit a backtest job.</p>"
+        return dict(script="", div1=hint, div2="", summary=None, error=None)
+    
+    summary = None
+    summary_path = os.path.join(DATA_DIR, "backtest_summary.json")
+    if os.path.exists(summary_path):
+        with open(summary_path) as f:
+            summary = json.load(f)
+    
+    try:
+        p1 = figure(
+            title="Backtest Error by Days Ahead",
+            width=450,
+            height=350,
+            x_axis_label="Days ahead",
+            y_axis_label="Units Sold",
+        )
+        source = shared_source(by_horizon, ["Horizon", "RMSE", "MAE"])
+        p1.line("Horizon", "RMSE", source=source, line_width=3, color="crimson", legend_label="RMSE")
+        p1.line("Horizon", "MAE", source=source, line_width=3, color="steelblue", legend_label="MAE")
+        p1.scatter("Horizon", "RMSE", source=source, size=6, color="crimson")
+        p1.add_tools(HoverTool(tooltips=[("Days ahead", "@Horizon"), ("RMSE", "@RMSE{0.00}"), ("MAE", "@MAE{0.00}")]))
+        p1.legend.location = "top_left"
+        
+        p2 = figure(
+            title="Backtest Error by Forecast Origin",
+            x_axis_type="datetime",
+            width=450,
+            height=350,
+            x_axis_label="Origin",
+            y_axis_label="Units Sold",
+        )
+        source = shared_source(by_origin, ["Origin", "RMSE", "MAE"])
+        p2.line("Origin", "RMSE", source=source, line_width=2, color="crimson", legend_label="RMSE")
+        p2.line("Origin", "MAE", source=source, line_width=2, color="steelblue", legend_label="MAE")
+        p2.add_tools(HoverTool(tooltips=[("Origin", "@Origin{%F}"), ("RMSE", "@RMSE{0.00}"), ("MAE", "@MAE{0.00}")],
+                               formatters={"@Origin": "datetime"}))
+        p2.legend.location = "top_left"
+        
+        with stage("embed"):
+            script, (div1, div2) = components((p1, p2))
+    except Exception as e:
+        return dict(script="", div1=f"<p>Error loading backtest: {str(e)}</p>", div2="", summary=summary, error=str(e))
+    return dict(script=script, div1=div1, div2=div2, summary=summary, error=None)
+
+
+def backtest_charts():
+    return cached_charts("backtest", ("backtest_horizons", "backtest_origins"), render_backtest_charts)
+
+
+@app.route("/analytics")
+@login_required
+def analytics():
+    charts = analytics_charts()
+    return render_template("analytics.html", username=current_user.username,
+                           backtest=backtest_charts(), **charts)
 
 
 # =====================
-# PREDICT ENDPOINT (lazy load model)
+# PREDICT ENDPOINT (model loaded once per worker)
 # =====================
+PREDICT_INTERVAL_SAMPLES = int(os.environ.get("PREDICT_INTERVAL_SAMPLES", "100"))
+PREDICT_MAX_INTERVAL_SAMPLES = int(os.environ.get("PREDICT_MAX_INTERVAL_SAMPLES", "1000"))
+
+
+def _interval_params():
+    """samples and level query parameters of /predict?intervals=true"""
+    try:
+        samples = int(request.args.get("samples", PREDICT_INTERVAL_SAMPLES))
+        level = float(request.args.get("level", 0.9))
+    except ValueError:
+        raise ValueError("samples must be an integer and level a number")
+    if not 2 <= samples <= PREDICT_MAX_INTERVAL_SAMPLES:
+        raise ValueError(f"samples must be between 2 and {PREDICT_MAX_INTERVAL_SAMPLES}")
+    if not 0 < level < 1:
+        raise ValueError("level must be between 0 and 1")
+    return samples, level
+
+
+def _predict_intervals(entry, sequence, samples, level):
+    """Monte Carlo dropout bands for one window, all samples in one forward pass.
+
+    Not cached: the draws are random, and forecast_cache only holds
+    deterministic forward passes.
+    """
+    import numpy as np
+    from forecasting.intervals import FIELDS, mc_dropout
+
+    result = mc_dropout(entry, sequence[np.newaxis], samples, level)
+    return {"samples": samples, "level": level, **{name: float(result[name][0]) for name in FIELDS}}
+
+
 @app.route("/predict", methods=["POST"])
 @login_required
 def predict():
-    try:
-        import joblib
-        import numpy as np
-        from tensorflow.keras.models import load_model
-    except ImportError:
-        return jsonify({"error": "TensorFlow/joblib not installed"}), 500
-    
+    """Next-day Units Sold for one window.
+
+    With ?intervals=true (optionally &samples=K&level=L) the response also
+    has Monte Carlo dropout bands: mean, std, median and the central L
+    interval (lower, upper) of K stochastic passes.
+    """
+    import numpy as np
+
     data = request.get_json()
     if not data or "sequence" not in data:
         return jsonify({"error": "Missing 'sequence' in JSON"}), 400
     
-    model_path = os.path.join(BASE_DIR, "models", "lstm_units_sold_model.keras")
-    scaler_path = os.path.join(BASE_DIR, "models", "minmax_scaler.pkl")
-    
-    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-        return jsonify({"error": "Model files not found"}), 500
+    # Optional "segment": {"category": ..., "region": ...} or "Category/Region"
+    segment = data.get("segment")
+    try:
+        with stage("model"):
+            if segment is None:
+                entry = model_registry.get()
+                version = entry.version
+            else:
+                segment, entry = segment_models.get(segment)
+                version = f"{segment}@{entry.version}"
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ModelUnavailableError as e:
+        return jsonify({"error": str(e)}), 404 if segment is not None else 500
     
     try:
-        scaler = joblib.load(scaler_path)
-        model = load_model(model_path)
-        
-        sequence = np.array(data["sequence"])
+        sequence = np.array(data["sequence"], dtype=np.float64)
         if sequence.ndim != 2:
             return jsonify({"error": "Sequence must be 2D"}), 400
+        check_windows(entry, sequence[np.newaxis])
+        intervals = request.args.get("intervals", "").lower() in ("1", "true", "yes")
+        if intervals:
+            samples, level = _interval_params()
         
-        scaled = scaler.transform(sequence)
-        X = scaled.reshape((1, sequence.shape[0], sequence.shape[1]))
-        pred_scaled = model.predict(X, verbose=0)[0][0]
-        
-        dummy = np.zeros((1, sequence.shape[1]))
-        dummy[0, 0] = pred_scaled
-        prediction = scaler.inverse_transform(dummy)[0][0]
+        with stage("cache"):
+            key = forecast_cache.key(version, "predict", sequence)
+            prediction = forecast_cache.get(key)
+        if prediction is None:
+            with stage("inference"):
+                prediction = forecast_cache.put(key, version, predict_batcher((entry, sequence)))
         
-        return jsonify({"prediction": float(prediction), "user": current_user.username})
+        result = {"prediction": float(prediction), "user": current_user.username}
+        if intervals:
+            with stage("intervals"):
+                result["intervals"] = _predict_intervals(entry, sequence, samples, level)
+        if segment is not None:
+            result["segment"] = segment
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+FORECAST_MAX_HORIZON = int(os.environ.get("FORECAST_MAX_HORIZON", "365"))
+
+
+@app.route("/forecast", methods=["GET", "POST"])
+@login_required
+def forecast():
+    """Multi-step forecast.
+
+    GET /forecast?horizon=N forecasts N days past the end of daily_features.csv.
+    POST {"sequence": [[...]], "horizon": N, "future_exog": [[...]]} forecasts
+    from a custom history; future_exog is optional.
+    """
+    import numpy as np
+    from forecasting.forecast import cached_rollout, forecast_frame
+
+    data = {}
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+    try:
+        horizon = int(data.get("horizon", request.args.get("horizon", 30)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "horizon must be an integer"}), 400
+    if not 1 <= horizon <= FORECAST_MAX_HORIZON:
+        return jsonify({"error": f"horizon must be between 1 and {FORECAST_MAX_HORIZON}"}), 400
+    
+    try:
+        with stage("model"):
+            entry = model_registry.get()
+    except ModelUnavailableError as e:
+        return jsonify({"error": str(e)}), 500
+    
+    try:
+        if "sequence" in data:
+            with stage("inference"):
+                preds = cached_rollout(forecast_cache, entry, data["sequence"], horizon, data.get("future_exog"))
+            result = {"predictions": np.asarray(preds).tolist()}
+        else:
+            with stage("data"):
+                df = datasets.get("daily_features")
+            if df is None:
+                return jsonify({"error": "daily_features.csv not found"}), 500
+            with stage("inference"):
+                result = {"forecast": forecast_frame(entry, df, horizon, cache=forecast_cache)}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    result.update({"horizon": horizon, "model_version": entry.version})
+    return jsonify(result)
+
+
+MAX_PREDICT_BATCH = int(os.environ.get("MAX_PREDICT_BATCH", "10000"))
+
+
+@app.route("/predict/batch", methods=["POST"])
+@login_required
+def predict_batch_endpoint():
+    """Score N windows in one forward pass.
+
+    Body is either JSON {"sequences": [[[...]]]} or a .npy array of shape
+    (N, window, features) sent as Content-Type: application/x-npy.
+    """
+    import io
+    import time
+    import numpy as np
+
+    start = time.perf_counter()
+    try:
+        with stage("parse"):
+            if request.mimetype == "application/x-npy":
+                sequences = np.load(io.BytesIO(request.get_data()), allow_pickle=False)
+            else:
+                data = request.get_json(silent=True)
+                if not data or "sequences" not in data:
+                    return jsonify({"error": "Missing 'sequences' in JSON"}), 400
+                sequences = np.asarray(data["sequences"], dtype=np.float64)
+    except ValueError as e:
+        return jsonify({"error": f"Could not parse sequences: {e}"}), 400
+    
+    if sequences.ndim != 3:
+        return jsonify({"error": "Sequences must be 3D (batch, window, features)"}), 400
+    if len(sequences) > MAX_PREDICT_BATCH:
+        return jsonify({"error": f"Batch larger than {MAX_PREDICT_BATCH} sequences; submit a predict_batch job"}), 413
+    
+    try:
+        with stage("model"):
+            entry = model_registry.get()
+    except ModelUnavailableError as e:
+        return jsonify({"error": str(e)}), 500
+    
+    try:
+        with stage("inference"):
+            predictions = predict_batch(entry, sequences)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    
+    elapsed = time.perf_counter() - start
+    return jsonify({
+        "predictions": predictions.tolist(),
+        "batch_size": int(len(predictions)),
+        "model_version": entry.version,
+        "latency_ms": round(elapsed * 1000, 3),
+        "throughput_per_s": round(len(predictions) / elapsed, 1) if elapsed > 0 else None,
+    })
+
+
+@app.route("/datasets/status")
+@login_required
+def datasets_status():
+    """Hit/miss/reload counters of this worker's dataset, chart and aggregate caches"""
+    stats = datasets.stats()
+    stats["chart_cache"] = chart_cache.stats()
+    stats["aggregates"] = aggregates.stats()
+    return jsonify(stats)
+
+
+@app.route("/model/status")
+@login_required
+def model_status():
+    """Load time, version and memory use of the model held by this worker"""
+    status = model_registry.status()
+    status["batcher"] = predict_batcher.stats()
+    status["forecast_cache"] = forecast_cache.stats()
+    status["segments"] = segment_models.status()
+    return jsonify(status)
+
+# =====================
+# BACKGROUND JOBS
+# =====================
+def _forecast_horizons(params):
+    try:
+        horizons = sorted({int(h) for h in params.get("horizons") or [params.get("horizon", 30)]})
+    except (TypeError, ValueError):
+        raise ValueError("horizons must be integers")
+    if not 1 <= horizons[0] <= horizons[-1] <= FORECAST_MAX_HORIZON:
+        raise ValueError(f"horizons must be between 1 and {FORECAST_MAX_HORIZON}")
+    return horizons
+
+
+def _forecast_job(params, ctx):
+    """Forecasts for several horizons from one recursive rollout to the longest"""
+    import numpy as np
+    from forecasting.forecast import cached_rollout, forecast_frame
+
+    horizons = _forecast_horizons(params)
+    entry = model_registry.get()
+    ctx.check()
+    if "sequence" in params:
+        preds = np.asarray(cached_rollout(
+            forecast_cache, entry, params["sequence"], horizons[-1], params.get("future_exog"))).tolist()
+    else:
+        df = datasets.get("daily_features")
+        if df is None:
+            raise ValueError("daily_features.csv not found")
+        preds = forecast_frame(entry, df, horizons[-1], cache=forecast_cache)
+    return {
+        "forecasts": {str(h): preds[:h] for h in horizons},
+        "model_version": entry.version,
+    }
+
+
+JOB_BATCH_CHUNK = int(os.environ.get("JOB_BATCH_CHUNK", "4096"))
+
+
+def _predict_batch_job(params, ctx):
+    """Score any number of windows, a chunk per forward pass.
+
+    params: {"sequences": 3D windows} or {"series": 2D rows}; a series is
+    scored at every window of the model's length, without copying the windows.
+    """
+    import numpy as np
+    from forecasting.windows import windows
+
+    entry = model_registry.get()
+    if "series" in params:
+        series = np.asarray(params["series"], dtype=np.float64)
+        if series.ndim != 2:
+            raise ValueError("Series must be 2D (rows, features)")
+        sequences = windows(series, entry.window)
+    else:
+        sequences = np.asarray(params.get("sequences"), dtype=np.float64)
+        if sequences.ndim != 3:
+            raise ValueError("Sequences must be 3D (batch, window, features)")
+    predictions = np.empty(len(sequences))
+    for start in range(0, len(sequences), JOB_BATCH_CHUNK):
+        ctx.check()
+        stop = start + JOB_BATCH_CHUNK
+        predictions[start:stop] = predict_batch(entry, sequences[start:stop])
+        ctx.progress(min(stop, len(sequences)) / len(sequences))
+    return {"predictions": predictions.tolist(), "model_version": entry.version}
+
+
+def _backtest_job(params, ctx):
+    """Walk-forward backtest; results are written where /analytics charts them"""
+    from forecasting.backtest import run as run_backtest
+
+    df = datasets.get("daily_features")
+    if df is None:
+        raise ValueError("daily_features.csv not found")
+    entry = model_registry.get()
+
+    def on_chunk(fraction):
+        ctx.check()
+        ctx.progress(fraction)
+
+    return run_backtest(
+        entry, df,
+        horizon=int(params.get("horizon", 14)),
+        start=params.get("start"),
+        step=int(params.get("step", 1)),
+        exog=params.get("exog", "actual"),
+        out_dir=DATA_DIR if params.get("write", True) else None,
+        on_chunk=on_chunk,
+    )
+
+
+def _backtest_params(params):
+    _forecast_horizons({"horizon": params.get("horizon", 14)})
+    if params.get("exog", "actual") not in ("actual", "hold"):
+        raise ValueError("exog must be 'actual' or 'hold'")
+    try:
+        if int(params.get("step", 1)) < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError("step must be a positive integer")
+
+
+jobs.register("forecast", _forecast_job, validate=_forecast_horizons)
+jobs.register("backtest", _backtest_job, validate=_backtest_params)
+jobs.register("predict_batch", _predict_batch_job)
+
+
+def _own_job(job_id):
+    """The job's status if it exists and belongs to the current user, else None"""
+    status = jobs.get(job_id)
+    if status is None or status["owner"] != str(current_user.id):
+        return None
+    return status
+
+
+@app.route("/jobs", methods=["POST"])
+@login_required
+def submit_job():
+    """Queue a job: {"kind": "forecast", "params": {"horizons": [7, 30, 90]}}"""
+    data = request.get_json(silent=True)
+    if not data or "kind" not in data:
+        return jsonify({"error": "Missing 'kind' in JSON"}), 400
+    
+    try:
+        job_id = jobs.submit(data["kind"], data.get("params") or {}, owner=current_user.id)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    response = jsonify({
+        "id": job_id,
+        "state": "queued",
+        "status_url": url_for("job_status", job_id=job_id),
+        "result_url": url_for("job_result", job_id=job_id),
+    })
+    response.status_code = 202
+    response.headers["Location"] = url_for("job_status", job_id=job_id)
+    return response
+
+
+@app.route("/jobs")
+@login_required
+def list_jobs():
+    """The current user's most recent jobs, plus queue counters"""
+    limit = min(request.args.get("limit", 50, type=int), 500)
+    return jsonify({"jobs": jobs.list(owner=current_user.id, limit=limit), "queue": jobs.stats()})
+
+
+@app.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    status = _own_job(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>/result")
+@login_required
+def job_result(job_id):
+    """200 with the result once done, 202 while pending, 409 if it failed or was cancelled"""
+    if _own_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    status, result = jobs.result(job_id)
+    if status["state"] == "done":
+        return jsonify({"job": status, "result": result})
+    if status["state"] in ("queued", "running"):
+        return jsonify({"job": status}), 202
+    return jsonify({"job": status, "error": status["error"] or f"Job {status['state']}"}), 409
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+@login_required
+def cancel_job(job_id):
+    if _own_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    jobs.cancel(job_id)
+    return jsonify(jobs.get(job_id)), 202
 
 # =====================
 # CREATE TABLES & RUN
@@ -391,6 +1121,37 @@ def predict():
 with app.app_context():
     db.create_all()
 
+# =====================
+# WARM-UP & READINESS
+# =====================
+def _warm_imports():
+    import pandas  # noqa: F401
+    import bokeh.embed  # noqa: F401
+    import bokeh.plotting  # noqa: F401
+
+
+def _warm_datasets():
+    for name in ("daily_features", "forecast_results"):
+        datasets.get(name)
+    aggregates.get()
+
+
+def _warm_charts():
+    # Chart renderers build zoom-callback URLs with url_for
+    with app.test_request_context():
+        for render in (dashboard_charts, bi_charts, analytics_charts, backtest_charts):
+            render()
+
+
+# Heavy first-use work runs here instead of on the first requests; /ready
+# answers 503 until it is done (WARMUP=0 skips it)
+warmup = init_warmup(app, [
+    ("imports", _warm_imports),
+    ("datasets", _warm_datasets),
+    ("model", model_registry.get),
+    ("charts", _warm_charts),
+])
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
 
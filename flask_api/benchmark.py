@@ -0,0 +1,288 @@
+"""
+In-process benchmark of the dashboard and prediction endpoints
+
+Generates synthetic daily_features.csv / lstm_forecast_results.csv at several
+multiples of the real 760-row dataset, then drives app.py through the Flask
+test client (no server, no network) and records latency percentiles,
+response size and memory per endpoint.
+
+Each scale runs in its own subprocess, because the app reads BI_DATA_DIR and
+builds its caches at import time and so memory numbers don't leak between
+scales. Results are written as JSON; pass an earlier file as --compare to see
+the ratio of every p50/p95 against it.
+
+Usage (from flask_api/):
+    python benchmark.py                          # scales 1 10 100 1000
+    python benchmark.py --scales 1 10 --repeat 10 --output bench.json
+    python benchmark.py --compare bench.json     # flag regressions
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(HERE)
+REAL_DATA_DIR = os.path.join(BASE_DIR, "data", "processed")
+
+PAGES = ["/dashboard", "/bi", "/analytics"]
+BENCH_USER = ("bench", "bench")
+
+
+# =====================
+# SYNTHETIC DATA
+# =====================
+def make_synthetic(scale, out_dir, seed=0):
+    """Write daily_features-shaped CSVs with `scale` times the real row count.
+
+    Real rows are tiled with a little Gaussian noise so value ranges stay
+    realistic. Dates are daily; beyond ~100k rows they become hourly so the
+    range stays within pandas' datetime bounds.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    rows = {}
+    for file_name in ("daily_features.csv", "lstm_forecast_results.csv"):
+        real = pd.read_csv(os.path.join(REAL_DATA_DIR, file_name))
+        n = len(real) * scale
+        freq = "D" if n <= 100_000 else "h"
+        out = pd.DataFrame({"Date": pd.date_range("2000-01-01", periods=n, freq=freq)})
+        for col in real.columns.drop("Date"):
+            base = np.tile(real[col].to_numpy(dtype=np.float64), scale)
+            noise = rng.normal(0.0, 0.05 * (np.nanstd(base) or 1.0), n)
+            # Keep low-cardinality columns (codes, flags, promotion levels) discrete
+            out[col] = base if real[col].nunique() <= 20 else np.round(base + noise, 4)
+        out.to_csv(os.path.join(out_dir, file_name), index=False)
+        rows[file_name] = n
+    return rows["daily_features.csv"]
+
+
+# =====================
+# MEASUREMENT (runs inside the per-scale subprocess)
+# =====================
+def _percentile(values, q):
+    import numpy as np
+    return round(float(np.percentile(values, q)), 3) if values else None
+
+
+def _rss_mb():
+    from forecasting.model_registry import _rss_bytes
+    rss = _rss_bytes()
+    return round(rss / 2**20, 1) if rss is not None else None
+
+
+def _measure(client, endpoint, mode, repeat, request, before_each=None):
+    """Time `repeat` calls of request(); returns one result row"""
+    rss_before = _rss_mb()
+    timings, size, status = [], 0, None
+    for _ in range(repeat):
+        if before_each is not None:
+            before_each()
+        start = time.perf_counter()
+        response = request()
+        timings.append((time.perf_counter() - start) * 1000)
+        size, status = len(response.data), response.status_code
+    rss_after = _rss_mb()
+    return {
+        "endpoint": endpoint,
+        "mode": mode,
+        "n": repeat,
+        "status": status,
+        "p50_ms": _percentile(timings, 50),
+        "p95_ms": _percentile(timings, 95),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "bytes": size,
+        "rss_mb": rss_after,
+        "rss_delta_mb": round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+    }
+
+
+def run_scale(scale, repeat, batch_size):
+    """Benchmark the app against the synthetic data in BI_DATA_DIR"""
+    import io
+    import resource
+    import warnings
+    import numpy as np
+
+    warnings.filterwarnings("ignore")
+    sys.path.insert(0, HERE)
+    import_start = time.perf_counter()
+    import app as app_module
+    import_s = time.perf_counter() - import_start
+
+    client = app_module.app.test_client()
+    with app_module.app.app_context():
+        user = app_module.User(username=BENCH_USER[0])
+        user.set_password(BENCH_USER[1])
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+    client.post("/login", data={"username": BENCH_USER[0], "password": BENCH_USER[1]})
+
+    results = []
+    for page in PAGES:
+        # First hit parses the CSV and renders; later hits come from the chart cache
+        results.append(_measure(client, page, "cold", 1, lambda: client.get(page)))
+        results.append(_measure(client, page, "cached", repeat, lambda: client.get(page)))
+        results.append(_measure(client, page, "render", max(repeat // 4, 3), lambda: client.get(page),
+                                before_each=app_module.chart_cache.clear))
+
+    df = app_module.datasets.get("daily_features")
+    features = df.drop(columns=["Date"]).to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(0)
+    window = 14
+    sequence = features[-window:].tolist()
+    starts = rng.integers(0, len(features) - window, batch_size)
+    batch = np.stack([features[s:s + window] for s in starts])
+    buf = io.BytesIO()
+    np.save(buf, batch)
+    batch_body = buf.getvalue()
+
+    def predict():
+        return client.post("/predict", json={"sequence": sequence})
+
+    def predict_batch():
+        return client.post("/predict/batch", data=batch_body, content_type="application/x-npy")
+
+    results.append(_measure(client, "/predict", "cold", 1, predict))
+    results.append(_measure(client, "/predict", "warm", repeat, predict))
+    results.append(_measure(client, "/predict/batch", f"warm_x{batch_size}", max(repeat // 2, 3), predict_batch))
+
+    return {
+        "scale": scale,
+        "rows": int(len(df)),
+        "import_s": round(import_s, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+
+
+# =====================
+# DRIVER
+# =====================
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versions():
+    versions = {"python": platform.python_version()}
+    for name in ("numpy", "pandas", "bokeh", "flask"):
+        try:
+            from importlib.metadata import version
+            versions[name] = version(name)
+        except Exception:
+            versions[name] = None
+    return versions
+
+
+def run_all(scales, repeat, batch_size):
+    runs = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"bench-x{scale}-") as tmp:
+            data_dir = os.path.join(tmp, "processed")
+            os.makedirs(data_dir)
+            gen_start = time.perf_counter()
+            rows = make_synthetic(scale, data_dir)
+            print(f"x{scale}: {rows} rows generated in {time.perf_counter() - gen_start:.1f}s", file=sys.stderr)
+
+            env = dict(os.environ)
+            env.update({
+                "BI_DATA_DIR": data_dir,
+                "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                "MODEL_WATCH_INTERVAL": "0",
+                # Cold measurements should include first-use work
+                "WARMUP": "0",
+            })
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", str(scale),
+                 "--repeat", str(repeat), "--batch-size", str(batch_size)],
+                cwd=HERE, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                runs.append({"scale": scale, "error": proc.stderr.strip().splitlines()[-1:]})
+                continue
+            run = json.loads(proc.stdout.strip().splitlines()[-1])
+            runs.append(run)
+            for r in run["results"]:
+                print(f"  {r['endpoint']:<16} {r['mode']:<10} p50 {r['p50_ms']:>9.2f} ms  "
+                      f"p95 {r['p95_ms']:>9.2f} ms  {r['bytes']:>9} B  [{r['status']}]", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "platform": platform.platform(),
+            "versions": _versions(),
+            "repeat": repeat,
+            "batch_size": batch_size,
+        },
+        "runs": runs,
+    }
+
+
+def compare(current, baseline, threshold=1.2):
+    """Lines comparing p50/p95 per (scale, endpoint, mode); '!' marks ratios above threshold"""
+    def index(report):
+        return {
+            (run["scale"], r["endpoint"], r["mode"]): r
+            for run in report["runs"] if "results" in run for r in run["results"]
+        }
+
+    old, new = index(baseline), index(current)
+    lines = []
+    for key in sorted(new.keys() & old.keys()):
+        for metric in ("p50_ms", "p95_ms"):
+            if not old[key][metric]:
+                continue
+            ratio = new[key][metric] / old[key][metric]
+            flag = "!" if ratio > threshold else " "
+            scale, endpoint, mode = key
+            lines.append(f"{flag} x{scale:<5} {endpoint:<16} {mode:<10} {metric} "
+                         f"{old[key][metric]:>9.2f} -> {new[key][metric]:>9.2f} ms ({ratio:.2f}x)")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dashboards and prediction endpoints")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per warm measurement")
+    parser.add_argument("--batch-size", type=int, default=256, help="Windows per /predict/batch call")
+    parser.add_argument("--output", help="JSON file to write (default: benchmark-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Slowdown ratio flagged as a regression by --compare")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        print(json.dumps(run_scale(args.worker, args.repeat, args.batch_size)))
+        return 0
+
+    report = run_all(args.scales, args.repeat, args.batch_size)
+    output = args.output or f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            lines = compare(report, json.load(f), args.threshold)
+        print("\n".join(lines))
+        if any(line.startswith("!") for line in lines):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Shared forecasting core used by both Flask apps (flask_api and bi_app)
+"""
@@ -0,0 +1,257 @@
+"""
+Materialized aggregates over daily_features
+
+The analytics pages show mean Units Sold per Category/Region/Promotion and a
+30-bin histogram of Units Sold. Instead of a groupby / pd.cut over the raw
+table on every render, each dataset version is reduced once to per-day
+cumulative sums and counts:
+
+    cum_sum[d, k] = sum of the value over days < d for group key k
+
+so the aggregate over any date range [lo, hi) is cum[hi] - cum[lo]. When the
+CSV grows by appended days, only the new rows are reduced and stacked onto
+the existing cumulative arrays.
+"""
+import threading
+
+import numpy as np
+
+
+def histogram_edges(values, bins):
+    """Bin edges matching pd.cut(values, bins=<int>)"""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.linspace(0.0, 1.0, bins + 1)
+    lo, hi = values.min(), values.max()
+    if lo == hi:
+        # pd.cut widens a degenerate range by 0.1% on each side
+        lo = lo - 0.001 * abs(lo) if lo != 0 else -0.001
+        hi = hi + 0.001 * abs(hi) if hi != 0 else 0.001
+        return np.linspace(lo, hi, bins + 1)
+    edges = np.linspace(lo, hi, bins + 1)
+    edges[0] -= (hi - lo) * 0.001
+    return edges
+
+
+def _bin_index(values, edges):
+    """Index of the right-closed bin each value falls in; -1 when outside"""
+    idx = np.searchsorted(edges, values, side="left") - 1
+    idx[(idx < 0) | (idx >= len(edges) - 1) | np.isnan(values)] = -1
+    return idx
+
+
+def _group_keys(column):
+    """Sorted distinct non-null keys; null keys are dropped as groupby does"""
+    keys = np.unique(column)
+    if keys.dtype.kind == "f":
+        keys = keys[~np.isnan(keys)]
+    return keys
+
+
+def _key_index(column, keys, values):
+    """Position of each row's key in `keys`; -1 for rows left out of the means"""
+    if not len(keys):
+        return np.full(len(column), -1)
+    idx = np.searchsorted(keys, column)
+    idx[idx >= len(keys)] = 0
+    skip = keys[idx] != column
+    # Missing values in the value column are excluded, as groupby().mean() does
+    return np.where(skip | np.isnan(values), -1, idx)
+
+
+def _per_day(day_idx, n_days, key_idx, n_keys, weights=None):
+    """(n_days, n_keys) sums of `weights` per day and key (row counts if None)"""
+    valid = key_idx >= 0
+    flat = day_idx[valid] * n_keys + key_idx[valid]
+    w = None if weights is None else weights[valid]
+    return np.bincount(flat, weights=w, minlength=n_days * n_keys).reshape(n_days, n_keys)
+
+
+def _cumulative(per_day, start=None):
+    """Prefix sums with a leading row of zeros (or of `start`, the running total)"""
+    first = np.zeros((1, per_day.shape[1])) if start is None else start[None, :]
+    return np.concatenate([first, first + np.cumsum(per_day, axis=0)])
+
+
+class AggregateStore:
+    """Per-day cumulative group sums/counts and histogram counts for one value column.
+
+    Instances are immutable: extended() returns a new store, so readers never
+    see a half-updated one.
+    """
+
+    def __init__(self, value, group_cols, date_col, dates, groups, edges, cum_hist, source):
+        self.value = value
+        self.group_cols = tuple(group_cols)
+        self.date_col = date_col
+        self.dates = dates          # sorted distinct days
+        self.groups = groups        # col -> (keys, cum_sum, cum_count)
+        self.edges = edges
+        self.cum_hist = cum_hist
+        # Copies of the reduced columns, to check that a new version only appends
+        self._source = source
+
+    @property
+    def n_rows(self):
+        return len(self._source[self.date_col])
+
+    @classmethod
+    def build(cls, df, value="Units Sold", group_cols=("Category", "Region", "Promotion"),
+              bins=30, date_col="Date"):
+        group_cols = [c for c in group_cols if c in df.columns]
+        source = {col: df[col].to_numpy().copy() for col in [date_col, value] + group_cols}
+        dates, day_idx = np.unique(source[date_col], return_inverse=True)
+        values = source[value].astype(np.float64)
+
+        groups = {}
+        for col in group_cols:
+            keys = _group_keys(source[col])
+            key_idx = _key_index(source[col], keys, values)
+            groups[col] = (
+                keys,
+                _cumulative(_per_day(day_idx, len(dates), key_idx, len(keys), np.nan_to_num(values))),
+                _cumulative(_per_day(day_idx, len(dates), key_idx, len(keys))),
+            )
+
+        edges = histogram_edges(values, bins)
+        cum_hist = _cumulative(_per_day(day_idx, len(dates), _bin_index(values, edges), bins))
+        return cls(value, group_cols, date_col, dates, groups, edges, cum_hist, source)
+
+    def _is_prefix_of(self, df):
+        """True when the first n_rows of df are exactly the rows already reduced"""
+        n = self.n_rows
+        if len(df) < n or not n:
+            return False
+        for col, old in self._source.items():
+            if col not in df.columns:
+                return False
+            current = df[col].to_numpy()[:n]
+            if not np.array_equal(current, old, equal_nan=old.dtype.kind == "f"):
+                return False
+        return True
+
+    def extended(self, df):
+        """Store covering df, reducing only the rows appended since this one was built.
+
+        Returns None when earlier rows changed; the caller then rebuilds from
+        scratch.
+        """
+        if not self._is_prefix_of(df):
+            return None
+        n = self.n_rows
+        if len(df) == n:
+            return self
+        new = {col: df[col].to_numpy()[n:] for col in self._source}
+        values = new[self.value].astype(np.float64)
+
+        # The new rows may continue the last stored day before starting new ones
+        new_days, day_idx = np.unique(new[self.date_col], return_inverse=True)
+        overlap = int(new_days[0] == self.dates[-1])
+        dates = np.concatenate([self.dates, new_days[overlap:]])
+
+        def stack(cum, per_day):
+            if overlap:
+                cum = cum.copy()
+                cum[-1] += per_day[0]
+                per_day = per_day[1:]
+            return np.concatenate([cum, _cumulative(per_day, cum[-1])[1:]])
+
+        groups = {}
+        for col, (keys, cum_sum, cum_count) in self.groups.items():
+            all_keys = np.union1d(keys, _group_keys(new[col]))
+            if len(all_keys) > len(keys):
+                # Keys seen for the first time get an all-zero history
+                pos = np.searchsorted(all_keys, keys)
+                grown_sum = np.zeros((len(cum_sum), len(all_keys)))
+                grown_count = np.zeros_like(grown_sum)
+                grown_sum[:, pos], grown_count[:, pos] = cum_sum, cum_count
+                keys, cum_sum, cum_count = all_keys, grown_sum, grown_count
+            key_idx = _key_index(new[col], keys, values)
+            groups[col] = (
+                keys,
+                stack(cum_sum, _per_day(day_idx, len(new_days), key_idx, len(keys), np.nan_to_num(values))),
+                stack(cum_count, _per_day(day_idx, len(new_days), key_idx, len(keys))),
+            )
+
+        source = {col: np.concatenate([old, new[col]]) for col, old in self._source.items()}
+        bins = len(self.edges) - 1
+        edges = histogram_edges(source[self.value].astype(np.float64), bins)
+        if np.array_equal(edges, self.edges):
+            cum_hist = stack(self.cum_hist, _per_day(day_idx, len(new_days), _bin_index(values, edges), bins))
+        else:
+            # The new rows widened the value range, which moves every bin edge
+            _, all_day_idx = np.unique(source[self.date_col], return_inverse=True)
+            all_values = source[self.value].astype(np.float64)
+            cum_hist = _cumulative(_per_day(all_day_idx, len(dates), _bin_index(all_values, edges), bins))
+        return AggregateStore(self.value, self.group_cols, self.date_col, dates, groups, edges, cum_hist, source)
+
+    def _bounds(self, start=None, end=None):
+        """[lo, hi) day slice covering [start, end] (anything np.datetime64 accepts)"""
+        lo, hi = 0, len(self.dates)
+        if start is not None:
+            lo = int(np.searchsorted(self.dates, np.datetime64(start), side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(self.dates, np.datetime64(end), side="right"))
+        return lo, max(lo, hi)
+
+    def group_means(self, col, start=None, end=None):
+        """(keys, mean value) for the keys that have rows in the date range"""
+        keys, cum_sum, cum_count = self.groups[col]
+        lo, hi = self._bounds(start, end)
+        sums = cum_sum[hi] - cum_sum[lo]
+        counts = cum_count[hi] - cum_count[lo]
+        present = counts > 0
+        return keys[present], sums[present] / counts[present]
+
+    def histogram(self, start=None, end=None):
+        """(counts, edges) of the value column within the date range.
+
+        Edges always span the whole dataset, so ranges are comparable.
+        """
+        lo, hi = self._bounds(start, end)
+        return np.rint(self.cum_hist[hi] - self.cum_hist[lo]).astype(np.int64), self.edges
+
+    def info(self):
+        return {
+            "rows": self.n_rows,
+            "days": len(self.dates),
+            "groups": {col: len(keys) for col, (keys, _, _) in self.groups.items()},
+            "bins": len(self.edges) - 1,
+        }
+
+
+class AggregateCache:
+    """The AggregateStore of one dataset, kept in step with the dataset cache"""
+
+    def __init__(self, datasets, name, **spec):
+        self.datasets = datasets
+        self.name = name
+        self.spec = spec
+        self._fingerprint = None
+        self._store = None
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "builds": 0, "incremental": 0}
+
+    def get(self):
+        """Store for the current dataset version, or None when the dataset is missing"""
+        fingerprint, df = self.datasets.get_entry(self.name)
+        if df is None:
+            return None
+        with self._lock:
+            if self._store is not None and self._fingerprint == fingerprint:
+                self.counters["hits"] += 1
+                return self._store
+            store = self._store.extended(df) if self._store is not None else None
+            if store is not None:
+                self.counters["incremental"] += 1
+            else:
+                store = AggregateStore.build(df, **self.spec)
+                self.counters["builds"] += 1
+            self._store, self._fingerprint = store, fingerprint
+            return store
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["store"] = self._store.info() if self._store is not None else None
+        return stats
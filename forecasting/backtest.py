@@ -0,0 +1,197 @@
+"""
+Walk-forward backtest of the LSTM over many forecast origins
+
+notebooks/lstm_modeling_evaluation.ipynb scores the model on one 80/20 split
+with a recursive loop of batch-size-1 model.predict calls. Here every origin
+in the test period is forecast at once:
+
+- the history window and the future rows of every origin are strided views
+  of the feature matrix (forecasting.windows), so building N origins copies
+  nothing;
+- rollout() advances all origins together, so each horizon step is one
+  batched forward pass over every origin (in chunks of --batch-size).
+
+As in the notebook, the exogenous features of future days are the observed
+ones by default (--exog actual); --exog hold repeats the last observed values
+instead, which is what a live forecast has to do.
+
+Writes to the processed-data directory, where /analytics charts them:
+    backtest_by_origin.csv   Origin, RMSE, MAE          (one row per origin)
+    backtest_by_horizon.csv  Horizon, RMSE, MAE, Origins (one row per step ahead)
+    backtest_summary.json    model version, settings, overall RMSE/MAE, timing
+
+Usage:
+    python -m forecasting.backtest                       # 14-day horizon over the last 20%
+    python -m forecasting.backtest --horizon 30 --start 2023-06-01 --step 7
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from forecasting.forecast import rollout
+from forecasting.inference import TARGET_COL, feature_columns
+from forecasting.windows import windows
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(BASE_DIR, "data", "processed")
+DEFAULT_MODEL_DIR = os.path.join(BASE_DIR, "models")
+
+BY_ORIGIN = "backtest_by_origin.csv"
+BY_HORIZON = "backtest_by_horizon.csv"
+SUMMARY = "backtest_summary.json"
+
+
+def origin_windows(X, window, horizon, first, step=1):
+    """Views of the history and future rows of every forecast origin.
+
+    Origin i forecasts rows first + i * step onward. Returns (origins, history,
+    future) where history[i] is the `window` rows before origin i, shape
+    (n, window, n_features), and future[i] the `horizon` rows from it, shape
+    (n, horizon, n_features). Both are views of X.
+    """
+    n_rows = len(X)
+    first = max(int(first), window)
+    last = n_rows - horizon          # last origin that still has `horizon` actual rows
+    if last < first:
+        raise ValueError(f"Need at least {window + horizon} rows of data from the first origin")
+    histories, futures = windows(X, window), windows(X, horizon)
+    origins = np.arange(first, last + 1, step)
+    history = histories[first - window:last - window + 1:step]
+    future = futures[first:last + 1:step]
+    return origins, history, future
+
+
+def backtest(entry, X, horizon, first, step=1, exog="actual", batch_size=4096, on_chunk=None):
+    """Forecast every origin from `first` on; returns (origins, predictions, actuals).
+
+    X is the unscaled feature matrix in the scaler's column order. Predictions
+    and actuals have shape (n_origins, horizon). on_chunk(fraction_done) is
+    called after each chunk of origins.
+    """
+    if exog not in ("actual", "hold"):
+        raise ValueError("exog must be 'actual' or 'hold'")
+    X = np.asarray(X, dtype=np.float64)
+    origins, history, future = origin_windows(X, entry.window, horizon, first, step)
+    preds = np.empty((len(origins), horizon))
+    for start in range(0, len(origins), batch_size):
+        stop = min(start + batch_size, len(origins))
+        future_exog = None
+        if exog == "actual":
+            future_exog = np.delete(future[start:stop], TARGET_COL, axis=2)
+        preds[start:stop] = rollout(entry, history[start:stop], horizon, future_exog)
+        if on_chunk is not None:
+            on_chunk(stop / len(origins))
+    return origins, preds, future[:, :, TARGET_COL]
+
+
+def error_metrics(preds, actuals):
+    """RMSE and MAE per origin (over its horizon) and per horizon step (over origins)"""
+    err = preds - actuals
+    sq, ab = err ** 2, np.abs(err)
+    return {
+        "origin_rmse": np.sqrt(sq.mean(axis=1)),
+        "origin_mae": ab.mean(axis=1),
+        "horizon_rmse": np.sqrt(sq.mean(axis=0)),
+        "horizon_mae": ab.mean(axis=0),
+        "rmse": float(np.sqrt(sq.mean())),
+        "mae": float(ab.mean()),
+    }
+
+
+def default_first_origin(n_rows):
+    """First row of the notebook's 80/20 test split"""
+    return int(n_rows * 0.8)
+
+
+def run(entry, df, horizon=14, start=None, step=1, exog="actual", out_dir=None, batch_size=4096, on_chunk=None):
+    """Backtest on a daily_features frame and write the CSVs to out_dir (if given).
+
+    `start` is the first origin's date (anything pd.Timestamp accepts); the
+    default is the notebook's 80/20 split. Returns the summary dict.
+    """
+    import pandas as pd
+
+    began = time.perf_counter()
+    cols = feature_columns(entry.scaler, df.columns)
+    X = df[cols].to_numpy(dtype=np.float64)
+    dates = df["Date"].to_numpy()
+    if start is None:
+        first = default_first_origin(len(df))
+    else:
+        first = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side="left"))
+
+    origins, preds, actuals = backtest(entry, X, horizon, first, step, exog, batch_size, on_chunk)
+    m = error_metrics(preds, actuals)
+    summary = {
+        "model_version": entry.version,
+        "horizon": horizon,
+        "step": step,
+        "exog": exog,
+        "origins": int(len(origins)),
+        "first_origin": str(pd.Timestamp(dates[origins[0]]).date()),
+        "last_origin": str(pd.Timestamp(dates[origins[-1]]).date()),
+        "rmse": round(m["rmse"], 4),
+        "mae": round(m["mae"], 4),
+        "seconds": round(time.perf_counter() - began, 3),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        pd.DataFrame({
+            "Origin": pd.to_datetime(dates[origins]).strftime("%Y-%m-%d"),
+            "RMSE": m["origin_rmse"],
+            "MAE": m["origin_mae"],
+        }).to_csv(os.path.join(out_dir, BY_ORIGIN), index=False)
+        pd.DataFrame({
+            "Horizon": np.arange(1, horizon + 1),
+            "RMSE": m["horizon_rmse"],
+            "MAE": m["horizon_mae"],
+            "Origins": len(origins),
+        }).to_csv(os.path.join(out_dir, BY_HORIZON), index=False)
+        with open(os.path.join(out_dir, SUMMARY), "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    from forecasting.datasets import read_dataset
+    from forecasting.model_registry import ModelRegistry, ModelUnavailableError
+
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the LSTM forecaster")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--backend", default="auto", choices=["auto", "numpy", "keras"])
+    parser.add_argument("--horizon", type=int, default=14, help="Days forecast from each origin")
+    parser.add_argument("--start", help="Date of the first origin (default: the 80/20 split)")
+    parser.add_argument("--step", type=int, default=1, help="Days between origins")
+    parser.add_argument("--exog", default="actual", choices=["actual", "hold"],
+                        help="Future exogenous features: observed values, or the last ones held")
+    parser.add_argument("--batch-size", type=int, default=4096, help="Origins per forward pass")
+    parser.add_argument("--out-dir", help="Where to write the CSVs (default: --data-dir)")
+    args = parser.parse_args(argv)
+
+    csv_path = os.path.join(args.data_dir, "daily_features.csv")
+    if not os.path.exists(csv_path):
+        print(f"{csv_path} not found")
+        return 1
+    try:
+        entry = ModelRegistry(args.model_dir, backend=args.backend).get()
+    except ModelUnavailableError as e:
+        print(f"Model unavailable: {e}")
+        return 1
+    try:
+        summary = run(entry, read_dataset(csv_path, ["Date"]), args.horizon, args.start, args.step,
+                      args.exog, args.out_dir or args.data_dir, args.batch_size)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
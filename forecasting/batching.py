@@ -0,0 +1,129 @@
+"""
+Dynamic micro-batching for concurrent single-item requests
+
+Requests are queued and a single worker thread gathers whatever arrives within
+`window_ms` of the first queued item (or until `max_batch` items), runs one
+batched call and hands each caller its own result through a Future.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class _Pending:
+    __slots__ = ("item", "key", "future", "enqueued")
+
+    def __init__(self, item, key):
+        self.item = item
+        self.key = key
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """Coalesces concurrent calls into batched calls of `batch_fn`.
+
+    `batch_fn(items)` receives a list of items and must return a sequence of
+    results of the same length. Items with different `key_fn(item)` values
+    (e.g. different array shapes) are never put in the same batch.
+    """
+
+    def __init__(self, batch_fn, max_batch=64, window_ms=2.0, key_fn=None, name="micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, int(max_batch))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.key_fn = key_fn or (lambda item: None)
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._requests = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, item):
+        """Queue one item and return a Future for its result"""
+        if self._thread is None:
+            self._start()
+        pending = _Pending(item, self.key_fn(item))
+        self._queue.put(pending)
+        return pending.future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _gather(self):
+        """Block for the first item, then collect more until the window closes"""
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            groups = {}
+            for pending in batch:
+                groups.setdefault(pending.key, []).append(pending)
+            for group in groups.values():
+                self._dispatch(group)
+
+    def _dispatch(self, group):
+        dispatched = time.perf_counter()
+        waits = [dispatched - p.enqueued for p in group]
+        with self._stats_lock:
+            self._batch_sizes[len(group)] += 1
+            self._requests += len(group)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+        live = [p for p in group if p.future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            results = self.batch_fn([p.item for p in live])
+        except BaseException as e:
+            for p in live:
+                p.future.set_exception(e)
+            return
+        if len(results) != len(live):
+            # zip() would leave the callers past the shorter side waiting forever
+            error = RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(live)} items")
+            for p in live:
+                p.future.set_exception(error)
+            return
+        for p, result in zip(live, results):
+            p.future.set_result(result)
+
+    def stats(self):
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch": self.max_batch,
+                "window_ms": self.window * 1000.0,
+                "requests": self._requests,
+                "batches": batches,
+                "avg_batch_size": round(self._requests / batches, 3) if batches else None,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                "avg_wait_ms": round(self._wait_total / self._requests * 1000, 3) if self._requests else None,
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+            }
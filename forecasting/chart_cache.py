@@ -0,0 +1,94 @@
+"""
+LRU cache for rendered Bokeh output
+
+Rendering is deterministic for a given chart spec and input data, so the
+embedded script/divs are cached under (spec, data fingerprint). A new
+fingerprint for a spec (the CSVs changed) drops that spec's old entries, and
+the cache is bounded both by entry count and by approximate size in bytes.
+"""
+import threading
+from collections import OrderedDict
+
+
+def _approx_size(value):
+    """Rough byte size of rendered output (strings dominate)"""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_approx_size(v) for v in value)
+    return 64
+
+
+class ChartCache:
+    """Bounded LRU of rendered charts keyed by (spec, fingerprint)"""
+
+    def __init__(self, max_entries=64, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # (spec, fingerprint) -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, spec, fingerprint):
+        key = (spec, fingerprint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[0]
+
+    def put(self, spec, fingerprint, value):
+        size = _approx_size(value)
+        with self._lock:
+            # Output rendered from older data for this spec can never be hit again
+            for key in [k for k in self._entries if k[0] == spec and k[1] != fingerprint]:
+                self._drop(key)
+                self.counters["invalidations"] += 1
+            key = (spec, fingerprint)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+
+    def _drop(self, key):
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_or_render(self, spec, fingerprint, render, cacheable=None):
+        """Return cached output, or call `render()` and cache its result.
+
+        Results for which `cacheable(result)` is false (e.g. error pages) are
+        returned but not stored.
+        """
+        value = self.get(spec, fingerprint)
+        if value is not None:
+            return value
+        value = render()
+        if cacheable is None or cacheable(value):
+            self.put(spec, fingerprint, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            })
+        return stats
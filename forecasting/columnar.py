@@ -0,0 +1,178 @@
+"""
+Columnar binary copy of the processed datasets
+
+A dataset `daily_features.csv` gets a sibling directory `daily_features.cols/`
+holding one .npy file per column plus a manifest.json. Columns are opened with
+np.load(mmap_mode="r"), so a view that needs three columns only touches those
+three files and no text parsing happens at all.
+
+The manifest records the (mtime_ns, size) of the CSV it was built from; a
+columnar copy whose CSV has changed or been deleted since is ignored until it
+is rebuilt.
+
+Usage:
+    python -m forecasting.columnar convert              # all known datasets
+    python -m forecasting.columnar convert daily_features
+    python -m forecasting.columnar bench daily_features
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+SUFFIX = ".cols"
+
+
+def columnar_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + SUFFIX
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def read_manifest(cols_dir):
+    try:
+        with open(os.path.join(cols_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv_path, manifest):
+    """True if the columnar copy was built from the CSV as it is now.
+
+    A copy whose CSV was deleted is not fresh: the dataset is gone, and the
+    leftover copy must not keep it alive.
+    """
+    if manifest is None:
+        return False
+    try:
+        signature = _file_signature(csv_path)
+    except OSError:
+        return False
+    return manifest.get("source_signature") == signature
+
+
+def write_columnar(df, cols_dir, source_path=None):
+    """Write every column of `df` to its own .npy, replacing any old copy"""
+    tmp_dir = f"{cols_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for i, name in enumerate(df.columns):
+        values = df[name].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        slug = re.sub(r"[^0-9a-zA-Z]+", "_", str(name)).strip("_").lower()
+        file_name = f"c{i:02d}_{slug}.npy"
+        np.save(os.path.join(tmp_dir, file_name), np.ascontiguousarray(values))
+        columns.append({"name": str(name), "file": file_name, "dtype": str(values.dtype)})
+    manifest = {
+        "rows": int(len(df)),
+        "columns": columns,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if source_path is not None:
+        manifest["source_signature"] = _file_signature(source_path)
+    with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap directories so readers see either the old or the new copy
+    old_dir = f"{cols_dir}.old{os.getpid()}"
+    if os.path.exists(cols_dir):
+        os.rename(cols_dir, old_dir)
+    os.rename(tmp_dir, cols_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+def read_columnar(cols_dir, columns=None, manifest=None):
+    """Load (a subset of) the columns as a DataFrame backed by memory maps"""
+    import pandas as pd
+
+    manifest = manifest or read_manifest(cols_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No columnar dataset at {cols_dir}")
+    by_name = {c["name"]: c for c in manifest["columns"]}
+    names = list(by_name) if columns is None else [c for c in columns if c in by_name]
+    data = {
+        name: np.load(os.path.join(cols_dir, by_name[name]["file"]), mmap_mode="r", allow_pickle=False)
+        for name in names
+    }
+    return pd.DataFrame(data, columns=names, copy=False)
+
+
+def convert(csv_path, date_columns=("Date",)):
+    """Build the columnar copy next to `csv_path`"""
+    from forecasting.datasets import read_dataset
+
+    df = read_dataset(csv_path, list(date_columns))
+    return write_columnar(df, columnar_dir(csv_path), source_path=csv_path)
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(csv_path, columns=None, repeat=5):
+    """Best-of-N load times: CSV parse vs columnar (all / selected columns)"""
+    from forecasting.datasets import read_dataset
+
+    cols_dir = columnar_dir(csv_path)
+    if read_manifest(cols_dir) is None:
+        convert(csv_path)
+    columns = columns or ["Date", "Units Sold"]
+    return {
+        "csv_parse_s": _time(lambda: read_dataset(csv_path, ["Date"]), repeat),
+        "columnar_all_s": _time(lambda: read_columnar(cols_dir), repeat),
+        "columnar_subset_s": _time(lambda: read_columnar(cols_dir, columns), repeat),
+        "subset_columns": columns,
+    }
+
+
+def main(argv=None):
+    from forecasting.datasets import DATASETS
+
+    default_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "processed")
+    parser = argparse.ArgumentParser(description="Columnar copies of processed datasets")
+    parser.add_argument("--data-dir", default=default_dir)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_conv = sub.add_parser("convert", help="Write .cols/ directories next to the CSVs")
+    p_conv.add_argument("names", nargs="*", help=f"Datasets to convert (default: {', '.join(DATASETS)})")
+    p_bench = sub.add_parser("bench", help="Compare CSV and columnar load times")
+    p_bench.add_argument("name", nargs="?", default="daily_features")
+    p_bench.add_argument("--columns", nargs="*")
+    p_bench.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        for name in args.names or list(DATASETS):
+            file_name, date_columns = DATASETS[name]
+            csv_path = os.path.join(args.data_dir, file_name)
+            if not os.path.exists(csv_path):
+                print(f"Skipping {name}: {csv_path} not found")
+                continue
+            manifest = convert(csv_path, date_columns)
+            print(f"{name}: {manifest['rows']} rows, {len(manifest['columns'])} columns -> {columnar_dir(csv_path)}")
+    elif args.command == "bench":
+        csv_path = os.path.join(args.data_dir, DATASETS[args.name][0])
+        result = bench(csv_path, args.columns, args.repeat)
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Shared, mtime-aware cache for the processed datasets
+
+Each dataset is parsed once per process and kept in memory as a typed
+DataFrame. Every get() does one os.stat(); when the file's mtime or size
+changes, the stale frame keeps being served while a background thread parses
+the new file, and the cache switches over once it is ready.
+
+When a fresh columnar copy exists (see columnar.py) it is memory-mapped
+instead of parsing the CSV, and callers can ask for just the columns they use.
+
+The returned DataFrames are shared between requests: treat them as read-only.
+Code that caches something derived from them can wrap its reads in track()
+to learn which file versions it was actually served.
+"""
+import contextlib
+import logging
+import os
+import threading
+
+from forecasting.columnar import MANIFEST, columnar_dir, is_fresh, read_columnar, read_manifest
+
+logger = logging.getLogger(__name__)
+
+# name -> (file name, date columns)
+DATASETS = {
+    "daily_features": ("daily_features.csv", ["Date"]),
+    "forecast_results": ("lstm_forecast_results.csv", ["Date"]),
+    # Written by python -m forecasting.backtest
+    "backtest_origins": ("backtest_by_origin.csv", ["Origin"]),
+    "backtest_horizons": ("backtest_by_horizon.csv", []),
+    # Written by python -m forecasting.intervals
+    "forecast_intervals": ("lstm_forecast_intervals.csv", ["Date"]),
+}
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def read_dataset(path, date_columns, columns=None):
+    """Parse one processed CSV into a DataFrame sorted by its first date column"""
+    import pandas as pd
+
+    if columns is None:
+        df = pd.read_csv(path)
+    else:
+        wanted = set(columns)
+        df = pd.read_csv(path, usecols=lambda c: c in wanted)
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    if date_columns and date_columns[0] in df.columns:
+        df = df.sort_values(date_columns[0], kind="stable").reset_index(drop=True)
+    return df
+
+
+class DatasetCache:
+    """In-memory cache of processed datasets, revalidated by mtime/size"""
+
+    def __init__(self, data_dir, datasets=None, background=True):
+        self.data_dir = data_dir
+        self.datasets = dict(datasets or DATASETS)
+        self.background = background
+        self._entries = {}        # (name, columns) -> (fingerprint, DataFrame)
+        self._manifests = {}      # columnar dir -> (signature, manifest)
+        self._reloading = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.counters = {"hits": 0, "misses": 0, "reloads": 0, "stale_served": 0, "errors": 0}
+
+    def path(self, name):
+        return os.path.join(self.data_dir, self.datasets[name][0])
+
+    def _columnar_manifest(self, name):
+        """Manifest of a columnar copy that is still in sync with its CSV, else None"""
+        cols_dir = columnar_dir(self.path(name))
+        sig = _signature(os.path.join(cols_dir, MANIFEST))
+        if sig is None:
+            return None, None
+        cached = self._manifests.get(cols_dir)
+        if cached is None or cached[0] != sig:
+            cached = (sig, read_manifest(cols_dir))
+            self._manifests[cols_dir] = cached
+        if not is_fresh(self.path(name), cached[1]):
+            return None, None
+        return sig, cached[1]
+
+    def fingerprint(self, name):
+        """Identity of the file the dataset is read from, or None if it is missing"""
+        sig, _ = self._columnar_manifest(name)
+        if sig is not None:
+            return ("columnar",) + sig
+        sig = _signature(self.path(name))
+        return ("csv",) + sig if sig is not None else None
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _read(self, key, fingerprint):
+        name, columns = key
+        if fingerprint[0] == "columnar":
+            _, manifest = self._columnar_manifest(name)
+            df = read_columnar(columnar_dir(self.path(name)), columns, manifest)
+        else:
+            df = read_dataset(self.path(name), self.datasets[name][1], columns)
+        with self._lock:
+            self._entries[key] = (fingerprint, df)
+        return df
+
+    def _reload_in_background(self, key, fingerprint):
+        def _run():
+            try:
+                self._read(key, fingerprint)
+                self._count("reloads")
+            except Exception:
+                self._count("errors")
+                logger.exception("Background reload of %s failed", key[0])
+            finally:
+                with self._lock:
+                    self._reloading.discard(key)
+
+        threading.Thread(target=_run, name=f"reload-{key[0]}", daemon=True).start()
+
+    def get(self, name, columns=None):
+        """Return the dataset as a DataFrame, or None if its file does not exist.
+
+        `columns` limits the frame to the listed columns (missing ones are
+        skipped); each distinct column set is cached separately.
+        """
+        return self.get_entry(name, columns)[1]
+
+    @contextlib.contextmanager
+    def track(self):
+        """Collect {name: {fingerprint, ...}} of the frames served to this thread inside the block"""
+        served = {}
+        stack = self._local.__dict__.setdefault("tracking", [])
+        stack.append(served)
+        try:
+            yield served
+        finally:
+            stack.pop()
+
+    def get_entry(self, name, columns=None):
+        """(fingerprint, DataFrame) for the frame get() would return.
+
+        The fingerprint is the one the frame was read under, which lags the
+        file's while a stale frame is served during a background reload.
+        """
+        entry = self._get_entry(name, columns)
+        for served in getattr(self._local, "tracking", ()):
+            served.setdefault(name, set()).add(entry[0])
+        return entry
+
+    def _get_entry(self, name, columns):
+        fingerprint = self.fingerprint(name)
+        if fingerprint is None:
+            return None, None
+        key = (name, tuple(columns) if columns is not None else None)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self._count("hits")
+            return entry
+
+        if entry is not None and self.background:
+            # File changed: keep serving the old frame until the new one is parsed
+            with self._lock:
+                start = key not in self._reloading
+                self._reloading.add(key)
+            if start:
+                self._reload_in_background(key, fingerprint)
+            self._count("stale_served")
+            return entry
+
+        self._count("misses" if entry is None else "reloads")
+        return fingerprint, self._read(key, fingerprint)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["datasets"] = {
+                name if columns is None else f"{name}[{','.join(columns)}]": {
+                    "rows": len(df),
+                    "source": fingerprint[0],
+                    "fingerprint": list(fingerprint[1:]),
+                }
+                for (name, columns), (fingerprint, df) in self._entries.items()
+            }
+        return stats
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_dataset_cache(data_dir):
+    """The process-wide cache for `data_dir`"""
+    key = os.path.abspath(data_dir)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = DatasetCache(key)
+        return _caches[key]
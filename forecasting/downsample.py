@@ -0,0 +1,94 @@
+"""
+Server-side downsampling for long time series
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the points that preserve the
+visual shape of a line while reducing it to roughly one point per horizontal
+pixel. Charts are rendered with a downsampled series and, when the user zooms,
+a small JS callback asks the server for the visible range at full screen
+resolution again.
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the `n_out` points LTTB selects from (x, y).
+
+    x must be sorted ascending. Returns all indices when n_out >= len(x).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets over the interior points; first and last are always kept
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area between the last kept point, each candidate
+        # in this bucket and the average of the next bucket
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def range_bounds(dates, start_ms=None, end_ms=None):
+    """(lo, hi) row slice covering [start_ms, end_ms] on a sorted datetime64 array"""
+    lo, hi = 0, len(dates)
+    if start_ms is not None:
+        lo = int(np.searchsorted(dates, np.datetime64(int(start_ms), "ms"), side="left"))
+    if end_ms is not None:
+        hi = int(np.searchsorted(dates, np.datetime64(int(end_ms), "ms"), side="right"))
+    return lo, max(lo, hi)
+
+
+def series_window(df, column, start_ms=None, end_ms=None, n_out=1000, x_col="Date"):
+    """Dates and values of `column` within the range, reduced to at most n_out points"""
+    dates = df[x_col].to_numpy()
+    lo, hi = range_bounds(dates, start_ms, end_ms)
+    # Include one neighbour on each side so the line runs off the visible edges
+    lo, hi = max(lo - 1, 0), min(hi + 1, len(dates))
+    x = dates[lo:hi]
+    y = df[column].to_numpy()[lo:hi]
+    idx = lttb_indices(x.astype("datetime64[ms]").astype(np.int64), y, n_out)
+    return x[idx], y[idx]
+
+
+def to_epoch_ms(dates):
+    return np.asarray(dates).astype("datetime64[ms]").astype(np.int64)
+
+
+def zoom_callback(source, url, column, n_out=1000, x_col="Date"):
+    """CustomJS for a plot's `rangesupdate` event that refetches the visible range.
+
+    Requests are debounced and the endpoint at `url` must answer
+    ?column=&start=&end=&n= with {"x": [epoch ms...], "y": [...]}.
+    """
+    from bokeh.models import CustomJS
+
+    return CustomJS(args=dict(source=source, url=url, column=column, n=n_out, x_col=x_col), code="""
+        const key = "__zoom_" + source.id;
+        clearTimeout(window[key]);
+        window[key] = setTimeout(() => {
+            const params = new URLSearchParams({
+                column: column, start: Math.floor(cb_obj.x0), end: Math.ceil(cb_obj.x1), n: n,
+            });
+            fetch(url + "?" + params, {credentials: "same-origin"})
+                .then((r) => r.ok ? r.json() : null)
+                .then((d) => {
+                    if (d) { source.data = {[x_col]: d.x, [column]: d.y}; }
+                });
+        }, 150);
+    """)
@@ -0,0 +1,105 @@
+"""
+Multi-step recursive forecasting
+
+Each step feeds the previous prediction back in as the newest "Units Sold"
+value, like the loop in notebooks/lstm_modeling_evaluation.ipynb. Instead of
+rebuilding the input with np.append every step, the window lives in a
+preallocated mirrored ring buffer: every row is written twice (at i and
+i + window), so the current window is always the contiguous slice
+buf[:, pos:pos + window] and no step allocates a new array.
+"""
+import numpy as np
+
+from forecasting.inference import TARGET_COL, feature_columns, scale_features, unscale_target
+
+
+def rollout(entry, history, horizon, future_exog=None):
+    """Forecast `horizon` steps ahead from one or many unscaled histories.
+
+    history:     (window, n_features) or (batch, window, n_features)
+    future_exog: optional unscaled values of the non-target features for each
+                 future step, (horizon, n_features - 1) or batched. When
+                 omitted, the last observed values are held constant.
+
+    Returns unscaled predictions, shape (horizon,) or (batch, horizon).
+    """
+    history = np.asarray(history, dtype=np.float64)
+    single = history.ndim == 2
+    if single:
+        history = history[np.newaxis]
+    batch, window, n_features = history.shape
+    if (window, n_features) != (entry.window, entry.n_features):
+        raise ValueError(
+            f"History must have shape ({entry.window}, {entry.n_features}), "
+            f"got ({window}, {n_features})"
+        )
+    if horizon < 1:
+        raise ValueError("Horizon must be at least 1")
+
+    scaler = entry.scaler
+    exog_cols = [c for c in range(n_features) if c != TARGET_COL]
+
+    buf = np.empty((batch, 2 * window, n_features), dtype=np.float32)
+    buf[:, :window] = scale_features(scaler, history)
+    buf[:, window:] = buf[:, :window]
+
+    exog = None
+    if future_exog is not None:
+        future_exog = np.asarray(future_exog, dtype=np.float64)
+        if future_exog.ndim == 2:
+            future_exog = np.broadcast_to(future_exog, (batch,) + future_exog.shape)
+        if future_exog.shape[1] < horizon:
+            raise ValueError("future_exog must cover the whole horizon")
+        exog = (future_exog[:, :horizon] * scaler.scale_[exog_cols] + scaler.min_[exog_cols]).astype(np.float32)
+
+    out = np.empty((batch, horizon), dtype=np.float32)
+    pos = 0
+    for step in range(horizon):
+        pred = np.asarray(entry.predict(buf[:, pos:pos + window])).reshape(batch)
+        out[:, step] = pred
+
+        # The newest row reuses the previous row's exogenous features unless
+        # future values were supplied; it overwrites the oldest slot in both halves.
+        newest = buf[:, pos + window - 1]
+        row = buf[:, pos]
+        if exog is not None:
+            row[:, exog_cols] = exog[:, step]
+        else:
+            row[:, exog_cols] = newest[:, exog_cols]
+        row[:, TARGET_COL] = pred
+        buf[:, pos + window] = row
+        pos = (pos + 1) % window
+
+    preds = unscale_target(scaler, out)
+    return preds[0] if single else preds
+
+
+def cached_rollout(cache, entry, history, horizon, future_exog=None):
+    """rollout(), answered from a ForecastCache when the same forecast was made before"""
+    if cache is None:
+        return rollout(entry, history, horizon, future_exog)
+    key = cache.key(entry.version, "rollout", history, future_exog, horizon=horizon)
+    preds = cache.get(key)
+    if preds is None:
+        preds = cache.put(key, entry.version, rollout(entry, history, horizon, future_exog))
+    return preds
+
+
+def forecast_frame(entry, df, horizon, cache=None):
+    """Forecast `horizon` days past the end of a daily_features-shaped frame.
+
+    Returns a list of {"Date", "Predicted Units Sold"} records.
+    """
+    import pandas as pd
+
+    cols = feature_columns(entry.scaler, df.columns)
+    history = df[cols].to_numpy(dtype=np.float64)[-entry.window:]
+    if len(history) < entry.window:
+        raise ValueError(f"Need at least {entry.window} rows of history")
+    preds = cached_rollout(cache, entry, history, horizon)
+    start = pd.Timestamp(df["Date"].iloc[-1]) + pd.Timedelta(days=1)
+    dates = pd.date_range(start, periods=horizon, freq="D")
+    return [
+        {"Date": d.strftime("%Y-%m-%d"), "Predicted Units Sold": float(v)}
+        for d, v in zip(dates, preds)
+    ]
@@ -0,0 +1,241 @@
+"""
+Cache of forecast results keyed by model version and input
+
+The same windows are scored again and again (dashboards refreshing, jobs
+re-running), and a forward pass is deterministic for a given model version,
+input and horizon. Results are kept in a bounded in-memory LRU in front of a
+SQLite table of .npy blobs (forecast_cache.db next to users.db), so a repeat
+request costs a hash and a dict lookup, and a restarted worker starts warm.
+
+    key = forecast_cache.key(entry.version, "forecast", history, horizon=30)
+    preds = forecast_cache.get(key)
+    if preds is None:
+        preds = rollout(entry, history, 30)
+        forecast_cache.put(key, entry.version, preds)
+
+When the registry swaps in a new model version, the old version's entries are
+dropped from both tiers (see ModelRegistry.add_swap_listener). Several models
+can share one cache (per-segment models use "<segment>@<version>" as their
+version), and entries left behind by earlier processes age out of the disk
+tier oldest-first.
+"""
+import hashlib
+import io
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    key TEXT PRIMARY KEY,
+    version TEXT,
+    value BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS forecasts_version ON forecasts (version);
+CREATE INDEX IF NOT EXISTS forecasts_created ON forecasts (created_at);
+"""
+
+
+def _to_blob(value):
+    buf = io.BytesIO()
+    np.save(buf, value, allow_pickle=False)
+    return buf.getvalue()
+
+
+def _from_blob(blob):
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+
+class ForecastCache:
+    """Two-tier LRU of forecast arrays keyed by a hash of (version, kind, inputs, params).
+
+    `path=None` keeps the cache in memory only. Cached arrays are read-only;
+    callers that need to modify a result must copy it.
+    """
+
+    def __init__(self, path=None, max_entries=4096, max_bytes=32 * 1024 * 1024, max_disk_entries=100_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()   # key -> (version, array)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._disk_puts = 0
+        self.counters = {
+            "hits": 0, "disk_hits": 0, "misses": 0,
+            "evictions": 0, "disk_evictions": 0, "invalidations": 0, "disk_errors": 0,
+        }
+        if path is not None:
+            self._conn().executescript(_SCHEMA)
+
+    @staticmethod
+    def key(version, kind, *arrays, **params):
+        """Hex digest identifying one forecast; arrays are hashed by dtype, shape and bytes"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{version}|{kind}|{sorted(params.items())}".encode())
+        for array in arrays:
+            if array is None:
+                digest.update(b"|none")
+                continue
+            array = np.ascontiguousarray(array, dtype=np.float64)
+            digest.update(f"|{array.shape}".encode())
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads; one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Cached array for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[1]
+        row = self._disk_get(key)
+        if row is None:
+            with self._lock:
+                self.counters["misses"] += 1
+            return None
+        version, value = row
+        with self._lock:
+            self.counters["disk_hits"] += 1
+        self._remember(key, version, value)
+        return value
+
+    def put(self, key, version, value):
+        value = np.array(value, dtype=np.float64)
+        value.flags.writeable = False
+        self._remember(key, version, value)
+        self._disk_put(key, version, value)
+        return value
+
+    def _remember(self, key, version, value):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1].nbytes
+            self._entries[key] = (version, value)
+            self._bytes += value.nbytes
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped.nbytes
+                self.counters["evictions"] += 1
+
+    def _disk_get(self, key):
+        if self.path is None:
+            return None
+        try:
+            row = self._conn().execute("SELECT version, value FROM forecasts WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            # The disk tier is an optimization; a locked or broken file must not fail requests
+            self.counters["disk_errors"] += 1
+            return None
+        if row is None:
+            return None
+        value = _from_blob(row[1])
+        value.flags.writeable = False
+        return row[0], value
+
+    def _disk_put(self, key, version, value):
+        if self.path is None:
+            return
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO forecasts (key, version, value, created_at) VALUES (?, ?, ?, ?)",
+                    (key, version, _to_blob(value), time.time()),
+                )
+            self._disk_puts += 1
+            # Trimming needs a COUNT; do it every few hundred writes, not on each one
+            if self._disk_puts % 256 == 0:
+                self._trim_disk(conn)
+        except sqlite3.Error:
+            self.counters["disk_errors"] += 1
+
+    def _trim_disk(self, conn):
+        """Delete the oldest rows beyond max_disk_entries"""
+        excess = conn.execute("SELECT COUNT(*) FROM forecasts").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            with conn:
+                conn.execute(
+                    "DELETE FROM forecasts WHERE key IN "
+                    "(SELECT key FROM forecasts ORDER BY created_at LIMIT ?)", (excess,))
+            self.counters["disk_evictions"] += excess
+
+    def invalidate(self, stale_version):
+        """Drop every entry computed by `stale_version`, in memory and on disk"""
+        with self._lock:
+            stale = [key for key, (version, _) in self._entries.items() if version == stale_version]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1].nbytes
+            self.counters["invalidations"] += len(stale)
+        if self.path is not None:
+            conn = self._conn()
+            try:
+                with conn:
+                    removed = conn.execute(
+                        "DELETE FROM forecasts WHERE version = ?", (stale_version,)).rowcount
+                self.counters["invalidations"] += removed
+            except sqlite3.Error:
+                self.counters["disk_errors"] += 1
+
+    def on_model_swap(self, old, new):
+        """ModelRegistry swap listener"""
+        if old is not None:
+            self.invalidate(old.version)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.path is not None:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM forecasts")
+
+    def metrics(self, name="forecast_cache"):
+        """Counters and sizes as Prometheus text lines (a timing.add_collector callback)"""
+        stats = self.stats()
+        lines = [f"# TYPE {name}_lookups_total counter"]
+        for tier, count in (("memory", stats["hits"]), ("disk", stats["disk_hits"]), ("miss", stats["misses"])):
+            lines.append(f'{name}_lookups_total{{result="{tier}"}} {count}')
+        lines.append(f"# TYPE {name}_evictions_total counter")
+        lines.append(f"{name}_evictions_total {stats['evictions'] + stats['disk_evictions']}")
+        lines.append(f"# TYPE {name}_invalidations_total counter")
+        lines.append(f"{name}_invalidations_total {stats['invalidations']}")
+        lines.append(f"# TYPE {name}_entries gauge")
+        lines.append(f'{name}_entries{{tier="memory"}} {stats["entries"]}')
+        if stats.get("disk_entries") is not None:
+            lines.append(f'{name}_entries{{tier="disk"}} {stats["disk_entries"]}')
+        return lines
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats.update({"entries": len(self._entries), "bytes": self._bytes,
+                          "max_entries": self.max_entries, "max_bytes": self.max_bytes})
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None
+        if self.path is not None:
+            try:
+                stats["disk_entries"] = self._conn().execute("SELECT COUNT(*) FROM forecasts").fetchone()[0]
+            except sqlite3.Error:
+                stats["disk_entries"] = None
+            stats["max_disk_entries"] = self.max_disk_entries
+        return stats
@@ -0,0 +1,57 @@
+"""
+Vectorized pre/post-processing around the LSTM forward pass
+
+MinMaxScaler is an affine map per feature (x * scale_ + min_), so a whole
+batch of windows can be scaled with one broadcast instead of calling
+scaler.transform per window, and the target column can be inverse-scaled
+directly without building a dummy feature matrix.
+"""
+import numpy as np
+
+TARGET_COL = 0  # "Units Sold" is the first feature column
+
+
+def scale_features(scaler, X):
+    """Scale an array of shape (..., n_features) with a fitted MinMaxScaler"""
+    X = np.asarray(X, dtype=np.float64)
+    scaled = X * scaler.scale_ + scaler.min_
+    if getattr(scaler, "clip", False):
+        np.clip(scaled, *scaler.feature_range, out=scaled)
+    return scaled.astype(np.float32, copy=False)
+
+
+def unscale_target(scaler, y, col=TARGET_COL):
+    """Inverse-scale model outputs for the target column only"""
+    return (np.asarray(y, dtype=np.float64) - scaler.min_[col]) / scaler.scale_[col]
+
+
+def feature_columns(scaler, columns):
+    """Model input columns, in the order the scaler was fitted on"""
+    names = getattr(scaler, "feature_names_in_", None)
+    if names is not None:
+        return [str(c) for c in names]
+    return [c for c in columns if c != "Date"]
+
+
+def check_windows(entry, X):
+    """Validate a (batch, window, n_features) array against the loaded model"""
+    if X.ndim != 3:
+        raise ValueError("Sequences must be 3D (batch, window, features)")
+    if X.shape[1:] != (entry.window, entry.n_features):
+        raise ValueError(
+            f"Each sequence must have shape ({entry.window}, {entry.n_features}), "
+            f"got ({X.shape[1]}, {X.shape[2]})"
+        )
+
+
+def predict_batch(entry, sequences):
+    """Predict the next target value for every window in one forward pass.
+
+    `sequences` holds unscaled feature windows, shape (batch, window, n_features).
+    Returns a 1D float64 array of unscaled predictions.
+    """
+    X = np.asarray(sequences, dtype=np.float64)
+    check_windows(entry, X)
+    scaled = scale_features(entry.scaler, X)
+    pred_scaled = np.asarray(entry.predict(scaled)).reshape(-1)
+    return unscale_target(entry.scaler, pred_scaled)
@@ -0,0 +1,367 @@
+"""
+Chunked, incremental ingest of raw sales into daily_features.csv
+
+Replaces the raw -> daily step of notebooks/hypothesis_feature_engineering.ipynb
+(label-encode the categoricals, then groupby("Date").mean()) with a streaming
+version whose memory does not grow with the raw file:
+
+- the raw CSV is read in chunks and reduced to per-day running sums and
+  non-null counts per column, so the daily means are exact;
+- label encodings are persisted. A first run assigns codes in sorted order
+  (what LabelEncoder does); later categories are appended, so existing codes
+  never move;
+- the byte offset reached in the raw file is remembered. The next run only
+  parses rows appended since, and rewrites daily_features.csv from the
+  earliest day they touch (new days, or earlier days that got late rows).
+
+State lives next to the output as ingest_state.json (offsets, encodings) and
+ingest_state.npz (per-day sums/counts). If the raw file was edited rather
+than appended to, or the state is missing, everything is rebuilt.
+
+Usage:
+    python -m forecasting.ingest                     # data/raw/sales_data.csv
+    python -m forecasting.ingest --raw other.csv --chunksize 50000
+    python -m forecasting.ingest --full              # ignore saved state
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RAW = os.path.join(BASE_DIR, "data", "raw", "sales_data.csv")
+DEFAULT_OUT = os.path.join(BASE_DIR, "data", "processed", "daily_features.csv")
+
+FEATURES = [
+    "Inventory Level", "Units Ordered", "Price", "Discount",
+    "Promotion", "Competitor Pricing", "Epidemic", "Demand",
+]
+CATEGORICAL = ["Category", "Region", "Weather Condition", "Seasonality"]
+# Column order of daily_features.csv, as written by the notebook
+OUTPUT_COLUMNS = ["Units Sold"] + FEATURES + CATEGORICAL
+
+STATE_VERSION = 1
+# Bytes hashed at the start of the raw file and just before the saved offset,
+# to tell an appended-to file from a rewritten one
+CHECK_BYTES = 64 * 1024
+
+
+def state_paths(out_path):
+    base = os.path.join(os.path.dirname(out_path), "ingest_state")
+    return base + ".json", base + ".npz"
+
+
+def _hash_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(max(start, 0))
+        return hashlib.sha256(f.read(max(length, 0))).hexdigest()
+
+
+def _complete_end(path, size):
+    """Offset just past the last newline: a half-written last line is left for next time"""
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            start = max(pos - CHECK_BYTES, 0)
+            f.seek(start)
+            block = f.read(pos - start)
+            nl = block.rfind(b"\n")
+            if nl >= 0:
+                return start + nl + 1
+            pos = start
+    return 0
+
+
+class _BoundedReader:
+    """File-like view of bytes [start, end) of a file, for pd.read_csv"""
+
+    def __init__(self, f, start, end):
+        self._f = f
+        self._end = end
+        f.seek(start)
+
+    def read(self, n=-1):
+        remaining = self._end - self._f.tell()
+        if remaining <= 0:
+            return b""
+        return self._f.read(remaining if n is None or n < 0 else min(n, remaining))
+
+
+def iter_chunks(path, start, end, names, chunksize, usecols=None):
+    """DataFrames of the raw rows in bytes [start, end); start == 0 includes the header"""
+    import pandas as pd
+
+    with open(path, "rb") as f:
+        reader = _BoundedReader(f, start, end)
+        if start == 0:
+            chunks = pd.read_csv(reader, chunksize=chunksize, usecols=usecols)
+        else:
+            chunks = pd.read_csv(reader, chunksize=chunksize, usecols=usecols, header=None, names=names)
+        yield from chunks
+
+
+def read_header(path):
+    import pandas as pd
+
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def collect_categories(path, end, chunksize):
+    """Distinct values of each categorical column over the whole file"""
+    seen = {col: set() for col in CATEGORICAL}
+    for chunk in iter_chunks(path, 0, end, None, chunksize, usecols=CATEGORICAL):
+        for col in CATEGORICAL:
+            seen[col].update(chunk[col].dropna().unique().tolist())
+    return seen
+
+
+def extend_encodings(encodings, values):
+    """Append values without a code yet, in sorted order; existing codes never change"""
+    for col, vals in values.items():
+        classes = encodings.setdefault(col, [])
+        known = set(classes)
+        classes.extend(sorted(v for v in vals if v not in known))
+    return encodings
+
+
+def reduce_chunk(chunk, encodings):
+    """Per-day sums and non-null counts of the output columns for one raw chunk"""
+    import pandas as pd
+
+    chunk = chunk.assign(Date=pd.to_datetime(chunk["Date"], errors="coerce"))
+    extend_encodings(encodings, {col: chunk[col].dropna().unique().tolist() for col in CATEGORICAL})
+    for col in CATEGORICAL:
+        codes = {value: code for code, value in enumerate(encodings[col])}
+        chunk[col] = chunk[col].map(codes).astype(np.float64)
+    grouped = chunk.groupby("Date")[OUTPUT_COLUMNS]
+    return grouped.sum(), grouped.count()
+
+
+class DailyTotals:
+    """Running per-day sums and counts; memory is O(days x columns)"""
+
+    def __init__(self, sums=None, counts=None):
+        import pandas as pd
+
+        empty = pd.DataFrame(columns=OUTPUT_COLUMNS, dtype=np.float64, index=pd.DatetimeIndex([], name="Date"))
+        self.sums = empty if sums is None else sums
+        self.counts = empty.copy() if counts is None else counts
+
+    def add(self, sums, counts):
+        self.sums = self.sums.add(sums, fill_value=0).sort_index()
+        self.counts = self.counts.add(counts, fill_value=0).sort_index()
+
+    def means(self, start=None):
+        sums, counts = self.sums, self.counts
+        if start is not None:
+            sums, counts = sums.loc[start:], counts.loc[start:]
+        # Days with no non-null value in a column stay NaN, as with groupby().mean()
+        return sums / counts.where(counts > 0)
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            dates=self.sums.index.to_numpy(dtype="datetime64[ns]").astype(np.int64),
+            sums=self.sums.to_numpy(dtype=np.float64),
+            counts=self.counts.to_numpy(dtype=np.float64),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        import pandas as pd
+
+        with np.load(path) as data:
+            index = pd.DatetimeIndex(data["dates"].astype("datetime64[ns]"), name="Date")
+            return cls(
+                pd.DataFrame(data["sums"], index=index, columns=OUTPUT_COLUMNS),
+                pd.DataFrame(data["counts"], index=index, columns=OUTPUT_COLUMNS),
+            )
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _write_json_atomic(path, payload):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _load_state(raw_path, out_path):
+    json_path, npz_path = state_paths(out_path)
+    try:
+        with open(json_path) as f:
+            state = json.load(f)
+        totals = DailyTotals.load(npz_path)
+    except (OSError, ValueError, KeyError):
+        return None, None
+    if state.get("version") != STATE_VERSION or state["raw"]["path"] != os.path.abspath(raw_path):
+        return None, None
+    return state, totals
+
+
+def _raw_unchanged(state, raw_path, end):
+    """True when the bytes ingested last time are still the start of the raw file"""
+    raw = state["raw"]
+    offset = raw["offset"]
+    if offset > end:
+        return False
+    return (
+        _hash_range(raw_path, 0, min(CHECK_BYTES, offset)) == raw["head_sha"]
+        and _hash_range(raw_path, offset - CHECK_BYTES, min(CHECK_BYTES, offset)) == raw["tail_sha"]
+    )
+
+
+def _csv_text(means, header):
+    return means.to_csv(header=header, index_label="Date")
+
+
+def write_output(out_path, totals, start=None, truncate_at=None):
+    """Write all days (start=None) or replace the file from `truncate_at` with days >= start.
+
+    Either way the new file is assembled next to the old one and renamed into
+    place, so readers (both apps reload it on mtime) never see a partial file.
+    """
+    tmp = out_path + ".tmp"
+    if start is None:
+        with open(tmp, "w", newline="") as f:
+            f.write(_csv_text(totals.means(), header=True))
+    else:
+        with open(out_path, "rb") as src, open(tmp, "wb") as f:
+            remaining = truncate_at
+            while remaining > 0:
+                chunk = src.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                f.write(chunk)
+                remaining -= len(chunk)
+            f.write(_csv_text(totals.means(start), header=False).encode())
+    os.replace(tmp, out_path)
+
+
+def _line_offsets(out_path):
+    """Byte offset of each data line (one per day) in the output CSV"""
+    offsets = []
+    pos = 0
+    with open(out_path, "rb") as f:
+        for i, line in enumerate(f):
+            if i:
+                offsets.append(pos)
+            pos += len(line)
+    return offsets
+
+
+def ingest(raw_path=DEFAULT_RAW, out_path=DEFAULT_OUT, chunksize=100_000, full=False, columnar=True):
+    """Bring out_path up to date with raw_path; returns a summary dict"""
+    started = time.perf_counter()
+    raw_path = os.path.abspath(raw_path)
+    end = _complete_end(raw_path, os.path.getsize(raw_path))
+    header = read_header(raw_path)
+    missing = [c for c in ["Date"] + OUTPUT_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"{raw_path} is missing columns: {', '.join(missing)}")
+
+    state, totals = (None, None) if full else _load_state(raw_path, out_path)
+    incremental = state is not None and state["raw"]["columns"] == header and _raw_unchanged(state, raw_path, end)
+    encodings = dict(state["encodings"]) if state is not None else {}
+    if incremental:
+        offset = state["raw"]["offset"]
+    else:
+        # Codes for every category in the file up front, so a first run
+        # numbers them in sorted order exactly like LabelEncoder
+        extend_encodings(encodings, collect_categories(raw_path, end, chunksize))
+        offset, totals = 0, DailyTotals()
+
+    delta = DailyTotals()
+    rows = 0
+    for chunk in iter_chunks(raw_path, offset, end, header, chunksize):
+        rows += len(chunk)
+        delta.add(*reduce_chunk(chunk, encodings))
+    changed = delta.sums.index
+    old_days = totals.sums.index
+    totals.add(delta.sums, delta.counts)
+
+    output_intact = (
+        incremental
+        and state["output"]["signature"] == _file_signature(out_path)
+        and len(state["output"]["line_offsets"]) == len(old_days)
+    )
+    if not len(changed) and output_intact:
+        mode = "unchanged"
+    elif output_intact:
+        first = changed.min()
+        pos = int(old_days.searchsorted(first))
+        line_offsets = state["output"]["line_offsets"]
+        truncate_at = line_offsets[pos] if pos < len(line_offsets) else state["output"]["signature"][1]
+        write_output(out_path, totals, start=first, truncate_at=truncate_at)
+        mode = "incremental"
+    else:
+        write_output(out_path, totals)
+        mode = "full"
+
+    if mode != "unchanged" or not incremental:
+        line_offsets = _line_offsets(out_path)
+    else:
+        line_offsets = state["output"]["line_offsets"]
+
+    json_path, npz_path = state_paths(out_path)
+    totals.save(npz_path)
+    _write_json_atomic(json_path, {
+        "version": STATE_VERSION,
+        "raw": {
+            "path": raw_path,
+            "columns": header,
+            "offset": end,
+            "head_sha": _hash_range(raw_path, 0, min(CHECK_BYTES, end)),
+            "tail_sha": _hash_range(raw_path, end - CHECK_BYTES, min(CHECK_BYTES, end)),
+        },
+        "encodings": encodings,
+        "output": {"path": os.path.abspath(out_path), "signature": _file_signature(out_path), "line_offsets": line_offsets},
+    })
+
+    if columnar and mode != "unchanged":
+        from forecasting.columnar import convert
+        convert(out_path)
+
+    return {
+        "mode": mode,
+        "rows_read": rows,
+        "days_changed": int(len(changed)),
+        "days_added": int(len(changed.difference(old_days))),
+        "days_total": int(len(totals.sums)),
+        "raw_bytes_read": end - offset,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream raw sales into daily_features.csv")
+    parser.add_argument("--raw", default=DEFAULT_RAW)
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Raw rows parsed at a time")
+    parser.add_argument("--full", action="store_true", help="Ignore saved state and rebuild everything")
+    parser.add_argument("--no-columnar", action="store_true", help="Skip rebuilding the .cols/ copy")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.raw):
+        print(f"{args.raw} not found")
+        return 1
+    summary = ingest(args.raw, args.out, args.chunksize, args.full, not args.no_columnar)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
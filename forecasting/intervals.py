@@ -0,0 +1,165 @@
+"""
+Monte Carlo dropout prediction intervals
+
+The LSTM has Dropout(0.2) after its first layer. Left active at prediction
+time, dropout makes every forward pass a different draw from the model's
+predictive distribution, and the spread of K draws gives an interval around
+the point forecast.
+
+The K draws are not K predict calls: each window is repeated K times into one
+(K * batch, window, n_features) array and sent through a single forward pass
+with dropout on (each row gets its own mask), so 100 samples cost one larger
+batched pass.
+
+python -m forecasting.intervals writes lstm_forecast_intervals.csv next to
+lstm_forecast_results.csv: for each of its dates, the mean, median and
+central interval of the one-step forecast from the preceding window of
+daily_features. The dashboards draw it as a band around the forecast.
+
+Usage:
+    python -m forecasting.intervals                      # 100 samples, 90% interval
+    python -m forecasting.intervals --samples 200 --level 0.8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from forecasting.inference import check_windows, feature_columns, scale_features, unscale_target
+from forecasting.windows import windows
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(BASE_DIR, "data", "processed")
+DEFAULT_MODEL_DIR = os.path.join(BASE_DIR, "models")
+INTERVALS_CSV = "lstm_forecast_intervals.csv"
+
+# Order of the values mc_dropout returns per window
+FIELDS = ("mean", "std", "lower", "median", "upper")
+
+
+def mc_dropout(entry, sequences, samples=100, level=0.9, batch_size=4096, rng=None):
+    """Interval forecasts for unscaled windows of shape (batch, window, n_features).
+
+    Returns {field: (batch,) array} for FIELDS, unscaled; lower/upper bound the
+    central `level` interval of the `samples` draws. A forward pass holds at
+    most max(batch_size, samples) rows.
+    """
+    X = np.asarray(sequences, dtype=np.float64)
+    check_windows(entry, X)
+    if samples < 2:
+        raise ValueError("samples must be at least 2")
+    if not 0 < level < 1:
+        raise ValueError("level must be between 0 and 1")
+    if not entry.dropout_rates():
+        raise ValueError("The model has no Dropout layers to sample from")
+
+    scaled = scale_features(entry.scaler, X)
+    per_pass = max(1, batch_size // samples)
+    draws = np.empty((samples, len(scaled)), dtype=np.float32)
+    for start in range(0, len(scaled), per_pass):
+        chunk = scaled[start:start + per_pass]
+        # Sample-major: rows [k * len(chunk), (k + 1) * len(chunk)) are draw k of every window
+        stacked = np.broadcast_to(chunk, (samples,) + chunk.shape).reshape((-1,) + chunk.shape[1:])
+        draws[:, start:start + len(chunk)] = np.asarray(entry.sample(stacked, rng)).reshape(samples, len(chunk))
+
+    draws = unscale_target(entry.scaler, draws)
+    tail = (1 - level) / 2
+    lower, median, upper = np.quantile(draws, [tail, 0.5, 1 - tail], axis=0)
+    return {"mean": draws.mean(axis=0), "std": draws.std(axis=0), "lower": lower, "median": median, "upper": upper}
+
+
+def forecast_intervals(entry, df, dates, samples=100, level=0.9, batch_size=4096, seed=None):
+    """One-step intervals for each of `dates` from the preceding window of a daily_features frame.
+
+    Dates without a full window of history before them are left out.
+    """
+    import pandas as pd
+
+    cols = feature_columns(entry.scaler, df.columns)
+    X = df[cols].to_numpy(dtype=np.float64)
+    all_dates = df["Date"].to_numpy(dtype="datetime64[ns]")
+    wanted = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+    idx = np.searchsorted(all_dates, wanted)
+    found = (idx < len(all_dates)) & (all_dates[np.minimum(idx, len(all_dates) - 1)] == wanted)
+    idx = idx[found & (idx >= entry.window)]
+    if not len(idx):
+        raise ValueError(f"No date has {entry.window} days of history before it")
+
+    bands = mc_dropout(entry, windows(X, entry.window)[idx - entry.window], samples, level, batch_size,
+                       np.random.default_rng(seed))
+    return pd.DataFrame({
+        "Date": pd.to_datetime(all_dates[idx]).strftime("%Y-%m-%d"),
+        "Mean Units Sold": bands["mean"],
+        "Lower Units Sold": bands["lower"],
+        "Median Units Sold": bands["median"],
+        "Upper Units Sold": bands["upper"],
+        "Interval Level": level,
+    })
+
+
+def band_label(df):
+    """Legend text for a band drawn from lstm_forecast_intervals.csv"""
+    if "Interval Level" in df.columns and len(df):
+        return f"{float(df['Interval Level'].iloc[0]):.0%} interval"
+    return "Interval"
+
+
+def main(argv=None):
+    from forecasting.backtest import default_first_origin
+    from forecasting.datasets import DATASETS, read_dataset
+    from forecasting.model_registry import ModelRegistry, ModelUnavailableError
+
+    parser = argparse.ArgumentParser(description="Monte Carlo dropout intervals for the LSTM forecast")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--backend", default="auto", choices=["auto", "numpy", "keras"])
+    parser.add_argument("--samples", type=int, default=100, help="Stochastic forward passes per date")
+    parser.add_argument("--level", type=float, default=0.9, help="Coverage of the central interval")
+    parser.add_argument("--batch-size", type=int, default=4096, help="Rows per forward pass")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--out-dir", help="Where to write the CSV (default: --data-dir)")
+    args = parser.parse_args(argv)
+
+    csv_path = os.path.join(args.data_dir, "daily_features.csv")
+    if not os.path.exists(csv_path):
+        print(f"{csv_path} not found")
+        return 1
+    try:
+        entry = ModelRegistry(args.model_dir, backend=args.backend).get()
+    except ModelUnavailableError as e:
+        print(f"Model unavailable: {e}")
+        return 1
+    df = read_dataset(csv_path, ["Date"])
+    # The dates of lstm_forecast_results.csv, or the notebook's 20% test split without it
+    results_name, results_dates = DATASETS["forecast_results"]
+    results_path = os.path.join(args.data_dir, results_name)
+    if os.path.exists(results_path):
+        dates = read_dataset(results_path, results_dates, ["Date"])["Date"]
+    else:
+        dates = df["Date"].iloc[default_first_origin(len(df)):]
+
+    began = time.perf_counter()
+    try:
+        out = forecast_intervals(entry, df, dates, args.samples, args.level, args.batch_size, args.seed)
+    except ValueError as e:
+        print(e)
+        return 1
+    out_dir = args.out_dir or args.data_dir
+    os.makedirs(out_dir, exist_ok=True)
+    out.to_csv(os.path.join(out_dir, INTERVALS_CSV), index=False)
+    print(json.dumps({
+        "model_version": entry.version,
+        "dates": len(out),
+        "samples": args.samples,
+        "level": args.level,
+        "mean_width": round(float((out["Upper Units Sold"] - out["Lower Units Sold"]).mean()), 4),
+        "seconds": round(time.perf_counter() - began, 3),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""
+Background job queue for long-running forecasting work
+
+Multi-horizon forecasts, backtests and training runs take seconds to minutes,
+too long to hold a request open. They are submitted as jobs instead:
+
+    job_id = jobs.submit("forecast", {"horizon": 90}, owner=user_id)
+    jobs.get(job_id)      # {"state": "running", "progress": 0.4, ...}
+    jobs.result(job_id)   # the handler's return value once "done"
+
+Jobs are recorded in a small SQLite table (jobs.db next to users.db) and run
+on a bounded thread pool inside the worker, so they share the worker's loaded
+model and dataset caches. A job is queued -> running -> done / error /
+cancelled. Queued jobs are cancelled outright; running ones are asked to stop
+and do so at their next ctx.check(). The table is shared by all workers, so
+any worker can report on or cancel a job that another one is running. Finished jobs are purged after
+`retention_seconds`, and at most `max_finished` of them are kept.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    worker TEXT,
+    params TEXT NOT NULL,
+    state TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, finished_at);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, submitted_at);
+"""
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by submit() when max_pending jobs are already queued or running"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler by ctx.check() once the job has been cancelled"""
+
+
+class JobStore:
+    """The jobs table. Each call opens its own connection, so any thread may use it."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, args=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, args).rowcount
+        finally:
+            conn.close()
+
+    def _query(self, sql, args=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, args).fetchall()
+        finally:
+            conn.close()
+
+    def insert(self, job_id, kind, params, owner, worker):
+        self._execute(
+            "INSERT INTO jobs (id, kind, owner, worker, params, state, submitted_at) "
+            "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+            (job_id, kind, owner, worker, json.dumps(params), time.time()),
+        )
+
+    def update(self, job_id, only_if_state=None, **fields):
+        """Set columns of one job; with only_if_state, only while it is in that state.
+
+        Returns True when a row was updated.
+        """
+        sets = ", ".join(f"{name} = ?" for name in fields)
+        sql, args = f"UPDATE jobs SET {sets} WHERE id = ?", list(fields.values()) + [job_id]
+        if only_if_state is not None:
+            sql += " AND state = ?"
+            args.append(only_if_state)
+        return self._execute(sql, args) > 0
+
+    def get(self, job_id):
+        rows = self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return dict(rows[0]) if rows else None
+
+    def list(self, owner=None, limit=50):
+        if owner is None:
+            rows = self._query("SELECT * FROM jobs ORDER BY submitted_at DESC LIMIT ?", (limit,))
+        else:
+            rows = self._query(
+                "SELECT * FROM jobs WHERE owner = ? ORDER BY submitted_at DESC LIMIT ?", (owner, limit))
+        return [dict(row) for row in rows]
+
+    def counts(self):
+        return {row["state"]: row["n"] for row in self._query("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state")}
+
+    def fail_interrupted(self, is_alive):
+        """Mark queued/running jobs whose worker is gone (is_alive(worker) is False) as failed"""
+        dead = [
+            row["id"] for row in self._query("SELECT id, worker FROM jobs WHERE state IN ('queued', 'running')")
+            if not is_alive(row["worker"])
+        ]
+        for job_id in dead:
+            self._execute(
+                "UPDATE jobs SET state = 'error', error = 'Interrupted by a worker restart', finished_at = ? "
+                "WHERE id = ? AND state IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+        return len(dead)
+
+    def purge(self, older_than, keep):
+        """Delete finished jobs finished before `older_than`, then all but the newest `keep`"""
+        removed = self._execute(
+            "DELETE FROM jobs WHERE state IN ('done', 'error', 'cancelled') AND finished_at < ?",
+            (older_than,),
+        )
+        removed += self._execute(
+            "DELETE FROM jobs WHERE state IN ('done', 'error', 'cancelled') AND id NOT IN ("
+            "SELECT id FROM jobs WHERE state IN ('done', 'error', 'cancelled') "
+            "ORDER BY finished_at DESC LIMIT ?)",
+            (keep,),
+        )
+        return removed
+
+
+def worker_id():
+    """This process as recorded in job tables: host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def local_worker_alive(worker):
+    """Whether `worker` (host:pid) is still running; workers on other hosts are assumed alive"""
+    host, _, pid = (worker or "").rpartition(":")
+    if host != socket.gethostname():
+        return bool(host)
+    if not pid.isdigit() or int(pid) == os.getpid():
+        # Same pid, new process (e.g. a container restart): this queue has no jobs yet
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobContext:
+    """Handed to a running handler: cancellation checks and progress reports"""
+
+    # How often check() looks for a cancel request made through another worker
+    POLL_SECONDS = 1.0
+
+    def __init__(self, job_id, store, cancel_event):
+        self.job_id = job_id
+        self._store = store
+        self._cancel = cancel_event
+        self._polled = time.monotonic()
+
+    @property
+    def cancelled(self):
+        if not self._cancel.is_set() and time.monotonic() - self._polled >= self.POLL_SECONDS:
+            self._polled = time.monotonic()
+            job = self._store.get(self.job_id)
+            if job is None or job["cancel_requested"]:
+                self._cancel.set()
+        return self._cancel.is_set()
+
+    def check(self):
+        """Raise JobCancelled if the job has been cancelled; call between units of work"""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, fraction, message=None):
+        self._store.update(self.job_id, progress=min(max(float(fraction), 0.0), 1.0), message=message)
+
+
+class JobQueue:
+    """Runs registered job kinds on a bounded thread pool, tracked in a JobStore.
+
+    Handlers are `handler(params, ctx)` and return something JSON-serializable.
+    A ValueError from a handler is reported as the job's error message, as the
+    endpoints do for bad input. An optional `validate(params)` runs in submit()
+    so bad parameters are rejected before anything is queued.
+    """
+
+    def __init__(self, store, max_workers=2, max_pending=32, retention_seconds=24 * 3600, max_finished=500):
+        self.store = store
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        self.handlers = {}
+        self.validators = {}
+        self._executor = None
+        self._futures = {}          # job id -> Future, while queued or running
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+        self.worker = worker_id()
+        # Jobs of a worker that has exited will never finish
+        interrupted = store.fail_interrupted(local_worker_alive)
+        if interrupted:
+            logger.warning("Marked %d interrupted job(s) as failed", interrupted)
+
+    def register(self, kind, handler, validate=None):
+        self.handlers[kind] = handler
+        if validate is not None:
+            self.validators[kind] = validate
+        return handler
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            return self._executor
+
+    def submit(self, kind, params=None, owner=None):
+        """Queue a job and return its id"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        params = params or {}
+        if kind in self.validators:
+            self.validators[kind](params)
+        self.purge()
+        pool = self._pool()
+        with self._lock:
+            if len(self._futures) >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} jobs already queued or running")
+            job_id = uuid.uuid4().hex
+            self.store.insert(job_id, kind, params, None if owner is None else str(owner), self.worker)
+            self._cancel_events[job_id] = threading.Event()
+            self._futures[job_id] = pool.submit(self._run, job_id, kind, params)
+        return job_id
+
+    def _run(self, job_id, kind, params):
+        cancel = self._cancel_events[job_id]
+        try:
+            if cancel.is_set() or not self.store.update(
+                    job_id, only_if_state="queued", state="running", started_at=time.time()):
+                return
+            try:
+                result = self.handlers[kind](params, JobContext(job_id, self.store, cancel))
+                self.store.update(job_id, state="done", progress=1.0, result=json.dumps(result),
+                                  finished_at=time.time())
+            except JobCancelled:
+                self.store.update(job_id, state="cancelled", finished_at=time.time())
+            except ValueError as e:
+                self.store.update(job_id, state="error", error=str(e), finished_at=time.time())
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                self.store.update(job_id, state="error", error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. Returns the job's state afterwards, or None if unknown."""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+            if event is not None:
+                event.set()
+        # A queued job is cancelled here; a running one stops at its next check(),
+        # which also sees the flag when the job runs in another worker
+        self.store.update(job_id, only_if_state="queued", state="cancelled", finished_at=time.time())
+        self.store.update(job_id, only_if_state="running", cancel_requested=1)
+        job = self.store.get(job_id)
+        return job["state"] if job else None
+
+    def get(self, job_id):
+        """Job status without its result, or None"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        return self._public(job)
+
+    def result(self, job_id):
+        """(status, result); result is None until the job is done"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None, None
+        result = json.loads(job["result"]) if job["state"] == "done" and job["result"] is not None else None
+        return self._public(job), result
+
+    def list(self, owner=None, limit=50):
+        return [self._public(job) for job in self.store.list(None if owner is None else str(owner), limit)]
+
+    @staticmethod
+    def _public(job):
+        # Params are left out: a scoring job's input can be megabytes
+        status = {key: job[key] for key in (
+            "id", "kind", "owner", "state", "progress", "message", "error",
+            "submitted_at", "started_at", "finished_at")}
+        status["cancel_requested"] = bool(job["cancel_requested"])
+        if job["finished_at"] is not None and job["started_at"] is not None:
+            status["run_seconds"] = round(job["finished_at"] - job["started_at"], 3)
+        return status
+
+    def purge(self):
+        return self.store.purge(time.time() - self.retention_seconds, self.max_finished)
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._futures)
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "retention_seconds": self.retention_seconds,
+            "max_finished": self.max_finished,
+            "states": self.store.counts(),
+            "kinds": sorted(self.handlers),
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            for event in self._cancel_events.values():
+                event.set()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
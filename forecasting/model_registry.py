@@ -0,0 +1,293 @@
+"""
+Process-wide model registry
+
+Loads the LSTM model and its MinMax scaler once per worker process and hands
+the same loaded objects to every request. An optional watcher thread polls the
+versioned model store (see model_store.py) and swaps in new versions.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+
+from forecasting import model_store
+from forecasting.model_store import MODEL_FILE, SCALER_FILE
+from forecasting.numpy_lstm import engine_path_for
+
+logger = logging.getLogger(__name__)
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when the model cannot be loaded (missing files or libraries)"""
+
+
+def _rss_bytes():
+    """Resident set size of this process in bytes, or None if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is a peak value in KiB on Linux; good enough as a fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return None
+
+
+def _file_version(*paths):
+    """Short content hash of the given files, used as the model version"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class LoadedModel:
+    """A loaded model/scaler pair plus metadata about the load"""
+
+    def __init__(self, model, scaler, version, model_path, load_seconds, memory_bytes, backend="keras"):
+        self.model = model
+        self.backend = backend
+        self.scaler = scaler
+        self.version = version
+        self.model_path = model_path
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.loaded_at = time.time()
+        self.window, self.n_features = model.input_shape[1], model.input_shape[2]
+
+    def predict(self, X):
+        """Run a forward pass on an already-scaled (batch, window, features) array"""
+        # predict_on_batch reuses the predict function Keras traced at load time
+        # and skips the callback/data-adapter setup that model.predict does per call
+        return self.model.predict_on_batch(X)
+
+    def sample(self, X, rng=None):
+        """Forward pass with dropout active (Monte Carlo dropout); every row gets its own mask"""
+        if self.backend == "numpy":
+            return self.model(X, training=True, rng=rng)
+        return self.model(X, training=True).numpy()
+
+    def dropout_rates(self):
+        """Rates of the model's Dropout layers, in order"""
+        if self.backend == "numpy":
+            return [layer["rate"] for layer in self.model.layers if layer["type"] == "dropout"]
+        return [layer.rate for layer in self.model.layers if type(layer).__name__ == "Dropout"]
+
+    def info(self):
+        return {
+            "version": self.version,
+            "backend": self.backend,
+            "model_path": self.model_path,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_bytes": self.memory_bytes,
+            "input_shape": [self.window, self.n_features],
+        }
+
+
+class ModelRegistry:
+    """Loads the active model version on first use and serves it to all threads.
+
+    `backend` is "numpy" (exported .npz engine, no TensorFlow), "keras", or
+    "auto" which prefers the .npz when one sits next to the .keras file.
+
+    Requests grab a reference to the current LoadedModel and keep using it even
+    if a newer version is swapped in meanwhile; an old version is freed as soon
+    as the last request holding it finishes.
+    """
+
+    def __init__(self, model_dir, model_file=MODEL_FILE, scaler_file=SCALER_FILE, backend="auto"):
+        if backend not in ("auto", "numpy", "keras"):
+            raise ValueError(f"Unknown model backend: {backend}")
+        self.model_dir = model_dir
+        self.backend = backend
+        self.model_file = model_file
+        self.scaler_file = scaler_file
+        self._current = None
+        self._lock = threading.Lock()
+        self._last_error = None
+        self._retired = weakref.WeakValueDictionary()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._swap_listeners = []
+        self.swaps = 0
+
+    def add_swap_listener(self, listener):
+        """Call listener(old, new) whenever a version goes live; old is None on the first load"""
+        self._swap_listeners.append(listener)
+
+    def _notify_swap(self, old, new):
+        for listener in self._swap_listeners:
+            try:
+                listener(old, new)
+            except Exception:
+                logger.exception("Model swap listener %r failed", listener)
+
+    def get(self):
+        """Return the loaded model, loading it on the first call"""
+        # Fast path: a plain attribute read. Once loaded, concurrent requests
+        # never touch the lock.
+        entry = self._current
+        if entry is not None:
+            return entry
+        with self._lock:
+            if self._current is not None:
+                return self._current
+            entry = self._current = self._load(*self._resolve())
+        self._notify_swap(None, entry)
+        return entry
+
+    def _resolve(self):
+        """(version, model_path, scaler_path, engine_path) of the version that should be live"""
+        active = model_store.resolve_active(self.model_dir)
+        if active is not None:
+            return active.version, active.model_path, active.scaler_path, active.engine_path
+        model_path = os.path.join(self.model_dir, self.model_file)
+        scaler_path = os.path.join(self.model_dir, self.scaler_file)
+        engine_path = engine_path_for(model_path)
+        # Hash every artifact a backend may load, so replacing only the engine or
+        # the scaler still changes the version (and invalidates cached forecasts)
+        existing = [path for path in (model_path, engine_path, scaler_path) if os.path.exists(path)]
+        version = _file_version(*existing) if existing else None
+        return version, model_path, scaler_path, engine_path
+
+    def _load(self, version, model_path, scaler_path, engine_path):
+        if self.backend != "keras" and os.path.exists(engine_path):
+            return self._load_numpy(version, engine_path, scaler_path)
+        if self.backend == "numpy":
+            self._last_error = "NumPy engine file not found"
+            raise ModelUnavailableError("NumPy engine file not found")
+        return self._load_keras(version, model_path, scaler_path)
+
+    def _load_numpy(self, version, engine_path, scaler_path):
+        import numpy as np
+        from forecasting.numpy_lstm import NumpyLSTMModel
+
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        model, scaler = NumpyLSTMModel.load(engine_path)
+        if scaler is None:
+            # Engine exported without scaler params; fall back to the pickle
+            try:
+                import joblib
+            except ImportError as e:
+                raise ModelUnavailableError("joblib not installed") from e
+            if not os.path.exists(scaler_path):
+                raise ModelUnavailableError("Model files not found")
+            scaler = joblib.load(scaler_path)
+        entry = LoadedModel(
+            model, scaler,
+            version=version or _file_version(engine_path),
+            model_path=engine_path,
+            load_seconds=0.0,
+            memory_bytes=None,
+            backend="numpy",
+        )
+        entry.predict(np.zeros((1, entry.window, entry.n_features), dtype="float32"))
+        entry.load_seconds = time.perf_counter() - start
+        rss_after = _rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            entry.memory_bytes = max(rss_after - rss_before, 0)
+        self._last_error = None
+        return entry
+
+    def _load_keras(self, version, model_path, scaler_path):
+        try:
+            import joblib
+            import numpy as np
+            from tensorflow.keras.models import load_model
+        except ImportError as e:
+            self._last_error = str(e)
+            raise ModelUnavailableError("TensorFlow/joblib not installed") from e
+
+        if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+            self._last_error = "Model files not found"
+            raise ModelUnavailableError("Model files not found")
+
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        scaler = joblib.load(scaler_path)
+        model = load_model(model_path)
+        entry = LoadedModel(
+            model, scaler,
+            version=version,
+            model_path=model_path,
+            load_seconds=0.0,
+            memory_bytes=None,
+        )
+        # Trace the predict function now so the first request doesn't pay for it
+        entry.predict(np.zeros((1, entry.window, entry.n_features), dtype="float32"))
+        entry.load_seconds = time.perf_counter() - start
+        rss_after = _rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            entry.memory_bytes = max(rss_after - rss_before, 0)
+        self._last_error = None
+        return entry
+
+    def reload_if_changed(self):
+        """Load and swap in the active version if it differs from the live one.
+
+        The new model is loaded and warmed up before the swap, so requests
+        never wait on a load. Returns True if a swap happened.
+        """
+        current = self._current
+        if current is None:
+            # Nothing served yet; the first get() picks up the active version
+            return False
+        version, model_path, scaler_path, engine_path = self._resolve()
+        if version is None or version == current.version:
+            return False
+        try:
+            entry = self._load(version, model_path, scaler_path, engine_path)
+        except Exception as e:
+            self._last_error = f"Reload of {version} failed: {e}"
+            logger.exception("Model reload failed for version %s", version)
+            return False
+        with self._lock:
+            old, self._current = self._current, entry
+            self.swaps += 1
+        if old is not None:
+            self._retired[old.version] = old
+        logger.info("Swapped model %s -> %s", old.version if old else None, version)
+        self._notify_swap(old, entry)
+        return True
+
+    def start_watcher(self, interval=30.0):
+        """Poll the model store every `interval` seconds in a daemon thread"""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def _watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception:
+                    logger.exception("Model watcher iteration failed")
+
+        self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        self._watcher = None
+
+    def status(self):
+        entry = self._current
+        return {
+            "loaded": entry is not None,
+            "model": entry.info() if entry is not None else None,
+            "available_versions": model_store.list_versions(self.model_dir),
+            "retired_versions_in_use": sorted(self._retired.keys()),
+            "swaps": self.swaps,
+            "watching": self._watcher is not None,
+            "last_error": self._last_error,
+            "process_rss_bytes": _rss_bytes(),
+        }
@@ -0,0 +1,180 @@
+"""
+Versioned model store
+
+Layout under models/:
+
+    models/
+      CURRENT                     <- optional, names the active version
+      20261018T120000/
+        manifest.json             <- {"version", "model", "scaler", "created_at", ...}
+        lstm_units_sold_model.keras
+        minmax_scaler.pkl
+
+Without a CURRENT file the newest version (by name) is active. If no version
+directories exist, the legacy flat pair models/lstm_units_sold_model.keras +
+models/minmax_scaler.pkl is used.
+
+Usage:
+    python -m forecasting.model_store list
+    python -m forecasting.model_store publish path/to/model.keras path/to/scaler.pkl
+    python -m forecasting.model_store activate <version>
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+MANIFEST = "manifest.json"
+CURRENT = "CURRENT"
+MODEL_FILE = "lstm_units_sold_model.keras"
+SCALER_FILE = "minmax_scaler.pkl"
+
+
+class ModelVersion:
+    """Where one version's artifacts live on disk"""
+
+    def __init__(self, version, path, manifest):
+        self.version = version
+        self.path = path
+        self.manifest = manifest
+
+    def file(self, key, default):
+        return os.path.join(self.path, self.manifest.get(key, default))
+
+    @property
+    def model_path(self):
+        return self.file("model", MODEL_FILE)
+
+    @property
+    def scaler_path(self):
+        return self.file("scaler", SCALER_FILE)
+
+    @property
+    def engine_path(self):
+        """Exported NumPy engine: the manifest's "engine", else the .npz next to the model"""
+        return self.file("engine", os.path.basename(os.path.splitext(self.model_path)[0] + ".npz"))
+
+
+def read_manifest(version_dir):
+    with open(os.path.join(version_dir, MANIFEST)) as f:
+        return json.load(f)
+
+
+def list_versions(model_dir):
+    """Names of all complete versions (those with a manifest), oldest first"""
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(model_dir)
+        if not name.startswith(".") and os.path.isfile(os.path.join(model_dir, name, MANIFEST))
+    )
+
+
+def get_version(model_dir, version):
+    path = os.path.join(model_dir, version)
+    return ModelVersion(version, path, read_manifest(path))
+
+
+def resolve_active(model_dir):
+    """Return the active ModelVersion, or None if the store has no versions"""
+    pointer = os.path.join(model_dir, CURRENT)
+    if os.path.isfile(pointer):
+        with open(pointer) as f:
+            version = f.read().strip()
+        if version and os.path.isfile(os.path.join(model_dir, version, MANIFEST)):
+            return get_version(model_dir, version)
+    versions = list_versions(model_dir)
+    if versions:
+        return get_version(model_dir, versions[-1])
+    return None
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def activate(model_dir, version):
+    """Point CURRENT at an existing version"""
+    if not os.path.isfile(os.path.join(model_dir, version, MANIFEST)):
+        raise ValueError(f"Unknown model version: {version}")
+    _write_atomic(os.path.join(model_dir, CURRENT), version + "\n")
+
+
+def publish(model_dir, model_src, scaler_src, version=None, metadata=None, make_active=True):
+    """Copy a model/scaler pair into a new version directory.
+
+    The version directory is assembled under a hidden temporary name and
+    renamed into place, so watchers never see a half-written version.
+    """
+    version = version or time.strftime("%Y%m%dT%H%M%S")
+    final_dir = os.path.join(model_dir, version)
+    if os.path.exists(final_dir):
+        raise ValueError(f"Model version already exists: {version}")
+
+    tmp_dir = os.path.join(model_dir, f".tmp-{version}-{os.getpid()}")
+    os.makedirs(tmp_dir)
+    try:
+        manifest = dict(metadata or {})
+        for key, src in (("model", model_src), ("scaler", scaler_src)):
+            name = os.path.basename(src)
+            copy = shutil.copytree if os.path.isdir(src) else shutil.copy2
+            copy(src, os.path.join(tmp_dir, name))
+            manifest[key] = name
+        # Ship the exported NumPy engine along with the model when present
+        engine_src = os.path.splitext(model_src)[0] + ".npz"
+        if os.path.isfile(engine_src):
+            shutil.copy2(engine_src, os.path.join(tmp_dir, os.path.basename(engine_src)))
+            manifest["engine"] = os.path.basename(engine_src)
+        manifest["version"] = version
+        manifest["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(tmp_dir, final_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if make_active:
+        activate(model_dir, version)
+    return get_version(model_dir, version)
+
+
+def main(argv=None):
+    default_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts")
+    parser.add_argument("--model-dir", default=default_dir)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List versions and show the active one")
+    p_pub = sub.add_parser("publish", help="Publish a model/scaler pair as a new version")
+    p_pub.add_argument("model")
+    p_pub.add_argument("scaler")
+    p_pub.add_argument("--version")
+    p_pub.add_argument("--no-activate", action="store_true")
+    p_act = sub.add_parser("activate", help="Make an existing version active")
+    p_act.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        active = resolve_active(args.model_dir)
+        for v in list_versions(args.model_dir):
+            marker = "*" if active and active.version == v else " "
+            print(f"{marker} {v}")
+        if active is None:
+            print("(no versions; using legacy flat model files)")
+    elif args.command == "publish":
+        mv = publish(args.model_dir, args.model, args.scaler,
+                     version=args.version, make_active=not args.no_activate)
+        print(f"Published {mv.version} -> {mv.path}")
+    elif args.command == "activate":
+        activate(args.model_dir, args.version)
+        print(f"Active version: {args.version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+TensorFlow-free inference for the stacked LSTM model
+
+`export` pulls the weights of a Keras Sequential LSTM/Dropout/Dense model and
+the MinMax scaler parameters into one compact .npz. `NumpyLSTMModel` runs the
+same forward pass in float32 NumPy, so serving needs neither TensorFlow nor
+scikit-learn.
+
+Usage (needs TensorFlow, only at export time):
+    python -m forecasting.numpy_lstm export models/lstm_units_sold_model.keras --check
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ENGINE_SUFFIX = ".npz"
+
+
+def engine_path_for(model_path):
+    """Default .npz location for a .keras model file"""
+    return os.path.splitext(model_path)[0] + ENGINE_SUFFIX
+
+
+def _sigmoid(x):
+    # tanh form avoids overflow warnings in exp for large |x|
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+class ScalerParams:
+    """The parts of a fitted MinMaxScaler that inference needs"""
+
+    def __init__(self, scale, min_, feature_names=None, feature_range=(0.0, 1.0), clip=False):
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.min_ = np.asarray(min_, dtype=np.float64)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object) if feature_names is not None else None
+        self.feature_range = tuple(feature_range)
+        self.clip = bool(clip)
+        self.n_features_in_ = len(self.scale_)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64) * self.scale_ + self.min_
+        if self.clip:
+            np.clip(X, *self.feature_range, out=X)
+        return X
+
+    def inverse_transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.min_) / self.scale_
+
+
+class NumpyLSTMModel:
+    """Float32 NumPy forward pass for LSTM/Dropout/Dense stacks.
+
+    Exposes `input_shape` and `predict_on_batch` like a Keras model so it can
+    be served through the model registry unchanged.
+    """
+
+    def __init__(self, layers, input_shape):
+        self.layers = layers
+        self.input_shape = tuple(input_shape)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            spec = json.loads(str(data["spec"]))
+            layers = []
+            for i, layer in enumerate(spec["layers"]):
+                layer = dict(layer)
+                for key in ("kernel", "recurrent", "bias"):
+                    name = f"{i}_{key}"
+                    if name in data:
+                        layer[key] = data[name].astype(np.float32)
+                layers.append(layer)
+            scaler = None
+            if "scaler_scale" in data:
+                names = data["scaler_features"].tolist() if "scaler_features" in data else None
+                scaler = ScalerParams(
+                    data["scaler_scale"], data["scaler_min"], names,
+                    spec.get("scaler_feature_range", (0.0, 1.0)),
+                    spec.get("scaler_clip", False),
+                )
+        return cls(layers, [None] + spec["input_shape"]), scaler
+
+    @staticmethod
+    def _lstm(x, layer):
+        batch, steps, _ = x.shape
+        units = layer["units"]
+        # All input projections for every timestep in one matmul; only the
+        # recurrent h @ U product has to stay inside the time loop.
+        xw = (x.reshape(batch * steps, -1) @ layer["kernel"] + layer["bias"]).reshape(batch, steps, 4 * units)
+        recurrent = layer["recurrent"]
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        seq = np.empty((batch, steps, units), dtype=np.float32) if layer.get("return_sequences") else None
+        for t in range(steps):
+            z = xw[:, t] + h @ recurrent
+            # Keras gate order: input, forget, cell candidate, output
+            i = _sigmoid(z[:, :units])
+            f = _sigmoid(z[:, units:2 * units])
+            g = np.tanh(z[:, 2 * units:3 * units])
+            o = _sigmoid(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+            if seq is not None:
+                seq[:, t] = h
+        return seq if seq is not None else h
+
+    def __call__(self, X, training=False, rng=None):
+        """Forward pass. With training=True, dropout layers are active."""
+        x = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            kind = layer["type"]
+            if kind == "lstm":
+                x = self._lstm(x, layer)
+            elif kind == "dense":
+                x = x @ layer["kernel"] + layer["bias"]
+                if layer.get("activation", "linear") == "relu":
+                    x = np.maximum(x, 0)
+            elif kind == "dropout" and training:
+                rate = layer["rate"]
+                rng = rng if rng is not None else np.random.default_rng()
+                keep = rng.random(x.shape, dtype=np.float32) >= rate
+                x = x * keep / np.float32(1.0 - rate)
+        return x
+
+    def predict_on_batch(self, X):
+        return self(X)
+
+
+def export(model_path, out_path=None, scaler_path=None):
+    """Write the weights of a saved Keras model (and scaler) to an .npz"""
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path)
+    out_path = out_path or engine_path_for(model_path)
+    spec = {"input_shape": list(model.input_shape[1:]), "layers": []}
+    arrays = {}
+    for i, layer in enumerate(model.layers):
+        kind = type(layer).__name__
+        config = layer.get_config()
+        if kind == "LSTM":
+            if config.get("activation") != "tanh" or config.get("recurrent_activation") != "sigmoid":
+                raise ValueError(f"Unsupported LSTM activations in layer {layer.name}")
+            kernel, recurrent, bias = layer.get_weights()
+            spec["layers"].append({
+                "type": "lstm",
+                "units": config["units"],
+                "return_sequences": config["return_sequences"],
+            })
+            arrays.update({f"{i}_kernel": kernel, f"{i}_recurrent": recurrent, f"{i}_bias": bias})
+        elif kind == "Dense":
+            if config.get("activation") not in ("linear", "relu"):
+                raise ValueError(f"Unsupported Dense activation in layer {layer.name}")
+            kernel, bias = layer.get_weights()
+            spec["layers"].append({"type": "dense", "activation": config["activation"]})
+            arrays.update({f"{i}_kernel": kernel, f"{i}_bias": bias})
+        elif kind == "Dropout":
+            spec["layers"].append({"type": "dropout", "rate": config["rate"]})
+        else:
+            raise ValueError(f"Unsupported layer type: {kind}")
+
+    if scaler_path and os.path.exists(scaler_path):
+        import joblib
+        scaler = joblib.load(scaler_path)
+        arrays["scaler_scale"] = scaler.scale_
+        arrays["scaler_min"] = scaler.min_
+        if getattr(scaler, "feature_names_in_", None) is not None:
+            arrays["scaler_features"] = np.asarray(scaler.feature_names_in_, dtype=str)
+        spec["scaler_feature_range"] = list(scaler.feature_range)
+        spec["scaler_clip"] = bool(getattr(scaler, "clip", False))
+
+    arrays = {k: np.asarray(v, dtype=np.float32) if k[0].isdigit() else v for k, v in arrays.items()}
+    np.savez_compressed(out_path, spec=np.asarray(json.dumps(spec)), **arrays)
+    return out_path, model
+
+
+def check_parity(keras_model, engine, samples=256, seed=0, windows=None):
+    """Largest absolute difference between Keras and NumPy predictions"""
+    rng = np.random.default_rng(seed)
+    _, steps, features = keras_model.input_shape
+    X = rng.random((samples, steps, features), dtype=np.float32)
+    if windows is not None:
+        X = np.concatenate([X, windows.astype(np.float32)])
+    expected = np.asarray(keras_model.predict_on_batch(X))
+    actual = engine.predict_on_batch(X)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the LSTM model for NumPy inference")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_exp = sub.add_parser("export", help="Write weights + scaler params to .npz")
+    p_exp.add_argument("model", help="Path to the .keras model")
+    p_exp.add_argument("--scaler", help="Path to the scaler .pkl (default: minmax_scaler.pkl next to the model)")
+    p_exp.add_argument("--out", help="Output .npz (default: next to the model)")
+    p_exp.add_argument("--check", action="store_true", help="Compare against Keras after export")
+    p_exp.add_argument("--data", help="daily_features.csv used for real windows in the parity check")
+    p_exp.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    scaler_path = args.scaler or os.path.join(os.path.dirname(args.model), "minmax_scaler.pkl")
+    out_path, keras_model = export(args.model, args.out, scaler_path)
+    print(f"Exported {args.model} -> {out_path} ({os.path.getsize(out_path)} bytes)")
+
+    if args.check:
+        engine, scaler = NumpyLSTMModel.load(out_path)
+        windows = None
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        data_path = args.data or os.path.join(repo_root, "data", "processed", "daily_features.csv")
+        if scaler is not None and os.path.exists(data_path):
+            import pandas as pd
+            from forecasting.inference import feature_columns, scale_features
+            df = pd.read_csv(data_path, parse_dates=["Date"])
+            scaled = scale_features(scaler, df[feature_columns(scaler, df.columns)].to_numpy())
+            steps = engine.input_shape[1]
+            windows = np.lib.stride_tricks.sliding_window_view(scaled, steps, axis=0).transpose(0, 2, 1)
+        diff = check_parity(keras_model, engine, windows=windows)
+        print(f"Max |keras - numpy| over random and real windows: {diff:.3e}")
+        if diff > args.tolerance:
+            print(f"Parity check FAILED (tolerance {args.tolerance:.1e})")
+            return 1
+        print("Parity check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
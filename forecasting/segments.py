@@ -0,0 +1,271 @@
+"""
+One LSTM per Category x Region segment
+
+daily_features.csv averages every store's rows into one series per day, so its
+Category and Region columns end up as meaningless fractional codes. Here the
+raw sales are split by (Category, Region) instead, each segment is reduced to
+its own daily series the same way ingest.py builds daily_features, and one
+model per segment is trained with the training.py recipe.
+
+Segments train in parallel on a process pool sized to the available cores
+(TensorFlow gets an equal share of threads per process). Each trained
+segment is published to models/segments/<segment>/ as a regular model-store
+version, whose manifest records a hash of the segment's data and the config.
+A rerun skips segments whose active version was trained on the same data and
+config, so an interrupted run resumes where it stopped.
+
+Serving: SegmentModels loads each segment's model on first use, and /predict
+routes requests with a "segment" to it.
+
+Usage (needs TensorFlow and scikit-learn):
+    python -m forecasting.segments train                    # data/raw/sales_data.csv
+    python -m forecasting.segments train --workers 4 --epochs 50
+    python -m forecasting.segments list
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from forecasting import model_store
+from forecasting.ingest import (
+    DEFAULT_RAW, DailyTotals, _complete_end, collect_categories, extend_encodings, iter_chunks, reduce_chunk,
+)
+from forecasting.model_registry import ModelRegistry, ModelUnavailableError
+from forecasting.training import frame_hash
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SEGMENTS_DIR = os.path.join(BASE_DIR, "models", "segments")
+REPORT = "training_report.json"
+SEGMENT_COLUMNS = ("Category", "Region")
+
+
+def segment_slug(category, region):
+    """Directory name of a segment, e.g. ('Home Decor', 'North') -> 'home-decor__north'"""
+    def part(value):
+        return re.sub(r"[^a-z0-9]+", "-", str(value).strip().lower()).strip("-") or "none"
+    return f"{part(category)}__{part(region)}"
+
+
+def parse_segment(value):
+    """(category, region) from {"category": ..., "region": ...} or "Category/Region" """
+    if isinstance(value, dict):
+        category, region = value.get("category"), value.get("region")
+    elif isinstance(value, str) and "/" in value:
+        category, region = value.split("/", 1)
+    else:
+        raise ValueError('segment must be {"category": ..., "region": ...} or "Category/Region"')
+    if not category or not region:
+        raise ValueError("segment needs both a category and a region")
+    return category, region
+
+
+# ---------------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------------
+def segment_frames(raw_path, chunksize=100_000):
+    """{(category, region): daily frame} with daily_features' columns, streamed from the raw CSV.
+
+    Categorical codes are assigned over the whole file in sorted order, as
+    the notebook's LabelEncoder (and ingest.py) do, so they match across
+    segments.
+    """
+    end = _complete_end(raw_path, os.path.getsize(raw_path))
+    encodings = extend_encodings({}, collect_categories(raw_path, end, chunksize))
+    totals = {}
+    for chunk in iter_chunks(raw_path, 0, end, None, chunksize):
+        for key, part in chunk.groupby(list(SEGMENT_COLUMNS)):
+            sums, counts = reduce_chunk(part, encodings)
+            totals.setdefault(key, DailyTotals()).add(sums, counts)
+    return {key: t.means().reset_index() for key, t in sorted(totals.items())}
+
+
+# ---------------------------------------------------------------------------
+# Training
+# ---------------------------------------------------------------------------
+def is_current(segment_dir, data_hash, config):
+    """True when the segment's active version was trained on this data and config"""
+    active = model_store.resolve_active(segment_dir)
+    if active is None:
+        return False
+    training = active.manifest.get("training", {})
+    return training.get("data_hash") == data_hash and training.get("config") == config
+
+
+def train_segment(key, df, config, segments_dir, seed=0, min_rows=None):
+    """Train and publish one segment's model (runs in a pool process); returns its report row"""
+    import tempfile
+    from forecasting.training import DEFAULT_CONFIG, save_artifacts, train
+
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    category, region = key
+    slug = segment_slug(category, region)
+    report = {"segment": slug, "category": category, "region": region, "rows": int(len(df))}
+    began = time.perf_counter()
+    min_rows = min_rows or 4 * config["window"]
+    if len(df) < min_rows:
+        report.update(state="skipped", reason=f"fewer than {min_rows} days")
+        return report
+    try:
+        model, scaler, metadata = train(df, config, seed=seed)
+        summary = {k: v for k, v in metadata.items() if k != "history"}
+        summary.update(data_hash=frame_hash(df), category=category, region=region)
+        with tempfile.TemporaryDirectory(prefix=f"segment-{slug}-") as tmp:
+            model_path, scaler_path = save_artifacts(model, scaler, tmp, metadata)
+            version = model_store.publish(os.path.join(segments_dir, slug), model_path, scaler_path,
+                                          metadata={"training": summary})
+        report.update(state="trained", version=version.version, val_rmse=metadata.get("val_rmse"),
+                      val_mae=metadata.get("val_mae"))
+    except Exception as e:
+        report.update(state="error", error=str(e))
+    report["seconds"] = round(time.perf_counter() - began, 3)
+    return report
+
+
+def train_all(frames, config=None, segments_dir=DEFAULT_SEGMENTS_DIR, workers=None, force=False, seed=0,
+              on_result=None):
+    """Train every segment that is not already current; returns the report rows"""
+    from forecasting.training import DEFAULT_CONFIG, available_cores, limit_threads
+
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    os.makedirs(segments_dir, exist_ok=True)
+    rows, todo = [], []
+    for key, df in frames.items():
+        slug = segment_slug(*key)
+        if not force and is_current(os.path.join(segments_dir, slug), frame_hash(df), config):
+            rows.append({"segment": slug, "category": key[0], "region": key[1], "rows": int(len(df)),
+                         "state": "current", "seconds": 0.0})
+        else:
+            todo.append(key)
+    if not todo:
+        return rows
+
+    workers = max(1, min(workers or available_cores(), len(todo)))
+    threads = max(1, available_cores() // workers)
+    # spawn: TensorFlow is not fork-safe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=limit_threads, initargs=(threads,)) as pool:
+        futures = [pool.submit(train_segment, key, frames[key], config, segments_dir, seed) for key in todo]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            if on_result is not None:
+                on_result(row)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Serving
+# ---------------------------------------------------------------------------
+class SegmentModels:
+    """Lazily created ModelRegistry per segment under segments_dir"""
+
+    def __init__(self, segments_dir, backend="auto", watch_interval=0, on_swap=None):
+        self.segments_dir = segments_dir
+        self.backend = backend
+        self.watch_interval = watch_interval
+        self.on_swap = on_swap          # on_swap(slug, old, new)
+        self._registries = {}
+        self._lock = threading.Lock()
+
+    def registry(self, segment):
+        """(slug, ModelRegistry) for a segment given in any form parse_segment accepts"""
+        slug = segment_slug(*parse_segment(segment))
+        registry = self._registries.get(slug)
+        if registry is not None:
+            return slug, registry
+        segment_dir = os.path.join(self.segments_dir, slug)
+        if not model_store.list_versions(segment_dir):
+            raise ModelUnavailableError(f"No model trained for segment {slug}")
+        with self._lock:
+            registry = self._registries.get(slug)
+            if registry is None:
+                registry = ModelRegistry(segment_dir, backend=self.backend)
+                if self.on_swap is not None:
+                    registry.add_swap_listener(lambda old, new, slug=slug: self.on_swap(slug, old, new))
+                if self.watch_interval > 0:
+                    registry.start_watcher(self.watch_interval)
+                self._registries[slug] = registry
+        return slug, registry
+
+    def get(self, segment):
+        """(slug, LoadedModel) of a segment"""
+        slug, registry = self.registry(segment)
+        return slug, registry.get()
+
+    def available(self):
+        try:
+            names = sorted(os.listdir(self.segments_dir))
+        except OSError:
+            return []
+        return [n for n in names if model_store.list_versions(os.path.join(self.segments_dir, n))]
+
+    def status(self):
+        return {
+            "segments_dir": self.segments_dir,
+            "available": self.available(),
+            "loaded": {slug: r.status()["model"] for slug, r in sorted(self._registries.items())},
+        }
+
+
+def main(argv=None):
+    from forecasting.training import DEFAULT_CONFIG
+
+    parser = argparse.ArgumentParser(description="Per Category x Region segment models")
+    parser.add_argument("--segments-dir", default=DEFAULT_SEGMENTS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_train = sub.add_parser("train", help="Train (or resume training) every segment")
+    p_train.add_argument("--raw", default=DEFAULT_RAW)
+    p_train.add_argument("--chunksize", type=int, default=100_000)
+    p_train.add_argument("--workers", type=int, help="Training processes (default: available cores)")
+    p_train.add_argument("--epochs", type=int, default=DEFAULT_CONFIG["epochs"])
+    p_train.add_argument("--window", type=int, default=DEFAULT_CONFIG["window"])
+    p_train.add_argument("--only", nargs="+", help="Train only these segments (Category/Region)")
+    p_train.add_argument("--force", action="store_true", help="Retrain segments that are already current")
+    p_train.add_argument("--seed", type=int, default=0)
+    sub.add_parser("list", help="List segments with trained models")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for slug in SegmentModels(args.segments_dir).available():
+            active = model_store.resolve_active(os.path.join(args.segments_dir, slug))
+            training = active.manifest.get("training", {})
+            print(f"{slug:<32} {active.version}  val_rmse={training.get('val_rmse')}")
+        return 0
+
+    if not os.path.exists(args.raw):
+        print(f"{args.raw} not found")
+        return 1
+    began = time.perf_counter()
+    frames = segment_frames(args.raw, args.chunksize)
+    if args.only:
+        wanted = {segment_slug(*parse_segment(s)) for s in args.only}
+        frames = {k: v for k, v in frames.items() if segment_slug(*k) in wanted}
+    print(f"{len(frames)} segments from {args.raw} in {time.perf_counter() - began:.1f}s", file=sys.stderr)
+
+    def report(row):
+        print(f"  {row['segment']:<32} {row['state']:<8} {row.get('seconds', 0):>8.1f}s  "
+              f"val_rmse={row.get('val_rmse')}", file=sys.stderr)
+
+    config = {"epochs": args.epochs, "window": args.window}
+    rows = train_all(frames, config, args.segments_dir, args.workers, args.force, args.seed, on_result=report)
+    summary = {
+        "segments": sorted(rows, key=lambda r: r["segment"]),
+        "wall_seconds": round(time.perf_counter() - began, 3),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(args.segments_dir, REPORT), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(json.dumps({"wall_seconds": summary["wall_seconds"],
+                      "states": {s: sum(r["state"] == s for r in rows) for s in {r["state"] for r in rows}}}))
+    return 1 if any(r["state"] == "error" for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Date-range queries over the processed datasets
+
+The dataset cache keeps frames sorted by Date, so a range is two
+np.searchsorted calls on the date column (O(log n)) followed by contiguous
+slices of the requested columns. Results can be encoded as JSON or as an
+uncompressed .npz (one array per column, dates as datetime64[ms]).
+"""
+import hashlib
+import io
+import json
+
+import numpy as np
+
+from forecasting.downsample import range_bounds, to_epoch_ms
+
+
+def parse_date_ms(value):
+    """Epoch milliseconds for an ISO date/datetime string (None passes through)"""
+    if value in (None, ""):
+        return None
+    return int(np.datetime64(value, "ms").astype(np.int64))
+
+
+def slice_columns(df, columns, start=None, end=None, date_col="Date"):
+    """Rows of `columns` whose date lies in [start, end] (ISO strings, inclusive)"""
+    dates = df[date_col].to_numpy()
+    lo, hi = range_bounds(dates, parse_date_ms(start), parse_date_ms(end))
+    out = {date_col: dates[lo:hi]}
+    for col in columns:
+        if col != date_col:
+            out[col] = df[col].to_numpy()[lo:hi]
+    return out
+
+
+def make_etag(fingerprint, *parts):
+    """Strong ETag derived from the dataset fingerprint and the query"""
+    digest = hashlib.sha256(json.dumps([list(fingerprint), *parts], default=str).encode())
+    return digest.hexdigest()[:32]
+
+
+def to_json_payload(columns, date_col="Date"):
+    data = {}
+    for name, values in columns.items():
+        if name == date_col:
+            data[name] = np.datetime_as_string(values.astype("datetime64[D]")).tolist()
+        elif values.dtype.kind == "f":
+            # JSON has no NaN; send null instead
+            data[name] = np.where(np.isnan(values), None, values).tolist()
+        else:
+            data[name] = values.tolist()
+    return data
+
+
+def to_npz_bytes(columns, date_col="Date"):
+    buf = io.BytesIO()
+    arrays = {
+        name: (to_epoch_ms(values).astype("datetime64[ms]") if name == date_col else values)
+        for name, values in columns.items()
+    }
+    np.savez(buf, **arrays)
+    return buf.getvalue()
@@ -0,0 +1,303 @@
+"""
+Per-stage request timing for both Flask apps
+
+Code on the hot path marks stages:
+
+    with stage("data"):
+        df = datasets.get("daily_features")
+
+init_app(app) then, for every request,
+- sends the stage totals in a Server-Timing header (visible in the browser's
+  network panel), e.g. `data;dur=1.8, embed;dur=22.4, template;dur=3.1, total;dur=30.2`;
+- records them in latency histograms served as Prometheus text at /metrics,
+  along with anything registered through add_collector(). /metrics answers
+  logged-in users and requests with `Authorization: Bearer <METRICS_TOKEN>`
+  (for scrapers); METRICS_PUBLIC=1 opens it to everyone;
+- with PROFILE_SLOW_MS set, samples the request's stack and writes a profile
+  to PROFILE_DIR for requests slower than that. pyinstrument is used when
+  installed, otherwise a built-in sampler writes collapsed stacks (the input
+  format of flamegraph.pl / speedscope).
+
+Template rendering is timed automatically as the "template" stage. Stages
+recorded outside a request (e.g. on a worker thread) are ignored.
+"""
+import bisect
+import contextvars
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, as in the Prometheus client libraries
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """Accumulated seconds per stage for one request"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self, total):
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as stage `name` of the current request"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format"""
+
+    def __init__(self, name, help_text, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}   # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("route", "method", "status"))
+STAGE_SECONDS = Histogram(
+    "http_request_stage_duration_seconds", "Time spent in each stage of a request", ("route", "stage"))
+
+
+_collectors = []
+
+
+def add_collector(collect):
+    """Include collect() -> list of Prometheus text lines in every /metrics response"""
+    _collectors.append(collect)
+
+
+def render_metrics():
+    parts = [REQUEST_SECONDS.render(), STAGE_SECONDS.render()]
+    for collect in _collectors:
+        try:
+            parts.extend(collect())
+        except Exception:
+            logger.exception("Metrics collector %r failed", collect)
+    return "\n".join(parts) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Slow-request profiling
+# ---------------------------------------------------------------------------
+class StackSampler:
+    """Samples one thread's Python stack on a background thread.
+
+    Fallback for when pyinstrument is not installed; output is one
+    "frame;frame;frame count" line per distinct stack.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def output(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class SlowRequestProfiler:
+    """Profiles every request and keeps the profiles of those slower than threshold_ms"""
+
+    def __init__(self, threshold_ms, out_dir):
+        self.threshold = threshold_ms / 1000.0
+        self.out_dir = out_dir
+        try:
+            import pyinstrument  # noqa: F401
+            self.backend = "pyinstrument"
+        except ImportError:
+            self.backend = "sampler"
+
+    def start(self):
+        if self.backend == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler(interval=0.001)
+        else:
+            profiler = StackSampler(threading.get_ident())
+        profiler.start()
+        return profiler
+
+    def finish(self, profiler, seconds, label):
+        profiler.stop()
+        if seconds < self.threshold:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        safe = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self.out_dir, f"{stamp}_{safe}_{int(seconds * 1000)}ms")
+        if self.backend == "pyinstrument":
+            path, text = base + ".html", profiler.output_html()
+        else:
+            path, text = base + ".collapsed.txt", profiler.output()
+        with open(path, "w") as f:
+            f.write(text)
+        logger.warning("Slow request %s took %.0f ms; profile written to %s", label, seconds * 1000, path)
+        return path
+
+
+# ---------------------------------------------------------------------------
+# Flask wiring
+# ---------------------------------------------------------------------------
+def _metrics_allowed(app, request):
+    """Public opt-in, the scrape token, or a logged-in session"""
+    if app.config["METRICS_PUBLIC"]:
+        return True
+    token = app.config["METRICS_TOKEN"]
+    auth = request.headers.get("Authorization", "")
+    if token and auth.startswith("Bearer ") and hmac.compare_digest(auth[7:].encode(), token.encode()):
+        return True
+    try:
+        from flask_login import current_user
+        return bool(current_user.is_authenticated)
+    except (ImportError, AttributeError):
+        # flask_login missing or not set up on this app
+        return False
+
+
+def init_app(app, metrics_path="/metrics", profile_dir=None):
+    """Install per-request timers, the Server-Timing header and the metrics route"""
+    from flask import Response, g, request
+    from flask.signals import before_render_template, template_rendered
+
+    app.config.setdefault("METRICS_TOKEN", os.environ.get("METRICS_TOKEN") or None)
+    app.config.setdefault("METRICS_PUBLIC", os.environ.get("METRICS_PUBLIC", "0") == "1")
+
+    slow_ms = float(os.environ.get("PROFILE_SLOW_MS", "0"))
+    profiler = None
+    if slow_ms > 0:
+        default_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+        profiler = SlowRequestProfiler(slow_ms, os.environ.get("PROFILE_DIR", profile_dir or default_dir))
+
+    @app.before_request
+    def _start_timer():
+        g._timer = RequestTimer()
+        g._timer_token = _current.set(g._timer)
+        if profiler is not None:
+            g._profile = profiler.start()
+
+    @app.after_request
+    def _finish_timer(response):
+        timer = g.pop("_timer", None)
+        if timer is None:
+            return response
+        total = time.perf_counter() - timer.start
+        # Label by URL rule, not path, so /jobs/<id> is one series
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        if route != metrics_path:
+            REQUEST_SECONDS.observe((route, request.method, str(response.status_code)), total)
+            for name, seconds in timer.stages.items():
+                STAGE_SECONDS.observe((route, name), seconds)
+        response.headers["Server-Timing"] = timer.server_timing(total)
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            profiler.finish(profile, total, f"{request.method} {request.path}")
+        return response
+
+    @app.teardown_request
+    def _reset_timer(exc):
+        token = g.pop("_timer_token", None)
+        if token is not None:
+            _current.reset(token)
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            # The request failed before after_request ran
+            profile.stop()
+
+    def _template_started(sender, template, context, **extra):
+        g._template_start = time.perf_counter()
+
+    def _template_done(sender, template, context, **extra):
+        timer, start = _current.get(), g.pop("_template_start", None)
+        if timer is not None and start is not None:
+            timer.add("template", time.perf_counter() - start)
+
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_done, app, weak=False)
+
+    def metrics():
+        if not _metrics_allowed(app, request):
+            return Response("Unauthorized\n", status=401, mimetype="text/plain",
+                            headers={"WWW-Authenticate": "Bearer"})
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule(metrics_path, "metrics", metrics)
+    return app
@@ -0,0 +1,225 @@
+"""
+Training of the Units Sold LSTM, as in notebooks/lstm_modeling_evaluation.ipynb
+
+Same recipe as the notebook (80/20 split by date, MinMaxScaler fitted on the
+training part, LSTM(64) -> Dropout(0.2) -> LSTM(32) -> Dense(1), Adam + MSE,
+14-day windows, batches of 32), but batches come from forecasting.windows
+instead of TimeseriesGenerator: windows are views of the scaled matrix and
+only the batch being fed to the model is ever copied.
+
+The trained model, its scaler and the exported NumPy engine are written to a
+fresh directory and, with --publish, published to the model store so running
+workers pick them up.
+
+Usage (needs TensorFlow and scikit-learn):
+    python -m forecasting.training                     # notebook settings
+    python -m forecasting.training --epochs 50 --shuffle --publish
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from forecasting.inference import TARGET_COL
+from forecasting.windows import WindowBatches, iter_batches, supervised
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(BASE_DIR, "data", "processed", "daily_features.csv")
+DEFAULT_MODEL_DIR = os.path.join(BASE_DIR, "models")
+
+# The notebook's hyperparameters
+DEFAULT_CONFIG = {
+    "window": 14,
+    "units": [64, 32],
+    "dropout": 0.2,
+    "epochs": 30,
+    "batch_size": 32,
+    "learning_rate": 0.001,
+}
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def limit_threads(threads):
+    """Cap TensorFlow's thread pools; the initializer of training worker processes"""
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def frame_hash(df):
+    """Short digest of a daily_features-shaped frame, to tell what a model was trained on"""
+    digest = hashlib.sha256()
+    digest.update(",".join(df.columns).encode())
+    digest.update(df["Date"].to_numpy(dtype="datetime64[ns]").tobytes())
+    digest.update(df.drop(columns=["Date"]).to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def split_scale(X, train_fraction=0.8):
+    """Fit a MinMaxScaler on the first train_fraction of rows; returns (scaler, scaled, train_size)"""
+    from sklearn.preprocessing import MinMaxScaler
+
+    train_size = int(len(X) * train_fraction)
+    scaler = MinMaxScaler()
+    scaler.fit(X[:train_size])
+    scaled = scaler.transform(X).astype(np.float32)
+    return scaler, scaled, train_size
+
+
+def build_model(window, n_features, units=(64, 32), dropout=0.2, learning_rate=0.001):
+    """Stacked LSTM: every LSTM but the last returns sequences and is followed by Dropout"""
+    from tensorflow import keras
+
+    layers = [keras.Input(shape=(window, n_features))]
+    for i, n in enumerate(units):
+        last = i == len(units) - 1
+        layers.append(keras.layers.LSTM(n, return_sequences=not last))
+        if not last and dropout:
+            layers.append(keras.layers.Dropout(dropout))
+    layers.append(keras.layers.Dense(1))
+    model = keras.Sequential(layers)
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate), loss="mse")
+    return model
+
+
+def predict_windows(model, W, batch_size=1024):
+    """One-step predictions for a window view, fed to the model a chunk at a time"""
+    out = np.empty(len(W), dtype=np.float32)
+    for start, chunk in iter_batches(W, batch_size):
+        out[start:start + len(chunk)] = np.asarray(model.predict_on_batch(chunk)).reshape(-1)
+    return out
+
+
+def fit(scaled, train_size, config=None, shuffle=False, seed=0, callbacks=None, verbose=0):
+    """Train on scaled[:train_size] and validate on the rest.
+
+    Returns (model, history dict, validation metrics in scaled units).
+    """
+    from tensorflow import keras
+
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    window = int(config["window"])
+    keras.utils.set_random_seed(seed)
+
+    train = WindowBatches(scaled[:train_size], scaled[:train_size, TARGET_COL], window,
+                          batch_size=int(config["batch_size"]), shuffle=shuffle, seed=seed)
+    # Validation windows whose targets are held-out rows reach back into the training rows
+    tail = scaled[max(train_size - window, 0):]
+    val = WindowBatches(tail, tail[:, TARGET_COL], window, batch_size=1024, shuffle=False)
+    val_X, val_y = supervised(tail, tail[:, TARGET_COL], window)
+
+    model = build_model(window, scaled.shape[1], config["units"], config["dropout"], config["learning_rate"])
+    history = model.fit(
+        train.keras_dataset(),
+        validation_data=val.keras_dataset() if len(val_y) else None,
+        epochs=int(config["epochs"]),
+        callbacks=callbacks,
+        verbose=verbose,
+    )
+    metrics = {}
+    if len(val_y):
+        pred = predict_windows(model, val_X)
+        err = pred - val_y
+        metrics = {"val_rmse_scaled": float(np.sqrt(np.mean(err ** 2))), "val_mae_scaled": float(np.mean(np.abs(err)))}
+    return model, {k: [float(v) for v in vals] for k, vals in history.history.items()}, metrics
+
+
+def save_artifacts(model, scaler, out_dir, metadata=None):
+    """Write model.keras, scaler.pkl, the NumPy engine and a training.json to out_dir"""
+    import joblib
+    from forecasting.model_store import MODEL_FILE, SCALER_FILE
+    from forecasting.numpy_lstm import export
+
+    os.makedirs(out_dir, exist_ok=True)
+    model_path = os.path.join(out_dir, MODEL_FILE)
+    scaler_path = os.path.join(out_dir, SCALER_FILE)
+    model.save(model_path)
+    joblib.dump(scaler, scaler_path)
+    export(model_path, scaler_path=scaler_path)
+    with open(os.path.join(out_dir, "training.json"), "w") as f:
+        json.dump(metadata or {}, f, indent=2)
+    return model_path, scaler_path
+
+
+def train(df, config=None, train_fraction=0.8, shuffle=False, seed=0, callbacks=None, verbose=0):
+    """Scale a daily_features frame, train, and return (model, scaler, metadata)"""
+    began = time.perf_counter()
+    columns = [c for c in df.columns if c != "Date"]
+    # Fitting on a DataFrame records the column names in the scaler, which
+    # inference.feature_columns uses to order request features
+    scaler, scaled, train_size = split_scale(df[columns], train_fraction)
+    model, history, metrics = fit(scaled, train_size, config, shuffle, seed, callbacks, verbose)
+    target_range = scaler.data_range_[TARGET_COL]
+    metadata = {
+        "config": dict(DEFAULT_CONFIG, **(config or {})),
+        "rows": int(len(df)),
+        "train_rows": int(train_size),
+        "shuffle": shuffle,
+        "seed": seed,
+        "final_loss": history["loss"][-1],
+        "history": history,
+        "seconds": round(time.perf_counter() - began, 3),
+    }
+    if metrics:
+        # MinMax scaling is linear, so errors scale back by the target's data range
+        metadata["val_rmse"] = metrics["val_rmse_scaled"] * float(target_range)
+        metadata["val_mae"] = metrics["val_mae_scaled"] * float(target_range)
+    return model, scaler, metadata
+
+
+def main(argv=None):
+    from forecasting.datasets import read_dataset
+    from forecasting.model_store import publish
+
+    parser = argparse.ArgumentParser(description="Train the Units Sold LSTM")
+    parser.add_argument("--data", default=DEFAULT_DATA)
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--window", type=int, default=DEFAULT_CONFIG["window"])
+    parser.add_argument("--epochs", type=int, default=DEFAULT_CONFIG["epochs"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_CONFIG["batch_size"])
+    parser.add_argument("--units", type=int, nargs="+", default=DEFAULT_CONFIG["units"])
+    parser.add_argument("--dropout", type=float, default=DEFAULT_CONFIG["dropout"])
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_CONFIG["learning_rate"])
+    parser.add_argument("--train-fraction", type=float, default=0.8)
+    parser.add_argument("--shuffle", action="store_true", help="Shuffle window order every epoch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Directory for the artifacts (default: a temporary one)")
+    parser.add_argument("--publish", action="store_true", help="Publish the result as the active model version")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.data):
+        print(f"{args.data} not found")
+        return 1
+    config = {
+        "window": args.window, "units": args.units, "dropout": args.dropout,
+        "epochs": args.epochs, "batch_size": args.batch_size, "learning_rate": args.learning_rate,
+    }
+    model, scaler, metadata = train(read_dataset(args.data, ["Date"]), config, args.train_fraction,
+                                    args.shuffle, args.seed, verbose=2 if args.verbose else 0)
+    out_dir = args.out or tempfile.mkdtemp(prefix="lstm-train-")
+    model_path, scaler_path = save_artifacts(model, scaler, out_dir, metadata)
+    summary = {k: v for k, v in metadata.items() if k != "history"}
+    summary["artifacts"] = out_dir
+    if args.publish:
+        version = publish(args.model_dir, model_path, scaler_path, metadata={"training": summary})
+        summary["published_version"] = version.version
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
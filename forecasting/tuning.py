@@ -0,0 +1,426 @@
+"""
+Hyperparameter search for the Units Sold LSTM
+
+The notebook fixes n_input = 14, LSTM(64) -> LSTM(32), Dropout(0.2) and 30
+epochs. Here a grid of those settings (or a random sample of it, --trials) is
+trained with the training.py recipe, one trial per worker process. Each trial
+
+- stops early once validation loss has not improved for --patience epochs,
+  and keeps the weights of its best epoch;
+- is pruned when, from epoch --warmup on, its best validation loss so far is
+  worse than the median of the other trials at the same epoch (once at least
+  --min-trials others have got that far).
+
+Trials, their per-epoch losses, metrics and timing are recorded in a SQLite
+table (models/tuning/tuning.db), which the worker processes also use to see
+each other's progress for pruning. Finished trials keep their artifacts in
+models/tuning/<study>/trial-<id>/. Rerunning a study skips configurations
+already tried on the same data, so an interrupted search resumes.
+
+`promote` (or `run --promote`) publishes the best finished trial of a study
+to the model store, where running workers pick it up.
+
+Usage (needs TensorFlow and scikit-learn):
+    python -m forecasting.tuning run --trials 12 --workers 4
+    python -m forecasting.tuning run --window 7 14 28 --units 64,32 128,64 --dropout 0.1 0.2 --promote
+    python -m forecasting.tuning show
+    python -m forecasting.tuning promote
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from forecasting.jobs import local_worker_alive, worker_id
+from forecasting.training import DEFAULT_CONFIG, available_cores, frame_hash, limit_threads
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(BASE_DIR, "data", "processed", "daily_features.csv")
+DEFAULT_MODEL_DIR = os.path.join(BASE_DIR, "models")
+DEFAULT_TUNING_DIR = os.path.join(DEFAULT_MODEL_DIR, "tuning")
+DB_FILE = "tuning.db"
+
+# Searched when a setting is not given on the command line
+DEFAULT_SPACE = {
+    "window": [7, 14, 28],
+    "units": [[32], [64, 32], [128, 64]],
+    "dropout": [0.0, 0.2, 0.4],
+    "epochs": [30, 60],
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    study TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    config TEXT NOT NULL,
+    state TEXT NOT NULL,
+    worker TEXT,
+    epochs_run INTEGER,
+    best_epoch INTEGER,
+    val_loss REAL,
+    val_rmse REAL,
+    val_mae REAL,
+    seconds REAL,
+    artifacts TEXT,
+    error TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS trials_study ON trials (study, data_hash, state);
+CREATE TABLE IF NOT EXISTS trial_epochs (
+    trial_id INTEGER NOT NULL,
+    epoch INTEGER NOT NULL,
+    loss REAL,
+    val_loss REAL,
+    PRIMARY KEY (trial_id, epoch)
+);
+"""
+
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+class TrialStore:
+    """The trials tables. Each call opens its own connection, so any process may use it."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, args=()):
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(sql, args)
+                return cursor.lastrowid if sql.lstrip().upper().startswith("INSERT") else cursor.rowcount
+        finally:
+            conn.close()
+
+    def _query(self, sql, args=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, args).fetchall()
+        finally:
+            conn.close()
+
+    def insert(self, study, data_hash, config, worker):
+        return self._execute(
+            "INSERT INTO trials (study, data_hash, config, state, worker, submitted_at) "
+            "VALUES (?, ?, ?, 'queued', ?, ?)",
+            (study, data_hash, config_key(config), worker, time.time()),
+        )
+
+    def update(self, trial_id, **fields):
+        sets = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE trials SET {sets} WHERE id = ?", list(fields.values()) + [trial_id])
+
+    def get(self, trial_id):
+        rows = self._query("SELECT * FROM trials WHERE id = ?", (trial_id,))
+        return _row(rows[0]) if rows else None
+
+    def record_epoch(self, trial_id, epoch, loss, val_loss):
+        self._execute(
+            "INSERT OR REPLACE INTO trial_epochs (trial_id, epoch, loss, val_loss) VALUES (?, ?, ?, ?)",
+            (trial_id, epoch, loss, val_loss),
+        )
+
+    def epoch_median(self, trial_id, epoch, min_trials):
+        """Median best-so-far val_loss of the study's other trials at `epoch`, or None.
+
+        Counts trials that reached `epoch`, and finished trials that stopped
+        early before it (with their overall best).
+        """
+        rows = self._query(
+            """
+            SELECT MIN(e.val_loss) AS best
+            FROM trial_epochs e
+            JOIN trials t ON t.id = e.trial_id
+            JOIN trials me ON me.id = ? AND t.study = me.study AND t.data_hash = me.data_hash
+            WHERE e.trial_id != ? AND e.epoch <= ? AND e.val_loss IS NOT NULL
+            GROUP BY e.trial_id
+            HAVING MAX(e.epoch) = ? OR MAX(t.state) = 'done'
+            """,
+            (trial_id, trial_id, epoch, epoch),
+        )
+        if len(rows) < min_trials:
+            return None
+        return statistics.median(row["best"] for row in rows)
+
+    def finished_configs(self, study, data_hash):
+        rows = self._query(
+            "SELECT config FROM trials WHERE study = ? AND data_hash = ? AND state IN ('done', 'pruned')",
+            (study, data_hash),
+        )
+        return {row["config"] for row in rows}
+
+    def trials(self, study, data_hash=None):
+        if data_hash is None:
+            data_hash = self.latest_hash(study)
+        rows = self._query(
+            "SELECT * FROM trials WHERE study = ? AND data_hash = ? "
+            "ORDER BY state != 'done', val_loss IS NULL, val_loss, id",
+            (study, data_hash),
+        )
+        return [_row(row) for row in rows]
+
+    def latest_hash(self, study):
+        rows = self._query("SELECT data_hash FROM trials WHERE study = ? ORDER BY id DESC LIMIT 1", (study,))
+        return rows[0]["data_hash"] if rows else None
+
+    def best(self, study, data_hash=None):
+        """The finished trial with the lowest val_loss on the study's latest (or given) data"""
+        done = [t for t in self.trials(study, data_hash) if t["state"] == "done" and t["val_loss"] is not None]
+        return done[0] if done else None
+
+    def fail_interrupted(self, is_alive):
+        """Mark queued/running trials whose search process is gone as failed"""
+        dead = [
+            row["id"] for row in self._query("SELECT id, worker FROM trials WHERE state IN ('queued', 'running')")
+            if not is_alive(row["worker"])
+        ]
+        for trial_id in dead:
+            self.update(trial_id, state="error", error="Interrupted", finished_at=time.time())
+        return len(dead)
+
+
+def _row(row):
+    trial = dict(row)
+    trial["config"] = json.loads(trial["config"])
+    return trial
+
+
+# ---------------------------------------------------------------------------
+# Search space
+# ---------------------------------------------------------------------------
+def grid(space):
+    """Every combination of the choices in `space`, over DEFAULT_CONFIG"""
+    names = sorted(space)
+    return [dict(DEFAULT_CONFIG, **dict(zip(names, values)))
+            for values in itertools.product(*(space[name] for name in names))]
+
+
+def sample(configs, n, seed=0):
+    """n configurations drawn without replacement (all of them when n is None or too large)"""
+    if n is None or n >= len(configs):
+        return list(configs)
+    return random.Random(seed).sample(configs, n)
+
+
+# ---------------------------------------------------------------------------
+# Trials
+# ---------------------------------------------------------------------------
+def _callbacks(store, trial_id, patience, warmup, min_trials):
+    """EarlyStopping plus a callback that records epochs and prunes against the median"""
+    from tensorflow import keras
+
+    class MedianPruning(keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.best = float("inf")
+            self.best_epoch = 0
+            self.epochs = 0
+            self.pruned = False
+
+        def on_epoch_end(self, epoch, logs=None):
+            logs = logs or {}
+            val_loss = logs.get("val_loss")
+            self.epochs = epoch + 1
+            store.record_epoch(trial_id, self.epochs, _float(logs.get("loss")), _float(val_loss))
+            if val_loss is None:
+                return
+            if val_loss < self.best:
+                self.best, self.best_epoch = float(val_loss), self.epochs
+            if self.epochs >= warmup:
+                median = store.epoch_median(trial_id, self.epochs, min_trials)
+                if median is not None and self.best > median:
+                    self.pruned = True
+                    self.model.stop_training = True
+
+    pruning = MedianPruning()
+    stopping = keras.callbacks.EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)
+    return pruning, [pruning, stopping]
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def run_trial(db_path, trial_id, df, config, artifacts_dir, seed=0, patience=5, warmup=5, min_trials=3):
+    """Train one configuration (runs in a pool process); returns its trial row"""
+    from forecasting.training import save_artifacts, train
+
+    store = TrialStore(db_path)
+    store.update(trial_id, state="running", started_at=time.time())
+    began = time.perf_counter()
+    try:
+        pruning, callbacks = _callbacks(store, trial_id, patience, warmup, min_trials)
+        model, scaler, metadata = train(df, config, seed=seed, callbacks=callbacks)
+        fields = {
+            "state": "pruned" if pruning.pruned else "done",
+            "epochs_run": pruning.epochs,
+            "best_epoch": pruning.best_epoch,
+            "val_loss": pruning.best if pruning.best_epoch else None,
+            "val_rmse": metadata.get("val_rmse"),
+            "val_mae": metadata.get("val_mae"),
+        }
+        if not pruning.pruned:
+            out_dir = os.path.join(artifacts_dir, f"trial-{trial_id}")
+            metadata.update(best_epoch=pruning.best_epoch, epochs_run=pruning.epochs)
+            save_artifacts(model, scaler, out_dir, metadata)
+            fields["artifacts"] = out_dir
+    except Exception as e:
+        fields = {"state": "error", "error": str(e)}
+    fields.update(seconds=round(time.perf_counter() - began, 3), finished_at=time.time())
+    store.update(trial_id, **fields)
+    return store.get(trial_id)
+
+
+def search(df, configs, study="lstm", tuning_dir=DEFAULT_TUNING_DIR, workers=None, seed=0,
+           patience=5, warmup=5, min_trials=3, on_result=None):
+    """Run every configuration not yet tried in this study on this data; returns the study's trials"""
+    store = TrialStore(os.path.join(tuning_dir, DB_FILE))
+    store.fail_interrupted(local_worker_alive)
+    data_hash = frame_hash(df)
+    tried = store.finished_configs(study, data_hash)
+    todo = [c for c in configs if config_key(c) not in tried]
+    if todo:
+        artifacts_dir = os.path.join(tuning_dir, study)
+        workers = max(1, min(workers or available_cores(), len(todo)))
+        threads = max(1, available_cores() // workers)
+        ids = [store.insert(study, data_hash, config, worker_id()) for config in todo]
+        # spawn: TensorFlow is not fork-safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=limit_threads, initargs=(threads,)) as pool:
+            futures = [
+                pool.submit(run_trial, store.path, trial_id, df, config, artifacts_dir, seed,
+                            patience, warmup, min_trials)
+                for trial_id, config in zip(ids, todo)
+            ]
+            for future in as_completed(futures):
+                trial = future.result()
+                if on_result is not None:
+                    on_result(trial)
+    return store.trials(study, data_hash)
+
+
+def promote(study="lstm", tuning_dir=DEFAULT_TUNING_DIR, model_dir=DEFAULT_MODEL_DIR):
+    """Publish the best finished trial of `study` as the active model version"""
+    from forecasting.model_store import MODEL_FILE, SCALER_FILE, publish
+
+    best = TrialStore(os.path.join(tuning_dir, DB_FILE)).best(study)
+    if best is None:
+        raise ValueError(f"No finished trial in study {study!r}")
+    with open(os.path.join(best["artifacts"], "training.json")) as f:
+        summary = {k: v for k, v in json.load(f).items() if k != "history"}
+    summary["tuning"] = {"study": study, "trial": best["id"], "val_loss": best["val_loss"]}
+    return publish(model_dir, os.path.join(best["artifacts"], MODEL_FILE),
+                   os.path.join(best["artifacts"], SCALER_FILE), metadata={"training": summary})
+
+
+def _units(value):
+    return [int(n) for n in value.split(",")]
+
+
+def _print_trial(trial):
+    c = trial["config"]
+    val_rmse = "-" if trial["val_rmse"] is None else f"{trial['val_rmse']:.4f}"
+    val_loss = "-" if trial["val_loss"] is None else f"{trial['val_loss']:.5f}"
+    print(f"  #{trial['id']:<4} {trial['state']:<7} window={c['window']:<3} units={','.join(map(str, c['units'])):<8} "
+          f"dropout={c['dropout']:<4} epochs={trial['epochs_run'] or 0:>3}/{c['epochs']:<3} "
+          f"val_loss={val_loss} val_rmse={val_rmse} {trial['seconds'] or 0:.1f}s"
+          + (f"  {trial['error']}" if trial["error"] else ""), file=sys.stderr)
+
+
+def main(argv=None):
+    from forecasting.datasets import read_dataset
+
+    parser = argparse.ArgumentParser(description="Hyperparameter search for the Units Sold LSTM")
+    parser.add_argument("--tuning-dir", default=DEFAULT_TUNING_DIR, help="Trial database and artifacts")
+    parser.add_argument("--study", default="lstm", help="Name grouping the trials of one search")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="Run (or resume) a search")
+    p_run.add_argument("--data", default=DEFAULT_DATA)
+    p_run.add_argument("--window", type=int, nargs="+", default=DEFAULT_SPACE["window"])
+    p_run.add_argument("--units", type=_units, nargs="+", default=DEFAULT_SPACE["units"],
+                       help="Layer sizes, e.g. 64,32 (one choice per argument)")
+    p_run.add_argument("--dropout", type=float, nargs="+", default=DEFAULT_SPACE["dropout"])
+    p_run.add_argument("--epochs", type=int, nargs="+", default=DEFAULT_SPACE["epochs"], help="Epoch budgets")
+    p_run.add_argument("--learning-rate", type=float, nargs="+", default=[DEFAULT_CONFIG["learning_rate"]])
+    p_run.add_argument("--batch-size", type=int, nargs="+", default=[DEFAULT_CONFIG["batch_size"]])
+    p_run.add_argument("--trials", type=int, help="Sample this many configurations instead of the whole grid")
+    p_run.add_argument("--workers", type=int, help="Trial processes (default: available cores)")
+    p_run.add_argument("--patience", type=int, default=5, help="Epochs without improvement before stopping")
+    p_run.add_argument("--warmup", type=int, default=5, help="Epochs before a trial can be pruned")
+    p_run.add_argument("--min-trials", type=int, default=3, help="Other trials needed for a median")
+    p_run.add_argument("--seed", type=int, default=0)
+    p_run.add_argument("--promote", action="store_true", help="Publish the best trial when done")
+    p_run.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    sub.add_parser("show", help="List the trials of a study, best first")
+    p_promote = sub.add_parser("promote", help="Publish the best trial of a study to the model store")
+    p_promote.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        store = TrialStore(os.path.join(args.tuning_dir, DB_FILE))
+        for trial in store.trials(args.study):
+            _print_trial(trial)
+        return 0
+
+    if args.command == "run":
+        if not os.path.exists(args.data):
+            print(f"{args.data} not found")
+            return 1
+        space = {
+            "window": args.window, "units": args.units, "dropout": args.dropout, "epochs": args.epochs,
+            "learning_rate": args.learning_rate, "batch_size": args.batch_size,
+        }
+        configs = sample(grid(space), args.trials, args.seed)
+        print(f"{len(configs)} configurations in study {args.study!r}", file=sys.stderr)
+        began = time.perf_counter()
+        trials = search(read_dataset(args.data, ["Date"]), configs, args.study, args.tuning_dir, args.workers,
+                        args.seed, args.patience, args.warmup, args.min_trials, on_result=_print_trial)
+        summary = {
+            "study": args.study,
+            "wall_seconds": round(time.perf_counter() - began, 3),
+            "states": {s: sum(t["state"] == s for t in trials) for s in sorted({t["state"] for t in trials})},
+        }
+        best = next((t for t in trials if t["state"] == "done"), None)
+        if best is not None:
+            summary["best"] = {k: best[k] for k in ("id", "config", "val_loss", "val_rmse", "val_mae", "best_epoch")}
+        if not args.promote:
+            print(json.dumps(summary, indent=2))
+            return 0
+
+    try:
+        version = promote(args.study, args.tuning_dir, args.model_dir)
+    except ValueError as e:
+        print(e)
+        return 1
+    if args.command == "run":
+        summary["published_version"] = version.version
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"Published {version.version} from study {args.study!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
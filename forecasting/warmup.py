@@ -0,0 +1,90 @@
+"""
+Background warm-up and readiness for the Flask apps
+
+Module import is kept light (pandas, Bokeh and the model backend are
+imported on first use). A warm-up thread then does the expensive first-use
+work (heavy imports, dataset parsing, model load, chart rendering) off the
+request path, and /ready answers 503 until it has finished so a load
+balancer only routes traffic to warm workers.
+
+WARMUP=0 disables the thread; the worker then reports ready immediately and
+everything is loaded lazily by the first requests, as before.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Runs named tasks in order on a daemon thread and records how each went"""
+
+    def __init__(self, tasks):
+        self.tasks = list(tasks)      # [(name, callable)]
+        self.status = {name: {"state": "pending"} for name, _ in self.tasks}
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+        return self
+
+    def skip(self):
+        """Mark warm-up as not wanted: the worker is ready straight away"""
+        for status in self.status.values():
+            status["state"] = "skipped"
+        self._done.set()
+        return self
+
+    def _run(self):
+        for name, task in self.tasks:
+            self.status[name]["state"] = "running"
+            start = time.perf_counter()
+            try:
+                task()
+                self.status[name]["state"] = "done"
+            except Exception as e:
+                # A failed task (e.g. no model artifacts) must not keep the worker unready
+                self.status[name].update(state="error", error=str(e))
+                logger.warning("Warm-up task %s failed: %s", name, e)
+            self.status[name]["seconds"] = round(time.perf_counter() - start, 3)
+        self.finished_at = time.time()
+        self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def report(self):
+        report = {"ready": self.ready, "tasks": {name: dict(status) for name, status in self.status.items()}}
+        if self.started_at is not None and self.finished_at is not None:
+            report["warmup_seconds"] = round(self.finished_at - self.started_at, 3)
+        return report
+
+
+def init_app(app, tasks, path="/ready"):
+    """Start warm-up (unless WARMUP=0) and register the readiness endpoint"""
+    from flask import jsonify
+
+    warmup = Warmup(tasks)
+    if os.environ.get("WARMUP", "1") == "0":
+        warmup.skip()
+    else:
+        warmup.start()
+
+    def ready():
+        report = warmup.report()
+        return jsonify(report), 200 if report["ready"] else 503
+
+    app.add_url_rule(path, "ready", ready)
+    app.extensions["warmup"] = warmup
+    return warmup
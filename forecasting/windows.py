@@ -0,0 +1,97 @@
+"""
+Zero-copy sliding windows over a feature matrix
+
+Training, backtesting and batch scoring all need the (window, n_features)
+blocks of consecutive rows of the scaled daily_features matrix. Keras'
+TimeseriesGenerator copies every window in Python for every batch, and stacking
+windows up front costs window times the matrix. Here the windows are strided
+views of the matrix itself:
+
+    W = windows(X, 14)          # (len(X) - 13, 14, n_features), no copy
+    W[i] is X[i:i + 14]
+
+and a batch is materialized only when it is handed to the model (a fancy
+index gathers just batch_size windows), so memory stays flat as history grows.
+
+Sample i follows TimeseriesGenerator's convention: input X[i:i + window],
+target y[i + window].
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def windows(X, window):
+    """Read-only view of every `window` consecutive rows, shape (n, window, n_features)"""
+    X = np.asarray(X)
+    if len(X) < window:
+        return np.empty((0, window) + X.shape[1:], dtype=X.dtype)
+    # sliding_window_view puts the window axis last: (n, features, window)
+    return sliding_window_view(X, window, axis=0).swapaxes(1, 2)
+
+
+def supervised(X, y, window):
+    """(inputs, targets) views for next-step prediction: windows(X)[i] -> y[i + window]"""
+    return windows(X, window)[:len(X) - window], np.asarray(y)[window:]
+
+
+def iter_batches(W, batch_size):
+    """Consecutive chunks of a window view; each chunk is itself a view"""
+    for start in range(0, len(W), batch_size):
+        yield start, W[start:start + batch_size]
+
+
+class WindowBatches:
+    """Shuffled or ordered mini-batches drawn from window views of X.
+
+    Only the indices are shuffled; each batch gathers its batch_size windows
+    from the shared view when it is requested. Usable directly as a Python
+    iterable of (inputs, targets), or through keras_dataset() for model.fit.
+    """
+
+    def __init__(self, X, y, window, batch_size=32, shuffle=True, seed=None, dtype=np.float32):
+        self.inputs, self.targets = supervised(np.asarray(X, dtype=dtype), np.asarray(y, dtype=dtype), window)
+        self.window = window
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._order = np.arange(len(self.targets))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.targets) / self.batch_size)
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+
+    def __getitem__(self, index):
+        idx = self._order[index * self.batch_size:(index + 1) * self.batch_size]
+        if not self.shuffle:
+            # Ordered batches are contiguous: slices are still views
+            idx = slice(int(idx[0]), int(idx[-1]) + 1)
+        return self.inputs[idx], self.targets[idx]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+        self.on_epoch_end()
+
+    def keras_dataset(self):
+        """This sampler wrapped as a keras.utils.PyDataset (imports TensorFlow)"""
+        from tensorflow import keras
+
+        batches = self
+
+        class _Dataset(keras.utils.PyDataset):
+            def __len__(self):
+                return len(batches)
+
+            def __getitem__(self, index):
+                return batches[index]
+
+            def on_epoch_end(self):
+                batches.on_epoch_end()
+
+        return _Dataset()
@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Make the forecasting package importable when pytest runs from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FEATURES = ["Units Sold", "Price", "Discount", "Inventory Level"]
+
+
+def _write_engine(path, window=7, units=4, dropout=0.2, seed=0):
+    """A random LSTM/Dropout/Dense .npz in the layout numpy_lstm.export writes, scaler included"""
+    rng = np.random.default_rng(seed)
+    n = len(FEATURES)
+    spec = {
+        "input_shape": [window, n],
+        "layers": [
+            {"type": "lstm", "units": units, "return_sequences": False},
+            {"type": "dropout", "rate": dropout},
+            {"type": "dense", "activation": "linear"},
+        ],
+        "scaler_feature_range": [0.0, 1.0],
+        "scaler_clip": False,
+    }
+    low, high = np.array([0.0, 10.0, 0.0, 100.0]), np.array([200.0, 90.0, 25.0, 400.0])
+    np.savez(
+        path,
+        spec=np.asarray(json.dumps(spec)),
+        **{
+            "0_kernel": rng.normal(0, 0.5, (n, 4 * units)).astype(np.float32),
+            "0_recurrent": rng.normal(0, 0.5, (units, 4 * units)).astype(np.float32),
+            "0_bias": rng.normal(0, 0.1, 4 * units).astype(np.float32),
+            "2_kernel": rng.normal(0, 0.5, (units, 1)).astype(np.float32),
+            "2_bias": np.full(1, 0.5, dtype=np.float32),
+        },
+        scaler_scale=1.0 / (high - low),
+        scaler_min=-low / (high - low),
+        scaler_features=np.asarray(FEATURES),
+    )
+    return path
+
+
+@pytest.fixture
+def write_engine():
+    """write_engine(path, window=7, units=4, dropout=0.2, seed=0): a small NumPy engine file"""
+    return _write_engine
+
+
+@pytest.fixture
+def numpy_model(tmp_path):
+    """A LoadedModel served from a small random NumPy engine (no TensorFlow needed)"""
+    from forecasting.model_registry import ModelRegistry
+    from forecasting.model_store import MODEL_FILE
+    from forecasting.numpy_lstm import engine_path_for
+
+    _write_engine(engine_path_for(str(tmp_path / MODEL_FILE)))
+    return ModelRegistry(str(tmp_path), backend="numpy").get()
+
+
+def feature_rows(rows, seed=0):
+    """Unscaled daily feature rows within the engine's scaler range"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(50, 150, rows),
+        rng.uniform(10, 90, rows),
+        rng.integers(0, 25, rows).astype(float),
+        rng.uniform(100, 400, rows),
+    ])
+
+
+@pytest.fixture
+def rows():
+    """rows(n, seed=0): an (n, 4) array of unscaled feature rows"""
+    return feature_rows
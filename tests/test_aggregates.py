@@ -0,0 +1,156 @@
+"""
+AggregateStore against pandas: groupby means and pd.cut histograms over date
+ranges, before and after appending rows
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.aggregates import AggregateCache, AggregateStore, histogram_edges
+
+GROUPS = ("Category", "Region", "Promotion")
+BINS = 30
+RANGES = [
+    (None, None),
+    ("2022-01-05", "2022-01-20"),
+    ("2022-01-10", None),
+    (None, "2022-01-03"),
+    ("2022-01-07", "2022-01-07"),
+    ("2021-06-01", "2021-12-31"),     # before the data
+    ("2023-01-01", None),             # after the data
+    ("2022-01-20", "2022-01-05"),     # empty: start after end
+    ("2022-01-04T12:00", "2022-02-03T06:00"),
+]
+
+
+def _frame(start, days, seed, per_day=3, categories=(0.0, 1.0, 2.0), low=0.0, high=200.0):
+    rng = np.random.default_rng(seed)
+    n = days * per_day
+    df = pd.DataFrame({
+        "Date": pd.date_range(start, periods=days).repeat(per_day),
+        "Units Sold": rng.uniform(low, high, n),
+        "Category": rng.choice(categories, n),
+        "Region": rng.choice([0.0, 1.5, 3.0], n),
+        "Promotion": rng.integers(0, 2, n).astype(float),
+    })
+    # Missing values and missing keys are dropped, as groupby().mean() drops them
+    df.loc[df.index[::11], "Units Sold"] = np.nan
+    df.loc[df.index[5::13], "Region"] = np.nan
+    return df
+
+
+def _in_range(df, start, end):
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= df["Date"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df["Date"] <= pd.Timestamp(end)
+    return df[mask]
+
+
+def _assert_matches_pandas(store, df):
+    values = df["Units Sold"]
+    _, expected_edges = pd.cut(values, bins=BINS, retbins=True)
+    np.testing.assert_allclose(store.edges, expected_edges, rtol=1e-12)
+
+    for start, end in RANGES:
+        rows = _in_range(df, start, end)
+        for col in GROUPS:
+            keys, means = store.group_means(col, start, end)
+            expected = rows.groupby(col)["Units Sold"].mean().dropna()
+            np.testing.assert_array_equal(keys, expected.index.to_numpy())
+            np.testing.assert_allclose(means, expected.to_numpy(), rtol=1e-9)
+
+        counts, edges = store.histogram(start, end)
+        expected = pd.cut(rows["Units Sold"], bins=expected_edges).value_counts(sort=False)
+        np.testing.assert_array_equal(counts, expected.to_numpy())
+
+
+def test_build_matches_pandas():
+    df = _frame("2022-01-01", 30, seed=0)
+    _assert_matches_pandas(AggregateStore.build(df, bins=BINS), df)
+
+
+@pytest.mark.parametrize("appended", [
+    # Continues the last stored day, then adds new ones
+    lambda: _frame("2022-01-30", 5, seed=1),
+    # Only new days
+    lambda: _frame("2022-01-31", 4, seed=2),
+    # A Category key never seen before
+    lambda: _frame("2022-01-31", 4, seed=3, categories=(1.0, 7.0)),
+    # Values outside the current range move every histogram edge
+    lambda: _frame("2022-01-31", 4, seed=4, low=-50.0, high=400.0),
+])
+def test_extended_matches_a_fresh_build_and_pandas(appended):
+    base = _frame("2022-01-01", 30, seed=0)
+    df = pd.concat([base, appended()], ignore_index=True)
+    store = AggregateStore.build(base, bins=BINS).extended(df)
+
+    assert store.n_rows == len(df)
+    _assert_matches_pandas(store, df)
+    rebuilt = AggregateStore.build(df, bins=BINS)
+    np.testing.assert_array_equal(store.dates, rebuilt.dates)
+    for col in GROUPS:
+        for got, want in zip(store.groups[col], rebuilt.groups[col]):
+            np.testing.assert_allclose(got, want, rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(store.cum_hist, rebuilt.cum_hist)
+
+
+def test_extended_twice():
+    parts = [_frame("2022-01-01", 10, seed=0), _frame("2022-01-10", 5, seed=1),
+             _frame("2022-01-15", 5, seed=2, categories=(3.0,))]
+    store = AggregateStore.build(parts[0], bins=BINS)
+    for i in range(2, len(parts) + 1):
+        df = pd.concat(parts[:i], ignore_index=True)
+        store = store.extended(df)
+        _assert_matches_pandas(store, df)
+
+
+def test_extended_refuses_changed_rows():
+    df = _frame("2022-01-01", 10, seed=0)
+    store = AggregateStore.build(df, bins=BINS)
+    assert store.extended(df) is store
+    assert store.extended(df.iloc[:-1]) is None
+    edited = df.copy()
+    edited.loc[3, "Units Sold"] += 1
+    assert store.extended(edited) is None
+    assert store.extended(df.drop(columns=["Region"])) is None
+
+
+def test_histogram_edges_of_constant_and_empty_values():
+    for value in (5.0, 0.0, -2.0):
+        values = np.full(8, value)
+        _, expected = pd.cut(values, bins=4, retbins=True)
+        np.testing.assert_allclose(histogram_edges(values, 4), expected)
+    assert len(histogram_edges(np.array([np.nan]), 4)) == 5
+
+
+class _Datasets:
+    """Stand-in for DatasetCache.get_entry"""
+
+    def __init__(self, df):
+        self.df, self.fingerprint = df, 1
+
+    def get_entry(self, name):
+        return self.fingerprint, self.df
+
+
+def test_cache_extends_appended_versions_and_rebuilds_edited_ones():
+    base = _frame("2022-01-01", 10, seed=0)
+    datasets = _Datasets(base)
+    cache = AggregateCache(datasets, "daily_features", bins=BINS)
+    first = cache.get()
+    assert cache.get() is first
+
+    datasets.df = pd.concat([base, _frame("2022-01-11", 3, seed=1)], ignore_index=True)
+    datasets.fingerprint = 2
+    _assert_matches_pandas(cache.get(), datasets.df)
+
+    datasets.df = datasets.df.iloc[5:].reset_index(drop=True)
+    datasets.fingerprint = 3
+    _assert_matches_pandas(cache.get(), datasets.df)
+    assert cache.stats()["builds"] == 2
+    assert (cache.stats()["incremental"], cache.stats()["hits"]) == (1, 1)
+
+    datasets.df = None
+    assert cache.get() is None
@@ -0,0 +1,97 @@
+"""
+Walk-forward backtest: origin windows, batched origins and the written reports
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.backtest import (
+    BY_HORIZON, BY_ORIGIN, SUMMARY, backtest, default_first_origin, error_metrics, origin_windows, run,
+)
+from forecasting.forecast import rollout
+from forecasting.inference import TARGET_COL
+
+
+@pytest.mark.parametrize("first, step", [(0, 1), (5, 1), (12, 3), (20, 7), (36, 1)])
+def test_origin_windows_match_explicit_slices(first, step):
+    X = np.arange(40 * 3, dtype=float).reshape(40, 3)
+    window, horizon = 5, 4
+    origins, history, future = origin_windows(X, window, horizon, first, step)
+
+    expected = list(range(max(first, window), len(X) - horizon + 1, step))
+    assert origins.tolist() == expected
+    assert history.shape == (len(expected), window, 3)
+    assert future.shape == (len(expected), horizon, 3)
+    for i, origin in enumerate(expected):
+        np.testing.assert_array_equal(history[i], X[origin - window:origin])
+        np.testing.assert_array_equal(future[i], X[origin:origin + horizon])
+    assert np.shares_memory(history, X) and np.shares_memory(future, X)
+
+
+def test_origin_windows_need_enough_rows():
+    X = np.zeros((10, 2))
+    assert len(origin_windows(X, 4, 6, 0)[0]) == 1
+    with pytest.raises(ValueError, match="at least 11 rows"):
+        origin_windows(X, 4, 7, 0)
+    with pytest.raises(ValueError):
+        origin_windows(X, 4, 2, 9)
+
+
+@pytest.mark.parametrize("exog", ["actual", "hold"])
+def test_backtest_matches_one_rollout_per_origin(numpy_model, rows, exog):
+    X = rows(60)
+    horizon = 5
+    origins, preds, actuals = backtest(numpy_model, X, horizon, first=40, step=2, exog=exog, batch_size=3)
+
+    assert preds.shape == actuals.shape == (len(origins), horizon)
+    for origin, pred, actual in zip(origins, preds, actuals):
+        future = X[origin:origin + horizon]
+        future_exog = np.delete(future, TARGET_COL, axis=1) if exog == "actual" else None
+        expected = rollout(numpy_model, X[origin - numpy_model.window:origin], horizon, future_exog)
+        np.testing.assert_allclose(pred, expected, rtol=1e-5, atol=1e-4)
+        np.testing.assert_array_equal(actual, future[:, TARGET_COL])
+
+
+def test_backtest_reports_progress_per_chunk(numpy_model, rows):
+    fractions = []
+    origins, _, _ = backtest(numpy_model, rows(40), 3, first=10, batch_size=10, on_chunk=fractions.append)
+    assert len(origins) == 28
+    assert fractions == pytest.approx([10 / 28, 20 / 28, 1.0])
+    with pytest.raises(ValueError, match="exog"):
+        backtest(numpy_model, rows(40), 3, first=10, exog="mean")
+
+
+def test_error_metrics():
+    preds = np.array([[1.0, 2.0], [3.0, 5.0]])
+    actuals = np.array([[1.0, 4.0], [2.0, 5.0]])
+    m = error_metrics(preds, actuals)
+    np.testing.assert_allclose(m["origin_mae"], [1.0, 0.5])
+    np.testing.assert_allclose(m["origin_rmse"], [np.sqrt(2.0), np.sqrt(0.5)])
+    np.testing.assert_allclose(m["horizon_mae"], [0.5, 1.0])
+    np.testing.assert_allclose(m["horizon_rmse"], [np.sqrt(0.5), np.sqrt(2.0)])
+    assert m["mae"] == pytest.approx(0.75)
+    assert m["rmse"] == pytest.approx(np.sqrt(1.25))
+
+
+def test_run_writes_reports(numpy_model, rows, tmp_path):
+    data = rows(50)
+    df = pd.DataFrame(data, columns=["Units Sold", "Price", "Discount", "Inventory Level"])
+    df.insert(0, "Date", pd.date_range("2024-01-01", periods=50))
+
+    summary = run(numpy_model, df, horizon=4, start="2024-02-01", step=2, out_dir=str(tmp_path))
+    assert summary["first_origin"] == "2024-02-01"
+    assert summary["origins"] == len(range(31, 47, 2))
+    by_origin = pd.read_csv(tmp_path / BY_ORIGIN)
+    by_horizon = pd.read_csv(tmp_path / BY_HORIZON)
+    assert by_origin["Origin"].iloc[0] == "2024-02-01"
+    assert len(by_origin) == summary["origins"]
+    assert by_horizon["Horizon"].tolist() == [1, 2, 3, 4]
+    with open(os.path.join(tmp_path, SUMMARY)) as f:
+        assert json.load(f)["rmse"] == summary["rmse"]
+
+    # Without a start date, origins begin at the notebook's 80/20 split
+    assert run(numpy_model, df, horizon=4)["first_origin"] == str(
+        df["Date"].iloc[default_first_origin(len(df))].date())
@@ -0,0 +1,129 @@
+"""
+MicroBatcher: coalescing, grouping by key and per-batch error isolation
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from forecasting.batching import MicroBatcher
+
+TIMEOUT = 10
+
+
+class _Recorder:
+    """batch_fn that records each batch and can hold the worker until released"""
+
+    def __init__(self, fn=lambda items: [item * 2 for item in items]):
+        self.fn = fn
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, items):
+        self.gate.wait(TIMEOUT)
+        self.batches.append(list(items))
+        return self.fn(items)
+
+
+def _hold_worker(batcher, recorder, first):
+    """Block the worker on `first`, so everything submitted next is already queued when it gathers"""
+    recorder.gate.clear()
+    future = batcher.submit(first)
+    deadline = time.monotonic() + TIMEOUT
+    while batcher.stats()["batches"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return future
+
+
+def test_each_caller_gets_its_own_result():
+    batcher = MicroBatcher(_Recorder(), max_batch=8, window_ms=5)
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(lambda i: batcher(i, timeout=TIMEOUT), range(50)))
+    assert results == [i * 2 for i in range(50)]
+    assert batcher.stats()["requests"] == 50
+
+
+def test_queued_items_are_coalesced_up_to_max_batch():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch=4, window_ms=0)
+    first = _hold_worker(batcher, recorder, -1)
+    futures = [batcher.submit(i) for i in range(10)]
+    recorder.gate.set()
+
+    assert first.result(TIMEOUT) == -2
+    assert [f.result(TIMEOUT) for f in futures] == [i * 2 for i in range(10)]
+    assert recorder.batches == [[-1], [0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    stats = batcher.stats()
+    assert stats["batch_size_histogram"] == {"1": 1, "2": 1, "4": 2}
+    assert stats["max_wait_ms"] > 0
+
+
+def test_items_with_different_keys_never_share_a_batch():
+    shapes = []
+
+    def predict(items):
+        stacked = np.stack(items)
+        shapes.append(stacked.shape)
+        return list(stacked.sum(axis=(1, 2)))
+
+    recorder = _Recorder(predict)
+    batcher = MicroBatcher(recorder, max_batch=16, window_ms=0, key_fn=lambda item: item.shape)
+    first = _hold_worker(batcher, recorder, np.ones((7, 4)))
+    items = [np.full((7, 4), i) if i % 2 else np.full((14, 4), i) for i in range(6)]
+    futures = [batcher.submit(item) for item in items]
+    recorder.gate.set()
+
+    assert first.result(TIMEOUT) == 28
+    assert [f.result(TIMEOUT) for f in futures] == [item.sum() for item in items]
+    assert sorted(shapes[1:]) == [(3, 7, 4), (3, 14, 4)]
+
+
+def test_a_failing_batch_only_fails_its_own_callers():
+    def predict(items):
+        if any(item < 0 for item in items):
+            raise ValueError("negative input")
+        return [item * 2 for item in items]
+
+    recorder = _Recorder(predict)
+    batcher = MicroBatcher(recorder, max_batch=16, window_ms=0, key_fn=lambda item: item < 0)
+    first = _hold_worker(batcher, recorder, 0)
+    good = [batcher.submit(i) for i in (1, 2, 3)]
+    bad = [batcher.submit(i) for i in (-1, -2)]
+    recorder.gate.set()
+
+    assert first.result(TIMEOUT) == 0
+    assert [f.result(TIMEOUT) for f in good] == [2, 4, 6]
+    for future in bad:
+        with pytest.raises(ValueError, match="negative"):
+            future.result(TIMEOUT)
+    # The worker survives and keeps serving
+    assert batcher(5, timeout=TIMEOUT) == 10
+
+
+def test_wrong_number_of_results_fails_the_batch():
+    recorder = _Recorder(lambda items: [0])
+    batcher = MicroBatcher(recorder, max_batch=4, window_ms=0)
+    first = _hold_worker(batcher, recorder, 1)
+    futures = [batcher.submit(i) for i in range(3)]
+    recorder.gate.set()
+
+    assert first.result(TIMEOUT) == 0
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 results for 3 items"):
+            future.result(TIMEOUT)
+
+
+def test_cancelled_futures_are_skipped():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch=8, window_ms=0)
+    first = _hold_worker(batcher, recorder, 0)
+    keep, drop = batcher.submit(1), batcher.submit(2)
+    assert drop.cancel()
+    recorder.gate.set()
+
+    assert first.result(TIMEOUT) == 0
+    assert keep.result(TIMEOUT) == 2
+    assert recorder.batches[1] == [1]
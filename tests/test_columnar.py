@@ -0,0 +1,74 @@
+"""
+Columnar copies: round trip, freshness against the CSV, and what the cache serves
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.columnar import columnar_dir, convert, is_fresh, read_columnar, read_manifest
+from forecasting.datasets import DatasetCache
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "daily_features.csv")
+    pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=5).strftime("%Y-%m-%d"),
+        "Units Sold": [1.0, 2.0, np.nan, 4.0, 5.0],
+        "Promotion": [0, 1, 0, 1, 1],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_round_trip_is_memory_mapped(csv_path):
+    convert(csv_path)
+    cols_dir = columnar_dir(csv_path)
+    df = read_columnar(cols_dir)
+    expected = pd.read_csv(csv_path, parse_dates=["Date"])
+    assert list(df.columns) == ["Date", "Units Sold", "Promotion"]
+    np.testing.assert_array_equal(df["Date"].to_numpy(), expected["Date"].to_numpy())
+    np.testing.assert_array_equal(df["Units Sold"].to_numpy(), expected["Units Sold"].to_numpy())
+    subset = read_columnar(cols_dir, ["Promotion", "Nope"])
+    assert list(subset.columns) == ["Promotion"]
+    with pytest.raises(FileNotFoundError):
+        read_columnar(cols_dir + ".missing")
+
+
+def test_fresh_only_while_the_csv_is_unchanged(csv_path):
+    manifest = convert(csv_path)
+    assert is_fresh(csv_path, manifest)
+    assert not is_fresh(csv_path, None)
+    with open(csv_path, "a") as f:
+        f.write("2024-01-06,6.0,0\n")
+    assert not is_fresh(csv_path, manifest)
+
+
+def test_copy_of_a_deleted_csv_is_not_fresh(csv_path):
+    manifest = convert(csv_path)
+    os.remove(csv_path)
+    assert not is_fresh(csv_path, manifest)
+
+
+def test_cache_drops_a_dataset_whose_csv_was_deleted(csv_path):
+    convert(csv_path)
+    cache = DatasetCache(os.path.dirname(csv_path), background=False)
+    assert cache.fingerprint("daily_features")[0] == "columnar"
+    assert len(cache.get("daily_features")) == 5
+
+    os.remove(csv_path)
+    assert read_manifest(columnar_dir(csv_path)) is not None
+    assert cache.fingerprint("daily_features") is None
+    assert cache.get("daily_features") is None
+
+
+def test_convert_replaces_the_previous_copy(csv_path):
+    convert(csv_path)
+    pd.DataFrame({"Date": ["2024-02-01"], "Units Sold": [9.0]}).to_csv(csv_path, index=False)
+    manifest = convert(csv_path)
+    cols_dir = columnar_dir(csv_path)
+    assert manifest["rows"] == 1
+    assert read_columnar(cols_dir)["Units Sold"].tolist() == [9.0]
+    leftovers = [name for name in os.listdir(os.path.dirname(cols_dir)) if ".tmp" in name or ".old" in name]
+    assert leftovers == []
@@ -0,0 +1,166 @@
+"""
+DatasetCache: mtime revalidation, stale-while-reloading and track()
+"""
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from forecasting import datasets as datasets_module
+from forecasting.columnar import convert
+from forecasting.datasets import DatasetCache
+
+TIMEOUT = 10
+
+
+def _write_csv(path, units, start="2024-01-01"):
+    pd.DataFrame({
+        "Date": pd.date_range(start, periods=len(units)).strftime("%Y-%m-%d"),
+        "Units Sold": units,
+        "Price": [10.0] * len(units),
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    _write_csv(str(tmp_path / "daily_features.csv"), [1.0, 2.0, 3.0])
+    return tmp_path
+
+
+@pytest.fixture
+def gated_reads(monkeypatch):
+    """While the returned event is clear, CSV parses block until it is set"""
+    gate = threading.Event()
+    gate.set()
+    read = datasets_module.read_dataset
+
+    def gated(*args, **kwargs):
+        gate.wait(TIMEOUT)
+        return read(*args, **kwargs)
+
+    monkeypatch.setattr(datasets_module, "read_dataset", gated)
+    return gate
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_parses_once_and_shares_the_frame(data_dir):
+    cache = DatasetCache(str(data_dir))
+    df = cache.get("daily_features")
+    assert cache.get("daily_features") is df
+    assert df["Date"].dtype.kind == "M"
+    assert (cache.counters["misses"], cache.counters["hits"]) == (1, 1)
+
+
+def test_missing_file(data_dir):
+    cache = DatasetCache(str(data_dir))
+    assert cache.get("forecast_results") is None
+    assert cache.get_entry("forecast_results") == (None, None)
+
+
+def test_column_subsets_are_cached_separately(data_dir):
+    cache = DatasetCache(str(data_dir))
+    subset = cache.get("daily_features", ["Date", "Units Sold", "Nope"])
+    assert list(subset.columns) == ["Date", "Units Sold"]
+    assert list(cache.get("daily_features").columns) == ["Date", "Units Sold", "Price"]
+    assert cache.get("daily_features", ["Date", "Units Sold", "Nope"]) is subset
+
+
+def test_stale_frame_is_served_while_reloading(data_dir, gated_reads):
+    path = str(data_dir / "daily_features.csv")
+    cache = DatasetCache(str(data_dir))
+    old_fp, old = cache.get_entry("daily_features")
+
+    gated_reads.clear()
+    _write_csv(path, [10.0, 20.0, 30.0, 40.0])
+    new_fp = cache.fingerprint("daily_features")
+    assert new_fp != old_fp
+    for _ in range(3):
+        # Never blocks on the parse, and reports the fingerprint the frame was read under
+        assert cache.get_entry("daily_features") == (old_fp, old)
+    assert cache.counters["stale_served"] == 3
+
+    gated_reads.set()
+    _wait_for(lambda: cache.get_entry("daily_features")[0] == new_fp)
+    fp, df = cache.get_entry("daily_features")
+    assert df["Units Sold"].tolist() == [10.0, 20.0, 30.0, 40.0]
+    # One background reload, however many requests saw the stale frame
+    assert cache.counters["reloads"] == 1
+
+
+def test_foreground_reload_without_background(data_dir):
+    cache = DatasetCache(str(data_dir), background=False)
+    cache.get("daily_features")
+    _write_csv(str(data_dir / "daily_features.csv"), [7.0])
+    assert cache.get("daily_features")["Units Sold"].tolist() == [7.0]
+
+
+def test_track_records_what_this_thread_was_served(data_dir, gated_reads):
+    path = str(data_dir / "daily_features.csv")
+    cache = DatasetCache(str(data_dir))
+    old_fp = cache.get_entry("daily_features")[0]
+
+    with cache.track() as served:
+        cache.get("daily_features")
+        cache.get("forecast_results")
+    assert served == {"daily_features": {old_fp}, "forecast_results": {None}}
+
+    gated_reads.clear()
+    _write_csv(path, [5.0, 6.0])
+    with cache.track() as served:
+        cache.get("daily_features")
+    # The stale frame is reported under its own fingerprint, not the file's
+    assert served == {"daily_features": {old_fp}}
+    assert cache.fingerprint("daily_features") != old_fp
+    gated_reads.set()
+
+
+def test_track_nests_and_is_per_thread(data_dir):
+    cache = DatasetCache(str(data_dir))
+    with cache.track() as outer:
+        with cache.track() as inner:
+            cache.get("daily_features")
+        other = {}
+
+        def other_thread():
+            with cache.track() as served:
+                other.update(served)
+            cache.get("forecast_results")
+
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+    assert set(inner) == set(outer) == {"daily_features"}
+    assert other == {}
+    # Outside any block nothing is recorded and nothing fails
+    cache.get("daily_features")
+
+
+def test_fresh_columnar_copy_is_preferred(data_dir):
+    path = str(data_dir / "daily_features.csv")
+    convert(path)
+    cache = DatasetCache(str(data_dir))
+    fp, df = cache.get_entry("daily_features", ["Units Sold"])
+    assert fp[0] == "columnar"
+    assert df["Units Sold"].tolist() == [1.0, 2.0, 3.0]
+
+    # A CSV written after the copy makes the copy stale: back to parsing the CSV
+    _write_csv(path, [4.0, 5.0])
+    os.utime(path, ns=(time.time_ns() + 10**9,) * 2)
+    assert cache.fingerprint("daily_features")[0] == "csv"
+
+
+def test_stats_describe_cached_frames(data_dir):
+    cache = DatasetCache(str(data_dir))
+    cache.get("daily_features")
+    cache.get("daily_features", ["Units Sold"])
+    stats = cache.stats()
+    assert stats["datasets"]["daily_features"]["rows"] == 3
+    assert stats["datasets"]["daily_features[Units Sold]"]["source"] == "csv"
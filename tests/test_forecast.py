@@ -0,0 +1,85 @@
+"""
+Recursive rollout on the mirrored ring buffer against the notebook's np.append loop
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.forecast import cached_rollout, forecast_frame, rollout
+from forecasting.forecast_cache import ForecastCache
+from forecasting.inference import TARGET_COL, scale_features, unscale_target
+
+
+def _naive_rollout(entry, history, horizon, future_exog=None):
+    """One forecast the way notebooks/lstm_modeling_evaluation.ipynb builds it"""
+    scaler = entry.scaler
+    current = scale_features(scaler, history)
+    exog_cols = [c for c in range(entry.n_features) if c != TARGET_COL]
+    preds = []
+    for step in range(horizon):
+        pred = float(np.asarray(entry.predict(current[np.newaxis])).reshape(-1)[0])
+        preds.append(pred)
+        new_row = current[-1].copy()
+        if future_exog is not None:
+            new_row[exog_cols] = future_exog[step] * scaler.scale_[exog_cols] + scaler.min_[exog_cols]
+        new_row[TARGET_COL] = pred
+        current = np.append(current[1:], [new_row], axis=0)
+    return unscale_target(scaler, np.array(preds))
+
+
+@pytest.mark.parametrize("horizon", [1, 6, 7, 8, 30])
+def test_matches_the_append_loop(numpy_model, rows, horizon):
+    history = rows(numpy_model.window)
+    np.testing.assert_allclose(rollout(numpy_model, history, horizon),
+                               _naive_rollout(numpy_model, history, horizon), rtol=1e-5, atol=1e-4)
+
+
+def test_future_exogenous_values(numpy_model, rows):
+    history = rows(numpy_model.window)
+    future = rows(20, seed=1)[:, 1:]
+    got = rollout(numpy_model, history, 20, future_exog=future)
+    np.testing.assert_allclose(got, _naive_rollout(numpy_model, history, 20, future), rtol=1e-5, atol=1e-4)
+    assert not np.allclose(got, rollout(numpy_model, history, 20))
+
+
+def test_batched_histories_match_one_at_a_time(numpy_model, rows):
+    histories = rows(5 * numpy_model.window).reshape(5, numpy_model.window, -1)
+    batched = rollout(numpy_model, histories, 12)
+    assert batched.shape == (5, 12)
+    for history, preds in zip(histories, batched):
+        np.testing.assert_allclose(preds, rollout(numpy_model, history, 12), rtol=1e-5, atol=1e-4)
+
+
+def test_history_is_not_modified(numpy_model, rows):
+    history = rows(numpy_model.window)
+    before = history.copy()
+    rollout(numpy_model, history, 10)
+    np.testing.assert_array_equal(history, before)
+
+
+def test_rejects_bad_input(numpy_model, rows):
+    with pytest.raises(ValueError, match="History must have shape"):
+        rollout(numpy_model, rows(numpy_model.window + 1), 5)
+    with pytest.raises(ValueError, match="Horizon"):
+        rollout(numpy_model, rows(numpy_model.window), 0)
+    with pytest.raises(ValueError, match="whole horizon"):
+        rollout(numpy_model, rows(numpy_model.window), 5, future_exog=rows(3)[:, 1:])
+
+
+def test_cached_rollout_reuses_the_result(numpy_model, rows):
+    cache = ForecastCache()
+    history = rows(numpy_model.window)
+    first = cached_rollout(cache, numpy_model, history, 9)
+    assert cached_rollout(cache, numpy_model, history, 9) is first
+    np.testing.assert_array_equal(first, rollout(numpy_model, history, 9))
+    assert cache.stats()["hits"] == 1
+
+
+def test_forecast_frame_dates_follow_the_last_row(numpy_model, rows):
+    data = rows(20)
+    df = pd.DataFrame(data, columns=["Units Sold", "Price", "Discount", "Inventory Level"])
+    df.insert(0, "Date", pd.date_range("2023-12-20", periods=20))
+    records = forecast_frame(numpy_model, df, 3)
+    assert [r["Date"] for r in records] == ["2024-01-09", "2024-01-10", "2024-01-11"]
+    np.testing.assert_allclose([r["Predicted Units Sold"] for r in records],
+                               rollout(numpy_model, data[-numpy_model.window:], 3))
@@ -0,0 +1,130 @@
+"""
+ForecastCache: keys, LRU bounds, the SQLite tier and invalidation on model swaps
+"""
+import numpy as np
+import pytest
+
+from forecasting.forecast_cache import ForecastCache
+
+
+class _Entry:
+    """Stand-in for LoadedModel; swap listeners only read .version"""
+
+    def __init__(self, version):
+        self.version = version
+
+
+def _key(version, i):
+    return ForecastCache.key(version, "forecast", np.full((14, 4), float(i)), horizon=1)
+
+
+def test_key_depends_on_version_kind_inputs_and_params():
+    x = np.arange(56.0).reshape(14, 4)
+    base = ForecastCache.key("v1", "forecast", x, horizon=30)
+    assert base == ForecastCache.key("v1", "forecast", x.astype(np.float32), horizon=30)
+    assert base != ForecastCache.key("v2", "forecast", x, horizon=30)
+    assert base != ForecastCache.key("v1", "predict", x, horizon=30)
+    assert base != ForecastCache.key("v1", "forecast", x + 1, horizon=30)
+    assert base != ForecastCache.key("v1", "forecast", x.reshape(28, 2), horizon=30)
+    assert base != ForecastCache.key("v1", "forecast", x, horizon=7)
+
+
+def test_put_get_returns_read_only_copy():
+    cache = ForecastCache()
+    source = np.array([1.0, 2.0])
+    stored = cache.put("k", "v1", source)
+    source[0] = 99.0
+    np.testing.assert_array_equal(cache.get("k"), [1.0, 2.0])
+    with pytest.raises(ValueError):
+        stored[0] = 5.0
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_lru_stays_bounded_by_entries():
+    cache = ForecastCache(max_entries=3)
+    for i in range(3):
+        cache.put(_key("v1", i), "v1", [float(i)])
+    # Touch the oldest so the second one becomes least recently used
+    assert cache.get(_key("v1", 0)) is not None
+    cache.put(_key("v1", 3), "v1", [3.0])
+
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.get(_key("v1", 1)) is None
+    for i in (0, 2, 3):
+        assert cache.get(_key("v1", i)) is not None
+
+
+def test_lru_stays_bounded_by_bytes():
+    cache = ForecastCache(max_entries=100, max_bytes=10 * 8 * 8)
+    for i in range(25):
+        cache.put(_key("v1", i), "v1", np.zeros(8))
+    stats = cache.stats()
+    assert stats["entries"] == 10
+    assert stats["bytes"] <= cache.max_bytes
+    assert cache.get(_key("v1", 24)) is not None
+    assert cache.get(_key("v1", 0)) is None
+
+
+def test_replacing_a_key_does_not_leak_bytes():
+    cache = ForecastCache()
+    for _ in range(5):
+        cache.put("k", "v1", np.zeros(16))
+    assert cache.stats()["bytes"] == 16 * 8
+
+
+def test_swap_drops_only_the_old_version():
+    cache = ForecastCache()
+    cache.put(_key("v1", 0), "v1", [1.0])
+    cache.put(_key("v1", 1), "v1", [2.0])
+    cache.put(_key("north@v1", 0), "north@v1", [3.0])
+
+    cache.on_model_swap(None, _Entry("v1"))
+    assert cache.stats()["entries"] == 3
+
+    cache.on_model_swap(_Entry("v1"), _Entry("v2"))
+    assert cache.get(_key("v1", 0)) is None
+    assert cache.get(_key("v1", 1)) is None
+    np.testing.assert_array_equal(cache.get(_key("north@v1", 0)), [3.0])
+    assert cache.stats()["bytes"] == 8
+
+
+def test_disk_tier_serves_hits_after_restart(tmp_path):
+    path = str(tmp_path / "forecast_cache.db")
+    first = ForecastCache(path)
+    first.put(_key("v1", 0), "v1", [1.5, 2.5])
+
+    restarted = ForecastCache(path)
+    value = restarted.get(_key("v1", 0))
+    np.testing.assert_array_equal(value, [1.5, 2.5])
+    assert not value.flags.writeable
+    assert restarted.stats()["disk_hits"] == 1
+    # Promoted into memory: the second lookup doesn't touch the disk
+    restarted.get(_key("v1", 0))
+    assert restarted.stats()["hits"] == 1
+
+
+def test_swap_invalidates_the_disk_tier(tmp_path):
+    path = str(tmp_path / "forecast_cache.db")
+    cache = ForecastCache(path)
+    cache.put(_key("v1", 0), "v1", [1.0])
+    cache.put(_key("v2", 0), "v2", [2.0])
+    cache.on_model_swap(_Entry("v1"), _Entry("v2"))
+
+    restarted = ForecastCache(path)
+    assert restarted.get(_key("v1", 0)) is None
+    np.testing.assert_array_equal(restarted.get(_key("v2", 0)), [2.0])
+    assert restarted.stats()["disk_entries"] == 1
+
+
+def test_disk_tier_trims_oldest_rows(tmp_path):
+    cache = ForecastCache(str(tmp_path / "forecast_cache.db"), max_entries=8, max_disk_entries=100)
+    for i in range(256):
+        cache.put(_key("v1", i), "v1", [float(i)])
+    stats = cache.stats()
+    assert stats["disk_entries"] == 100
+    assert stats["entries"] == 8
+    assert ForecastCache(cache.path).get(_key("v1", 0)) is None
+    assert ForecastCache(cache.path).get(_key("v1", 255)) is not None
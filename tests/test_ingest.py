@@ -0,0 +1,221 @@
+"""
+Incremental ingest: every run must leave daily_features.csv equal to a full
+label-encode + groupby("Date").mean() of the raw file
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.ingest import CATEGORICAL, OUTPUT_COLUMNS, ingest, state_paths
+
+CHOICES = {
+    "Category": ["Clothing", "Electronics", "Groceries", "Toys"],
+    "Region": ["East", "North", "South", "West"],
+    "Weather Condition": ["Cloudy", "Rainy", "Snowy", "Sunny"],
+    "Seasonality": ["Autumn", "Spring", "Summer", "Winter"],
+}
+
+
+def _raw_rows(start, days, per_day=6, seed=0):
+    rng = np.random.default_rng(seed)
+    n = days * per_day
+    dates = pd.date_range(start, periods=days).repeat(per_day).strftime("%Y-%m-%d")
+    rows = pd.DataFrame({
+        "Date": dates,
+        "Store ID": rng.choice(["S001", "S002"], n),
+        "Product ID": rng.choice(["P0001", "P0002"], n),
+        **{col: rng.choice(values, n) for col, values in CHOICES.items()},
+        "Inventory Level": rng.uniform(50, 500, n),
+        "Units Sold": rng.uniform(0, 200, n),
+        "Units Ordered": rng.uniform(0, 200, n),
+        "Price": rng.uniform(10, 100, n),
+        "Discount": rng.choice([0, 5, 10, 20], n),
+        "Promotion": rng.integers(0, 2, n),
+        "Competitor Pricing": rng.uniform(10, 100, n),
+        "Epidemic": rng.integers(0, 2, n),
+        "Demand": rng.uniform(0, 200, n),
+    })
+    # Every category in every batch, so codes match a sorted LabelEncoder
+    for col, values in CHOICES.items():
+        rows.loc[rows.index[:len(values)], col] = values
+    return rows
+
+
+def _append(path, rows):
+    rows.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+
+def _expected(raw_path):
+    raw = pd.read_csv(raw_path, parse_dates=["Date"])
+    for col in CATEGORICAL:
+        raw[col] = raw[col].map({v: i for i, v in enumerate(sorted(raw[col].dropna().unique()))})
+    return raw.groupby("Date")[OUTPUT_COLUMNS].mean()
+
+
+def _assert_matches_full(raw_path, out_path):
+    written = pd.read_csv(out_path, parse_dates=["Date"], index_col="Date")
+    expected = _expected(raw_path)
+    assert list(written.columns) == OUTPUT_COLUMNS
+    pd.testing.assert_index_equal(written.index, expected.index)
+    np.testing.assert_allclose(written.to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-9)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "sales_data.csv"), str(tmp_path / "daily_features.csv")
+
+
+def _run(raw, out, **kwargs):
+    return ingest(raw, out, chunksize=7, columnar=False, **kwargs)
+
+
+def test_first_run_is_full_and_matches_groupby(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 10))
+    summary = _run(raw, out)
+    assert summary["mode"] == "full"
+    assert summary["days_total"] == 10
+    _assert_matches_full(raw, out)
+    assert all(os.path.exists(p) for p in state_paths(out))
+
+
+def test_rerun_without_new_rows_is_unchanged(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 5))
+    _run(raw, out)
+    before = os.stat(out)
+    summary = _run(raw, out)
+    assert summary["mode"] == "unchanged"
+    assert summary["raw_bytes_read"] == 0
+    assert os.stat(out).st_mtime_ns == before.st_mtime_ns
+
+
+def test_appended_rows_only_add_new_days(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 10))
+    _run(raw, out)
+    inode = os.stat(out).st_ino
+    _append(raw, _raw_rows("2022-01-11", 4, seed=1))
+
+    summary = _run(raw, out)
+    assert summary["mode"] == "incremental"
+    assert (summary["rows_read"], summary["days_changed"], summary["days_added"]) == (24, 4, 4)
+    assert summary["days_total"] == 14
+    _assert_matches_full(raw, out)
+    # Replaced by rename, never rewritten in place
+    assert os.stat(out).st_ino != inode
+    assert not os.path.exists(out + ".tmp")
+
+
+def test_late_rows_rewrite_from_the_earliest_touched_day(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 10))
+    _run(raw, out)
+    _append(raw, _raw_rows("2022-01-04", 2, seed=2))
+
+    summary = _run(raw, out)
+    assert summary["mode"] == "incremental"
+    assert (summary["days_changed"], summary["days_added"], summary["days_total"]) == (2, 0, 10)
+    _assert_matches_full(raw, out)
+
+    # And a further append on top of the rewritten tail
+    _append(raw, _raw_rows("2022-01-09", 4, seed=3))
+    assert _run(raw, out)["mode"] == "incremental"
+    _assert_matches_full(raw, out)
+
+
+def test_partial_last_line_waits_for_the_next_run(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 5))
+    tail = _raw_rows("2022-01-06", 2, seed=4).to_csv(header=False, index=False)
+    # Cut in the middle of the 8th line: all of the first day and one row of the second are complete
+    lines = tail.splitlines(keepends=True)
+    cut = sum(map(len, lines[:7])) + len(lines[7]) // 2
+    with open(raw, "a") as f:
+        f.write(tail[:cut])
+
+    summary = _run(raw, out)
+    assert (summary["rows_read"], summary["days_total"]) == (37, 7)
+    with open(raw) as f:
+        complete = f.read()
+    complete = complete[:complete.rfind("\n") + 1]
+    complete_path = raw + ".complete.csv"
+    with open(complete_path, "w") as f:
+        f.write(complete)
+    _assert_matches_full(complete_path, out)
+
+    with open(raw, "a") as f:
+        f.write(tail[cut:])
+    summary = _run(raw, out)
+    assert summary["mode"] == "incremental"
+    assert summary["days_total"] == 7
+    _assert_matches_full(raw, out)
+
+
+def test_rewritten_raw_file_forces_full_rebuild(paths):
+    raw, out = paths
+    rows = _raw_rows("2022-01-01", 8)
+    _append(raw, rows)
+    _run(raw, out)
+
+    rows.loc[3, "Units Sold"] = 10_000.0
+    rows.to_csv(raw, index=False)
+    _append(raw, _raw_rows("2022-01-09", 2, seed=5))
+    summary = _run(raw, out)
+    assert summary["mode"] == "full"
+    assert summary["days_total"] == 10
+    _assert_matches_full(raw, out)
+
+
+def test_truncated_raw_file_forces_full_rebuild(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 8))
+    _run(raw, out)
+    _raw_rows("2022-01-01", 3).to_csv(raw, index=False)
+
+    summary = _run(raw, out)
+    assert summary["mode"] == "full"
+    assert summary["days_total"] == 3
+    _assert_matches_full(raw, out)
+
+
+def test_modified_output_forces_full_rebuild(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 8))
+    _run(raw, out)
+    frame = pd.read_csv(out)
+    frame.iloc[:4].to_csv(out, index=False)
+    _append(raw, _raw_rows("2022-01-09", 2, seed=6))
+
+    summary = _run(raw, out)
+    assert summary["mode"] == "full"
+    _assert_matches_full(raw, out)
+
+
+def test_modified_output_without_new_rows_is_rebuilt(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 6))
+    _run(raw, out)
+    with open(out, "a") as f:
+        f.write("garbage\n")
+
+    assert _run(raw, out)["mode"] == "full"
+    _assert_matches_full(raw, out)
+
+
+def test_full_flag_ignores_state(paths):
+    raw, out = paths
+    _append(raw, _raw_rows("2022-01-01", 6))
+    _run(raw, out)
+    _append(raw, _raw_rows("2022-01-07", 2, seed=7))
+    assert _run(raw, out, full=True)["mode"] == "full"
+    _assert_matches_full(raw, out)
+
+
+def test_missing_columns_are_rejected(paths):
+    raw, out = paths
+    _raw_rows("2022-01-01", 2).drop(columns=["Demand"]).to_csv(raw, index=False)
+    with pytest.raises(ValueError, match="Demand"):
+        _run(raw, out)
@@ -0,0 +1,107 @@
+"""
+Monte Carlo dropout intervals: shapes, quantiles and the batched sampling
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.inference import predict_batch, scale_features, unscale_target
+from forecasting.intervals import FIELDS, band_label, forecast_intervals, mc_dropout
+from forecasting.model_registry import ModelRegistry
+from forecasting.model_store import MODEL_FILE
+from forecasting.numpy_lstm import engine_path_for
+
+
+def _windows(entry, rows, n, seed=0):
+    return rows(n * entry.window, seed).reshape(n, entry.window, -1)
+
+
+@pytest.fixture
+def no_dropout_model(tmp_path, write_engine):
+    """Same layout with Dropout(0): every draw equals the point prediction"""
+    write_engine(engine_path_for(str(tmp_path / MODEL_FILE)), dropout=0.0)
+    return ModelRegistry(str(tmp_path), backend="numpy").get()
+
+
+def test_shapes_and_ordering(numpy_model, rows):
+    bands = mc_dropout(numpy_model, _windows(numpy_model, rows, 5), samples=50, level=0.8,
+                       rng=np.random.default_rng(0))
+    assert set(bands) == set(FIELDS)
+    for name in FIELDS:
+        assert bands[name].shape == (5,)
+    assert np.all(bands["lower"] <= bands["median"])
+    assert np.all(bands["median"] <= bands["upper"])
+    assert np.all(bands["std"] > 0)
+
+
+def test_quantiles_of_the_draws(numpy_model, rows):
+    X = _windows(numpy_model, rows, 3)
+    samples, level = 40, 0.9
+    bands = mc_dropout(numpy_model, X, samples, level, rng=np.random.default_rng(7))
+
+    # The same draws, made one sample-major stacked pass by hand
+    scaled = scale_features(numpy_model.scaler, X)
+    stacked = np.tile(scaled, (samples, 1, 1))
+    draws = unscale_target(numpy_model.scaler,
+                           numpy_model.sample(stacked, np.random.default_rng(7)).reshape(samples, len(X)))
+    np.testing.assert_allclose(bands["mean"], draws.mean(axis=0), rtol=1e-6)
+    np.testing.assert_allclose(bands["std"], draws.std(axis=0), rtol=1e-5)
+    np.testing.assert_allclose(bands["lower"], np.quantile(draws, 0.05, axis=0), rtol=1e-6)
+    np.testing.assert_allclose(bands["median"], np.median(draws, axis=0), rtol=1e-6)
+    np.testing.assert_allclose(bands["upper"], np.quantile(draws, 0.95, axis=0), rtol=1e-6)
+
+
+def test_wider_level_gives_wider_bands(numpy_model, rows):
+    X = _windows(numpy_model, rows, 4)
+    narrow = mc_dropout(numpy_model, X, 200, 0.5, rng=np.random.default_rng(1))
+    wide = mc_dropout(numpy_model, X, 200, 0.95, rng=np.random.default_rng(1))
+    assert np.all(wide["upper"] - wide["lower"] >= narrow["upper"] - narrow["lower"])
+
+
+def test_seeded_draws_are_reproducible(numpy_model, rows):
+    X = _windows(numpy_model, rows, 2)
+    first = mc_dropout(numpy_model, X, 30, rng=np.random.default_rng(5))
+    second = mc_dropout(numpy_model, X, 30, rng=np.random.default_rng(5))
+    for name in FIELDS:
+        np.testing.assert_array_equal(first[name], second[name])
+
+
+@pytest.mark.parametrize("batch_size", [10, 64, 4096])
+def test_chunked_passes_match_the_point_forecast_without_dropout(no_dropout_model, rows, batch_size):
+    # 4 samples per window and batch_size 10 -> two windows per forward pass
+    X = _windows(no_dropout_model, rows, 7)
+    bands = mc_dropout(no_dropout_model, X, samples=4, level=0.9, batch_size=batch_size)
+    expected = predict_batch(no_dropout_model, X)
+    for name in ("mean", "lower", "median", "upper"):
+        np.testing.assert_allclose(bands[name], expected, rtol=1e-5)
+    np.testing.assert_allclose(bands["std"], 0, atol=1e-4)
+
+
+def test_rejects_bad_arguments(numpy_model, rows):
+    X = _windows(numpy_model, rows, 1)
+    with pytest.raises(ValueError, match="samples"):
+        mc_dropout(numpy_model, X, samples=1)
+    with pytest.raises(ValueError, match="level"):
+        mc_dropout(numpy_model, X, level=1.0)
+    with pytest.raises(ValueError, match="shape"):
+        mc_dropout(numpy_model, X[:, 1:], samples=10)
+
+
+def test_model_without_dropout_layers_is_rejected(numpy_model, rows):
+    numpy_model.model.layers = [layer for layer in numpy_model.model.layers if layer["type"] != "dropout"]
+    with pytest.raises(ValueError, match="no Dropout"):
+        mc_dropout(numpy_model, _windows(numpy_model, rows, 1), samples=10)
+
+
+def test_forecast_intervals_skips_dates_without_history(numpy_model, rows):
+    df = pd.DataFrame(rows(30), columns=["Units Sold", "Price", "Discount", "Inventory Level"])
+    df.insert(0, "Date", pd.date_range("2024-01-01", periods=30))
+    dates = ["2024-01-03", "2024-01-08", "2024-01-20", "2024-01-30", "2024-03-01"]
+
+    out = forecast_intervals(numpy_model, df, dates, samples=20, level=0.8, seed=0)
+    # Jan 3 has only 2 days before it and Mar 1 is not in the frame
+    assert out["Date"].tolist() == ["2024-01-08", "2024-01-20", "2024-01-30"]
+    assert (out["Lower Units Sold"] <= out["Upper Units Sold"]).all()
+    assert band_label(out) == "80% interval"
+    with pytest.raises(ValueError, match="history"):
+        forecast_intervals(numpy_model, df, ["2024-01-02"], samples=20)
@@ -0,0 +1,235 @@
+"""
+Job queue state machine: queued -> running -> done / error / cancelled
+"""
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from forecasting.jobs import (
+    JobCancelled, JobContext, JobQueue, JobQueueFull, JobStore, local_worker_alive, worker_id,
+)
+
+TIMEOUT = 10
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+@pytest.fixture
+def queue(store):
+    queue = JobQueue(store, max_workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def _wait(queue, job_id, *states):
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["state"] in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {queue.get(job_id)['state']}")
+
+
+def test_submit_runs_to_done(queue):
+    started, release = threading.Event(), threading.Event()
+
+    def handler(params, ctx):
+        started.set()
+        release.wait(TIMEOUT)
+        ctx.progress(0.5, "halfway")
+        return {"doubled": params["x"] * 2}
+
+    queue.register("double", handler)
+    job_id = queue.submit("double", {"x": 21}, owner=7)
+    assert started.wait(TIMEOUT)
+    job = queue.get(job_id)
+    assert (job["state"], job["owner"], job["started_at"] is not None) == ("running", "7", True)
+    assert queue.result(job_id)[1] is None
+
+    release.set()
+    job = _wait(queue, job_id, "done")
+    assert job["progress"] == 1.0
+    assert job["message"] == "halfway"
+    assert job["run_seconds"] >= 0
+    assert queue.result(job_id)[1] == {"doubled": 42}
+    assert "params" not in job
+
+
+@pytest.mark.parametrize("exc, message", [(ValueError("bad horizon"), "bad horizon"), (RuntimeError("boom"), "boom")])
+def test_handler_errors_end_in_error(queue, exc, message):
+    def handler(params, ctx):
+        raise exc
+
+    queue.register("fail", handler)
+    job = _wait(queue, queue.submit("fail"), "error")
+    assert job["error"] == message
+    assert queue.result(job["id"])[1] is None
+
+
+def test_validator_rejects_before_queueing(queue, store):
+    def validate(params):
+        if params.get("horizon", 0) <= 0:
+            raise ValueError("horizon must be positive")
+
+    queue.register("forecast", lambda params, ctx: None, validate=validate)
+    with pytest.raises(ValueError, match="positive"):
+        queue.submit("forecast", {"horizon": 0})
+    with pytest.raises(ValueError, match="Unknown job kind"):
+        queue.submit("nope")
+    assert store.counts() == {}
+
+
+def test_queue_full(store):
+    release = threading.Event()
+    queue = JobQueue(store, max_workers=1, max_pending=2)
+    queue.register("block", lambda params, ctx: release.wait(TIMEOUT))
+    try:
+        queue.submit("block")
+        queue.submit("block")
+        with pytest.raises(JobQueueFull):
+            queue.submit("block")
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_cancel_queued_job_never_runs(queue):
+    release = threading.Event()
+    ran = []
+    queue.register("block", lambda params, ctx: release.wait(TIMEOUT))
+    queue.register("record", lambda params, ctx: ran.append(1))
+    blocker = queue.submit("block")
+    queued = queue.submit("record")
+
+    assert queue.cancel(queued) == "cancelled"
+    release.set()
+    _wait(queue, blocker, "done")
+    queue.shutdown()
+    assert queue.get(queued)["state"] == "cancelled"
+    assert ran == []
+
+
+def test_cancel_running_job_stops_at_check(queue):
+    started = threading.Event()
+
+    def handler(params, ctx):
+        started.set()
+        while True:
+            ctx.check()
+            time.sleep(0.005)
+
+    queue.register("loop", handler)
+    job_id = queue.submit("loop")
+    assert started.wait(TIMEOUT)
+    assert queue.cancel(job_id) == "running"
+    job = _wait(queue, job_id, "cancelled")
+    assert job["cancel_requested"]
+    assert job["finished_at"] is not None
+
+
+def test_cancel_through_the_table_flag(queue, store, monkeypatch):
+    """A cancel made by another worker only sets cancel_requested; check() polls for it"""
+    monkeypatch.setattr(JobContext, "POLL_SECONDS", 0.0)
+    started = threading.Event()
+
+    def handler(params, ctx):
+        started.set()
+        while True:
+            ctx.check()
+            time.sleep(0.005)
+
+    queue.register("loop", handler)
+    job_id = queue.submit("loop")
+    assert started.wait(TIMEOUT)
+    # What JobQueue.cancel() in another worker does: that worker has no event for the job
+    assert store.update(job_id, only_if_state="running", cancel_requested=1)
+    _wait(queue, job_id, "cancelled")
+
+
+def test_context_polls_the_table_at_most_every_poll_seconds(store):
+    store.insert("j1", "loop", {}, None, "w")
+    store.update("j1", state="running")
+    ctx = JobContext("j1", store, threading.Event())
+    store.update("j1", cancel_requested=1)
+    assert not ctx.cancelled
+    ctx._polled -= JobContext.POLL_SECONDS
+    assert ctx.cancelled
+    with pytest.raises(JobCancelled):
+        ctx.check()
+
+
+def test_purge_by_age_and_count(store):
+    now = time.time()
+    for i in range(6):
+        store.insert(f"old{i}", "k", {}, None, "w")
+        store.update(f"old{i}", state="done", finished_at=now - 1000 - i)
+    for i in range(5):
+        store.insert(f"new{i}", "k", {}, None, "w")
+        store.update(f"new{i}", state="error" if i % 2 else "done", finished_at=now - i)
+    store.insert("running", "k", {}, None, "w")
+    store.update("running", state="running")
+
+    assert store.purge(older_than=now - 500, keep=3) == 8
+    remaining = {job["id"] for job in store.list()}
+    # Unfinished jobs are never purged; the newest finished ones survive
+    assert remaining == {"new0", "new1", "new2", "running"}
+
+
+def test_submit_purges_expired_jobs(store):
+    queue = JobQueue(store, retention_seconds=60, max_finished=100)
+    store.insert("stale", "k", {}, None, "w")
+    store.update("stale", state="done", finished_at=time.time() - 120)
+    queue.register("noop", lambda params, ctx: None)
+    try:
+        _wait(queue, queue.submit("noop"), "done")
+    finally:
+        queue.shutdown()
+    assert store.get("stale") is None
+
+
+def test_fail_interrupted_only_touches_dead_workers(store):
+    for job_id, worker, state in [
+        ("q-dead", "dead", "queued"), ("r-dead", "dead", "running"),
+        ("r-live", "live", "running"), ("d-dead", "dead", "done"),
+    ]:
+        store.insert(job_id, "k", {}, None, worker)
+        store.update(job_id, state=state)
+
+    assert store.fail_interrupted(lambda worker: worker == "live") == 2
+    for job_id in ("q-dead", "r-dead"):
+        job = store.get(job_id)
+        assert (job["state"], job["error"]) == ("error", "Interrupted by a worker restart")
+        assert job["finished_at"] is not None
+    assert store.get("r-live")["state"] == "running"
+    assert store.get("d-dead")["state"] == "done"
+
+
+def test_new_queue_fails_jobs_of_exited_local_workers(store):
+    host = socket.gethostname()
+    # pid 2**22 + 1 is above the kernel's pid_max, so no process has it
+    store.insert("gone", "k", {}, None, f"{host}:{2 ** 22 + 1}")
+    store.update("gone", state="running")
+    store.insert("remote", "k", {}, None, "other-host:1")
+
+    JobQueue(store).shutdown()
+    assert store.get("gone")["state"] == "error"
+    assert store.get("remote")["state"] == "queued"
+
+
+def test_local_worker_alive():
+    host = socket.gethostname()
+    assert worker_id() == f"{host}:{os.getpid()}"
+    # The same pid means this process restarted, so its old jobs are orphans
+    assert not local_worker_alive(worker_id())
+    assert local_worker_alive(f"{host}:{os.getppid()}")
+    assert not local_worker_alive(f"{host}:{2 ** 22 + 1}")
+    assert local_worker_alive("other-host:1")
+    assert not local_worker_alive(None)
+    assert not local_worker_alive(f"{host}:not-a-pid")
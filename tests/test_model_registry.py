@@ -0,0 +1,158 @@
+"""
+ModelRegistry: version resolution, loading, hot swaps and the watcher
+"""
+import gc
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from forecasting import model_store
+from forecasting.inference import scale_features
+from forecasting.model_registry import ModelRegistry, ModelUnavailableError
+from forecasting.model_store import MODEL_FILE, SCALER_FILE
+from forecasting.numpy_lstm import engine_path_for
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _flat_dir(tmp_path):
+    model_dir = str(tmp_path)
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    _write(model_path, b"model")
+    _write(engine_path_for(model_path), b"engine")
+    _write(os.path.join(model_dir, SCALER_FILE), b"scaler")
+    return model_dir, model_path
+
+
+def test_legacy_version_hashes_every_artifact(tmp_path):
+    model_dir, model_path = _flat_dir(tmp_path)
+    registry = ModelRegistry(model_dir)
+    version = registry._resolve()[0]
+    assert version == registry._resolve()[0]
+
+    seen = {version}
+    for path in (model_path, engine_path_for(model_path), os.path.join(model_dir, SCALER_FILE)):
+        _write(path, b"replaced " + os.path.basename(path).encode())
+        version = registry._resolve()[0]
+        assert version not in seen, f"replacing {os.path.basename(path)} kept the version"
+        seen.add(version)
+
+
+def test_legacy_version_is_none_without_artifacts(tmp_path):
+    assert ModelRegistry(str(tmp_path))._resolve()[0] is None
+
+
+def _publish(model_dir, staging, write_engine, version, seed):
+    """Publish a version whose NumPy engine has weights drawn from `seed`"""
+    src = os.path.join(staging, version)
+    os.makedirs(src)
+    model_src = os.path.join(src, MODEL_FILE)
+    _write(model_src, b"keras " + version.encode())
+    _write(os.path.join(src, SCALER_FILE), b"scaler")
+    write_engine(engine_path_for(model_src), seed=seed)
+    return model_store.publish(model_dir, model_src, os.path.join(src, SCALER_FILE), version=version)
+
+
+@pytest.fixture
+def store_dir(tmp_path, write_engine):
+    model_dir, staging = str(tmp_path / "models"), str(tmp_path / "staging")
+    os.makedirs(model_dir)
+
+    def publish(version, seed):
+        return _publish(model_dir, staging, write_engine, version, seed)
+
+    publish("v1", seed=1)
+    return model_dir, publish
+
+
+def test_get_loads_once_and_shares_the_entry(store_dir):
+    model_dir, _ = store_dir
+    registry = ModelRegistry(model_dir, backend="numpy")
+    seen = []
+    registry.add_swap_listener(lambda old, new: seen.append((old, new.version)))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(entry) for entry in results}) == 1
+    entry = results[0]
+    assert (entry.version, entry.backend, entry.window, entry.n_features) == ("v1", "numpy", 7, 4)
+    assert seen == [(None, "v1")]
+
+
+def test_reload_swaps_in_a_new_version(store_dir, rows):
+    model_dir, publish = store_dir
+    registry = ModelRegistry(model_dir, backend="numpy")
+    assert registry.reload_if_changed() is False  # nothing loaded yet
+    old = registry.get()
+    swaps = []
+    registry.add_swap_listener(lambda before, after: swaps.append((before.version, after.version)))
+    assert registry.reload_if_changed() is False
+
+    publish("v2", seed=2)
+    assert registry.reload_if_changed() is True
+    new = registry.get()
+    assert new.version == "v2" and registry.swaps == 1
+    assert swaps == [("v1", "v2")]
+    X = scale_features(new.scaler, rows(3 * new.window).reshape(3, new.window, -1))
+    assert not np.allclose(old.predict(X), new.predict(X))
+
+    # A request still holding the old entry keeps it alive, then it is freed
+    assert registry.status()["retired_versions_in_use"] == ["v1"]
+    del old
+    gc.collect()
+    assert registry.status()["retired_versions_in_use"] == []
+
+
+def test_activate_rolls_back(store_dir):
+    model_dir, publish = store_dir
+    registry = ModelRegistry(model_dir, backend="numpy")
+    publish("v2", seed=2)
+    assert registry.get().version == "v2"
+    model_store.activate(model_dir, "v1")
+    assert registry.reload_if_changed() is True
+    assert registry.get().version == "v1"
+
+
+def test_failed_reload_keeps_serving_the_current_version(store_dir):
+    model_dir, publish = store_dir
+    registry = ModelRegistry(model_dir, backend="numpy")
+    current = registry.get()
+    broken = publish("v2", seed=2)
+    _write(broken.engine_path, b"not an npz")
+
+    assert registry.reload_if_changed() is False
+    assert registry.get() is current
+    assert "v2" in registry.status()["last_error"]
+
+
+def test_watcher_picks_up_a_published_version(store_dir):
+    model_dir, publish = store_dir
+    registry = ModelRegistry(model_dir, backend="numpy")
+    registry.get()
+    swapped = threading.Event()
+    registry.add_swap_listener(lambda old, new: swapped.set())
+    registry.start_watcher(interval=0.01)
+    try:
+        assert registry.status()["watching"]
+        publish("v2", seed=2)
+        assert swapped.wait(10)
+        assert registry.get().version == "v2"
+    finally:
+        registry.stop_watcher()
+
+
+def test_numpy_backend_without_engine(tmp_path):
+    with pytest.raises(ModelUnavailableError):
+        ModelRegistry(str(tmp_path), backend="numpy").get()
+    with pytest.raises(ValueError):
+        ModelRegistry(str(tmp_path), backend="onnx")
@@ -0,0 +1,98 @@
+"""
+Parity of the NumPy LSTM engine with the Keras model it was exported from
+
+Needs TensorFlow, scikit-learn and joblib; skipped when they are missing.
+"""
+import os
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("sklearn")
+pytest.importorskip("joblib")
+
+from forecasting.inference import feature_columns, scale_features, unscale_target  # noqa: E402
+from forecasting.numpy_lstm import NumpyLSTMModel, check_parity, export  # noqa: E402
+from forecasting.windows import windows  # noqa: E402
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_MODEL = os.path.join(REPO, "models", "lstm_units_sold_model.keras")
+REPO_SCALER = os.path.join(REPO, "models", "minmax_scaler.pkl")
+DAILY_FEATURES = os.path.join(REPO, "data", "processed", "daily_features.csv")
+TOLERANCE = 1e-4
+COLUMNS = ["Units Sold", "Price", "Discount", "Inventory Level"]
+
+
+def _frame(rows=120, seed=0):
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Units Sold": rng.uniform(50, 150, rows),
+        "Price": rng.uniform(10, 90, rows),
+        "Discount": rng.integers(0, 25, rows).astype(float),
+        "Inventory Level": rng.uniform(100, 400, rows),
+    })
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    """A small stacked LSTM with the notebook's layer layout, saved and exported with its scaler"""
+    import joblib
+    from sklearn.preprocessing import MinMaxScaler
+    from forecasting.training import build_model
+
+    out = tmp_path_factory.mktemp("engine")
+    tf.keras.utils.set_random_seed(0)
+    model = build_model(7, len(COLUMNS), units=(16, 8), dropout=0.2)
+    model_path, scaler_path = str(out / "model.keras"), str(out / "scaler.pkl")
+    model.save(model_path)
+    joblib.dump(MinMaxScaler().fit(_frame()[COLUMNS]), scaler_path)
+    engine_path, keras_model = export(model_path, scaler_path=scaler_path)
+    engine, scaler = NumpyLSTMModel.load(engine_path)
+    return keras_model, engine, scaler, joblib.load(scaler_path)
+
+
+def test_random_windows_match_keras(exported):
+    keras_model, engine, _, _ = exported
+    assert check_parity(keras_model, engine, samples=512, seed=1) < TOLERANCE
+
+
+def test_scaled_windows_match_keras(exported):
+    keras_model, engine, scaler, _ = exported
+    scaled = scale_features(scaler, _frame(seed=2)[COLUMNS].to_numpy())
+    W = windows(scaled, engine.input_shape[1])
+    expected = np.asarray(keras_model.predict_on_batch(np.ascontiguousarray(W)))
+    assert np.max(np.abs(expected - engine.predict_on_batch(W))) < TOLERANCE
+
+
+def test_dropout_only_active_when_training(exported):
+    _, engine, _, _ = exported
+    X = np.random.default_rng(3).random((32,) + engine.input_shape[1:], dtype=np.float32)
+    np.testing.assert_array_equal(engine(X), engine.predict_on_batch(X))
+    assert not np.allclose(engine(X, training=True, rng=np.random.default_rng(0)), engine(X))
+
+
+def test_scaler_round_trip(exported):
+    _, _, scaler, sk_scaler = exported
+    X = _frame(seed=4)[COLUMNS]
+    assert list(scaler.feature_names_in_) == COLUMNS
+    assert feature_columns(scaler, ["Date"] + COLUMNS[::-1]) == COLUMNS
+    np.testing.assert_allclose(scaler.transform(X.to_numpy()), sk_scaler.transform(X), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(scaler.inverse_transform(scaler.transform(X.to_numpy())), X.to_numpy(), rtol=1e-10)
+    scaled = scale_features(scaler, X.to_numpy())
+    np.testing.assert_allclose(unscale_target(scaler, scaled[:, 0]), X["Units Sold"].to_numpy(), rtol=1e-5)
+
+
+@pytest.mark.skipif(not (os.path.exists(REPO_MODEL) and os.path.exists(DAILY_FEATURES)),
+                    reason="repository model or daily_features.csv not present")
+def test_repository_model_on_real_windows(tmp_path):
+    import pandas as pd
+
+    engine_path, keras_model = export(REPO_MODEL, str(tmp_path / "engine.npz"), REPO_SCALER)
+    engine, scaler = NumpyLSTMModel.load(engine_path)
+    df = pd.read_csv(DAILY_FEATURES, parse_dates=["Date"])
+    scaled = scale_features(scaler, df[feature_columns(scaler, df.columns)].to_numpy())
+    W = np.ascontiguousarray(windows(scaled, engine.input_shape[1]))
+    assert check_parity(keras_model, engine, windows=W) < TOLERANCE
@@ -0,0 +1,96 @@
+"""
+Date-range slices, ETags and encodings of the series API
+"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.series import make_etag, parse_date_ms, slice_columns, to_json_payload, to_npz_bytes
+
+RANGES = [
+    (None, None),
+    ("2024-01-05", "2024-01-20"),
+    ("2024-01-05", "2024-01-05"),
+    ("2024-01-05T12:00", "2024-01-07T00:00"),
+    ("2024-02-01", None),
+    (None, "2023-12-31"),
+    ("2024-03-01", None),
+    ("2024-01-20", "2024-01-05"),
+]
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=60),
+        "Units Sold": rng.uniform(0, 200, 60),
+        "Price": rng.uniform(10, 90, 60),
+        "Promotion": rng.integers(0, 2, 60),
+    })
+    frame.loc[[3, 17], "Units Sold"] = np.nan
+    return frame
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_slice_matches_a_boolean_mask(df, start, end):
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= df["Date"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df["Date"] <= pd.Timestamp(end)
+    expected = df[mask]
+
+    columns = slice_columns(df, ["Units Sold", "Promotion"], start, end)
+    assert list(columns) == ["Date", "Units Sold", "Promotion"]
+    np.testing.assert_array_equal(columns["Date"], expected["Date"].to_numpy())
+    np.testing.assert_array_equal(columns["Units Sold"], expected["Units Sold"].to_numpy())
+    np.testing.assert_array_equal(columns["Promotion"], expected["Promotion"].to_numpy())
+
+
+def test_slices_are_views(df):
+    columns = slice_columns(df, ["Price"], "2024-01-10", "2024-01-12")
+    assert np.shares_memory(columns["Price"], df["Price"].to_numpy())
+
+
+def test_bad_dates_raise_value_error(df):
+    with pytest.raises(ValueError):
+        slice_columns(df, ["Price"], "yesterday")
+    assert parse_date_ms("") is None
+    assert parse_date_ms("1970-01-02") == 86_400_000
+
+
+def test_etag_is_stable_and_query_specific():
+    fingerprint = ("csv", 1_700_000_000_000_000_000, 4096)
+    etag = make_etag(fingerprint, "daily_features", ["Units Sold"], "2024-01-01", None, False)
+    assert etag == make_etag(list(fingerprint), "daily_features", ["Units Sold"], "2024-01-01", None, False)
+    assert len(etag) == 32
+    variants = [
+        make_etag(("csv", 1_700_000_000_000_000_001, 4096), "daily_features", ["Units Sold"], "2024-01-01", None, False),
+        make_etag(("columnar", 1_700_000_000_000_000_000, 4096), "daily_features", ["Units Sold"], "2024-01-01", None, False),
+        make_etag(fingerprint, "forecast_results", ["Units Sold"], "2024-01-01", None, False),
+        make_etag(fingerprint, "daily_features", ["Price"], "2024-01-01", None, False),
+        make_etag(fingerprint, "daily_features", ["Units Sold"], "2024-01-02", None, False),
+        make_etag(fingerprint, "daily_features", ["Units Sold"], "2024-01-01", "2024-02-01", False),
+        make_etag(fingerprint, "daily_features", ["Units Sold"], "2024-01-01", None, True),
+    ]
+    assert len({etag, *variants}) == len(variants) + 1
+
+
+def test_json_payload_sends_nan_as_null(df):
+    payload = to_json_payload(slice_columns(df, ["Units Sold", "Promotion"], "2024-01-03", "2024-01-05"))
+    assert payload["Date"] == ["2024-01-03", "2024-01-04", "2024-01-05"]
+    assert payload["Units Sold"][1] is None
+    assert payload["Units Sold"][0] == pytest.approx(df["Units Sold"][2])
+    assert all(isinstance(v, int) for v in payload["Promotion"])
+
+
+def test_npz_round_trip(df):
+    columns = slice_columns(df, ["Units Sold", "Price"], "2024-01-10", "2024-01-19")
+    with np.load(io.BytesIO(to_npz_bytes(columns))) as data:
+        assert data["Date"].dtype == np.dtype("datetime64[ms]")
+        np.testing.assert_array_equal(data["Date"], columns["Date"].astype("datetime64[ms]"))
+        np.testing.assert_array_equal(data["Units Sold"], columns["Units Sold"])
+        np.testing.assert_array_equal(data["Price"], columns["Price"])
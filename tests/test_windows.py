@@ -0,0 +1,87 @@
+"""
+Strided window views against Keras' TimeseriesGenerator
+"""
+import numpy as np
+import pytest
+
+from forecasting.windows import WindowBatches, iter_batches, supervised, windows
+
+
+def _data(rows=50, features=3, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((rows, features))
+    return X, X[:, 0] * 10
+
+
+def test_windows_are_read_only_views():
+    X, _ = _data()
+    W = windows(X, 7)
+    assert W.shape == (44, 7, 3)
+    assert np.shares_memory(W, X)
+    assert not W.flags.writeable
+    for i in (0, 17, 43):
+        np.testing.assert_array_equal(W[i], X[i:i + 7])
+
+
+def test_windows_of_short_input_are_empty():
+    X, _ = _data(rows=5)
+    assert windows(X, 7).shape == (0, 7, 3)
+    assert windows(X, 5).shape == (1, 5, 3)
+
+
+@pytest.mark.parametrize("window", [1, 7, 14])
+def test_supervised_pairs_follow_the_generator_convention(window):
+    X, y = _data()
+    inputs, targets = supervised(X, y, window)
+    assert len(inputs) == len(targets) == len(X) - window
+    for i in range(len(targets)):
+        np.testing.assert_array_equal(inputs[i], X[i:i + window])
+        assert targets[i] == y[i + window]
+
+
+@pytest.mark.parametrize("window, batch_size", [(14, 32), (7, 5), (3, 1)])
+def test_matches_timeseries_generator(window, batch_size):
+    tf = pytest.importorskip("tensorflow")
+    X, y = _data()
+    generator = tf.keras.preprocessing.sequence.TimeseriesGenerator(X, y, length=window, batch_size=batch_size)
+    batches = WindowBatches(X, y, window, batch_size=batch_size, shuffle=False, dtype=np.float64)
+
+    assert len(batches) == len(generator)
+    for i in range(len(generator)):
+        expected_x, expected_y = generator[i]
+        got_x, got_y = batches[i]
+        np.testing.assert_array_equal(got_x, expected_x)
+        np.testing.assert_array_equal(got_y, expected_y)
+
+
+def test_ordered_batches_are_contiguous_views():
+    X, y = _data()
+    batches = WindowBatches(X, y, 7, batch_size=8, shuffle=False, dtype=np.float64)
+    inputs, targets = batches[2]
+    assert np.shares_memory(inputs, X)
+    np.testing.assert_array_equal(targets, y[7 + 16:7 + 24])
+    # The last batch is short, as with the generator
+    assert len(batches[len(batches) - 1][1]) == (len(X) - 7) % 8
+
+
+def test_shuffled_batches_cover_every_sample_once_per_epoch():
+    X, y = _data()
+    batches = WindowBatches(X, y, 7, batch_size=6, seed=3, dtype=np.float64)
+    epochs = []
+    for _ in range(2):
+        targets = np.concatenate([t for _, t in batches])
+        np.testing.assert_array_equal(np.sort(targets), np.sort(y[7:]))
+        epochs.append(targets)
+    # Reshuffled between epochs, reproducibly for a seed
+    assert not np.array_equal(*epochs)
+    again = WindowBatches(X, y, 7, batch_size=6, seed=3, dtype=np.float64)
+    np.testing.assert_array_equal(np.concatenate([t for _, t in again]), epochs[0])
+
+
+def test_iter_batches_chunks_views():
+    X, _ = _data()
+    W = windows(X, 7)
+    chunks = list(iter_batches(W, 10))
+    assert [start for start, _ in chunks] == [0, 10, 20, 30, 40]
+    assert sum(len(chunk) for _, chunk in chunks) == len(W)
+    assert all(np.shares_memory(chunk, X) for _, chunk in chunks)